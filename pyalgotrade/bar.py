@@ -45,6 +45,9 @@ class Bar(object):
         This is a base class and should not be used directly.
     """
 
+    # Optimization to reduce memory footprint. Subclasses should define __slots__ as well.
+    __slots__ = ()
+
     def getDateTime(self):
         """Returns the :class:`datetime.datetime`."""
         raise NotImplementedError()
@@ -86,19 +89,21 @@ class BasicBar(Bar):
     # Optimization to reduce memory footprint.
     __slots__ = ('__dateTime', '__open', '__close', '__high', '__low', '__volume', '__adjClose', '__frequency')
 
-    def __init__(self, dateTime, open_, high, low, close, volume, adjClose, frequency):
-        if high < open_:
-            raise Exception("high < open on %s" % (dateTime))
-        if high < low:
-            raise Exception("high < low on %s" % (dateTime))
-        if high < close:
-            raise Exception("high < close on %s" % (dateTime))
-        if low > open_:
-            raise Exception("low > open on %s" % (dateTime))
-        if low > high:
-            raise Exception("low > high on %s" % (dateTime))
-        if low > close:
-            raise Exception("low > close on %s" % (dateTime))
+    # Set validate to False to skip price checks for values that were already validated.
+    def __init__(self, dateTime, open_, high, low, close, volume, adjClose, frequency, validate=True):
+        if validate:
+            if high < open_:
+                raise Exception("high < open on %s" % (dateTime))
+            if high < low:
+                raise Exception("high < low on %s" % (dateTime))
+            if high < close:
+                raise Exception("high < close on %s" % (dateTime))
+            if low > open_:
+                raise Exception("low > open on %s" % (dateTime))
+            if low > high:
+                raise Exception("low > high on %s" % (dateTime))
+            if low > close:
+                raise Exception("low > close on %s" % (dateTime))
 
         self.__dateTime = dateTime
         self.__open = open_
@@ -154,27 +159,45 @@ class Bars(object):
 
     :param barDict: A map of instrument to :class:`Bar` objects.
     :type barDict: map.
+    :param validate: True to check that all bars have the same datetime.
+    :type validate: boolean.
 
     .. note::
         All bars must have the same datetime.
     """
-    def __init__(self, barDict):
+
+    # Optimization to reduce memory footprint.
+    __slots__ = ('__barDict', '__dateTime')
+
+    def __init__(self, barDict, validate=True):
         if len(barDict) == 0:
             raise Exception("No bars supplied")
 
-        # Check that bar datetimes are in sync
-        firstDateTime = None
-        firstInstrument = None
-        for instrument, currentBar in barDict.iteritems():
-            if firstDateTime is None:
-                firstDateTime = currentBar.getDateTime()
-                firstInstrument = instrument
-            elif currentBar.getDateTime() != firstDateTime:
-                raise Exception("Bar data times are not in sync. %s %s != %s %s" % (instrument, currentBar.getDateTime(), firstInstrument, firstDateTime))
+        if validate:
+            # Check that bar datetimes are in sync
+            firstDateTime = None
+            firstInstrument = None
+            for instrument, currentBar in barDict.iteritems():
+                if firstDateTime is None:
+                    firstDateTime = currentBar.getDateTime()
+                    firstInstrument = instrument
+                elif currentBar.getDateTime() != firstDateTime:
+                    raise Exception("Bar data times are not in sync. %s %s != %s %s" % (instrument, currentBar.getDateTime(), firstInstrument, firstDateTime))
+        else:
+            firstDateTime = barDict.itervalues().next().getDateTime()
 
         self.__barDict = barDict
         self.__dateTime = firstDateTime
 
+    def __setstate__(self, state):
+        # Bars pickled before __slots__ were declared have their __dict__ as the state.
+        if isinstance(state, dict):
+            state = (state["_Bars__barDict"], state["_Bars__dateTime"])
+        (self.__barDict, self.__dateTime) = state
+
+    def __getstate__(self):
+        return (self.__barDict, self.__dateTime)
+
     def __getitem__(self, instrument):
         """Returns the :class:`pyalgotrade.bar.Bar` for the given instrument. If the instrument is not found an exception is raised."""
         return self.__barDict[instrument]
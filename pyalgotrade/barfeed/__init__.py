@@ -63,6 +63,7 @@ class BaseBarFeed(feed.BaseFeed):
         self.__lastBars = {}
         self.__frequency = frequency
         self.__prevDateTime = None
+        self.__trustedData = False
 
     # Return True if bars provided have adjusted close values.
     def barsHaveAdjClose(self):
@@ -78,7 +79,26 @@ class BaseBarFeed(feed.BaseFeed):
         raise NotImplementedError()
 
     def createDataSeries(self, key, maxLen):
-        return bards.BarDataSeries(maxLen)
+        ret = bards.BarDataSeries(maxLen)
+        ret.setDateTimeValidation(not self.__trustedData)
+        return ret
+
+    def setTrustedData(self, trusted):
+        """Sets whether bars are trusted to be valid and in order, so that the checks done for every bar can be skipped.
+
+        :param trusted: True if bars are trusted. False by default.
+        :type trusted: boolean.
+
+        .. note::
+            Feeds that hold bars in memory validate all bars at once before they get dispatched.
+        """
+        self.__trustedData = trusted
+        for key in self.getKeys():
+            self[key].setDateTimeValidation(not trusted)
+
+    def getTrustedData(self):
+        """Returns True if bars are trusted to be valid and in order."""
+        return self.__trustedData
 
     def getNextValues(self):
         dateTime = None
@@ -87,7 +107,7 @@ class BaseBarFeed(feed.BaseFeed):
             dateTime = bars.getDateTime()
 
             # Check that current bar datetimes are greater than the previous one.
-            if self.__prevDateTime is not None and self.__prevDateTime >= dateTime:
+            if not self.__trustedData and self.__prevDateTime is not None and self.__prevDateTime >= dateTime:
                 raise Exception("Bar date times are not in order. Previous datetime was %s and current datetime is %s" % (self.__prevDateTime, dateTime))
             self.__prevDateTime = dateTime
 
@@ -122,9 +122,11 @@ class BarFeed(membf.BarFeed):
 
 
 class GenericRowParser(RowParser):
-    def __init__(self, frequency, timezone):
+    # Set validate to False to skip bar price checks when bars get validated by the feed.
+    def __init__(self, frequency, timezone, validate=True):
         self.__frequency = frequency
         self.__timezone = timezone
+        self.__validate = validate
         self.__haveAdjClose = False
 
     def barsHaveAdjClose(self):
@@ -160,7 +162,7 @@ class GenericRowParser(RowParser):
         else:
             adjClose = None
 
-        return bar.BasicBar(dateTime, open_, high, low, close, volume, adjClose, self.__frequency)
+        return bar.BasicBar(dateTime, open_, high, low, close, volume, adjClose, self.__frequency, self.__validate)
 
 
 class GenericBarFeed(BarFeed):
@@ -203,7 +205,8 @@ class GenericBarFeed(BarFeed):
 
         if timezone is None:
             timezone = self.__timezone
-        rowParser = GenericRowParser(self.getFrequency(), timezone)
+        # Trusted bars are validated all at once before they get dispatched.
+        rowParser = GenericRowParser(self.getFrequency(), timezone, not self.getTrustedData())
         BarFeed.addBarsFromCSV(self, instrument, path, rowParser)
 
         if rowParser.barsHaveAdjClose():
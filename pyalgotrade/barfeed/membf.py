@@ -18,12 +18,41 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import barfeed
 from pyalgotrade import dataseries
 from pyalgotrade import bar
 from pyalgotrade import utils
 
 
+def _is_sorted_after(bars, prevDateTime):
+    # Returns True if bars are in datetime order and none of them is older than prevDateTime.
+    for currentBar in bars:
+        dateTime = currentBar.getDateTime()
+        if prevDateTime is not None and dateTime < prevDateTime:
+            return False
+        prevDateTime = dateTime
+    return True
+
+
+# Validates sorted bars all at once, so that they can be dispatched without any further checks.
+def _validate_bars(instrument, bars):
+    if len(bars) == 0:
+        return
+
+    dateTimes = np.array([currentBar.getDateTime() for currentBar in bars], dtype=object)
+    if not np.all(dateTimes[1:] > dateTimes[:-1]):
+        raise Exception("Duplicate bars found for %s" % (instrument))
+
+    prices = np.array([(currentBar.getOpen(), currentBar.getHigh(), currentBar.getLow(), currentBar.getClose()) for currentBar in bars], dtype=float)
+    open_, high, low, close = prices.T
+    if np.any(high < np.maximum(np.maximum(open_, low), close)):
+        raise Exception("Invalid high prices found for %s" % (instrument))
+    if np.any(low > np.minimum(open_, close)):
+        raise Exception("Invalid low prices found for %s" % (instrument))
+
+
 # A non real-time BarFeed responsible for:
 # - Holding bars in memory.
 # - Aligning them with respect to time.
@@ -35,6 +64,11 @@ class BarFeed(barfeed.BaseBarFeed):
     def __init__(self, frequency, maxLen=dataseries.DEFAULT_MAX_LEN):
         barfeed.BaseBarFeed.__init__(self, frequency, maxLen)
         self.__bars = {}
+        # Instruments with bars added since they were last prepared for consumption.
+        self.__pending = set()
+        self.__unsorted = set()
+        # Instruments with bars added while data was trusted. These may have been built without validation.
+        self.__unvalidated = set()
         self.__nextBarIdx = {}
         self.__started = False
         self.__barsLeft = 0
@@ -43,8 +77,26 @@ class BarFeed(barfeed.BaseBarFeed):
     def isRealTime(self):
         return False
 
+    def __prepareBars(self):
+        # Bars that were not added in order get sorted only once, before they are consumed.
+        # Trusted bars are also validated here, all at once.
+        for instrument in self.__pending:
+            bars = self.__bars[instrument]
+            if instrument in self.__unsorted:
+                bars.sort(key=lambda x: x.getDateTime())
+            if self.getTrustedData() or instrument in self.__unvalidated:
+                _validate_bars(instrument, bars)
+        self.__pending.clear()
+        self.__unsorted.clear()
+        self.__unvalidated.clear()
+
+    def setTrustedData(self, trusted):
+        barfeed.BaseBarFeed.setTrustedData(self, trusted)
+        self.__pending.update(self.__bars.keys())
+
     def start(self):
         self.__started = True
+        self.__prepareBars()
         for instrument, bars in self.__bars.iteritems():
             self.__barsLeft = max(self.__barsLeft, len(bars))
 
@@ -58,17 +110,26 @@ class BarFeed(barfeed.BaseBarFeed):
         if self.__started:
             raise Exception("Can't add more bars once you started consuming bars")
 
-        self.__bars.setdefault(instrument, [])
+        instrumentBars = self.__bars.setdefault(instrument, [])
         self.__nextBarIdx.setdefault(instrument, 0)
 
-        # Add and sort the bars
-        self.__bars[instrument].extend(bars)
-        barCmp = lambda x, y: cmp(x.getDateTime(), y.getDateTime())
-        self.__bars[instrument].sort(barCmp)
+        # Add the bars. Sorting is deferred until bars get consumed and skipped if they are already in order.
+        if instrument not in self.__unsorted:
+            prevDateTime = None
+            if len(instrumentBars):
+                prevDateTime = instrumentBars[-1].getDateTime()
+            if not _is_sorted_after(bars, prevDateTime):
+                self.__unsorted.add(instrument)
+        instrumentBars.extend(bars)
+        self.__pending.add(instrument)
+        if self.getTrustedData():
+            self.__unvalidated.add(instrument)
 
         self.registerInstrument(instrument)
 
     def eof(self):
+        if len(self.__pending):
+            self.__prepareBars()
         ret = True
         # Check if there is at least one more bar to return.
         for instrument, bars in self.__bars.iteritems():
@@ -79,6 +140,8 @@ class BarFeed(barfeed.BaseBarFeed):
         return ret
 
     def peekDateTime(self):
+        if len(self.__pending):
+            self.__prepareBars()
         ret = None
 
         for instrument, bars in self.__bars.iteritems():
@@ -105,11 +168,24 @@ class BarFeed(barfeed.BaseBarFeed):
 
         self.__barsLeft -= 1
 
-        if self.__prevDateTime == smallestDateTime:
+        # Trusted bars were already checked for duplicates.
+        if not self.getTrustedData() and self.__prevDateTime == smallestDateTime:
             raise Exception("Duplicate bars found for %s on %s" % (ret.keys(), smallestDateTime))
 
         self.__prevDateTime = smallestDateTime
-        return bar.Bars(ret)
+        # No need to validate that datetimes are in sync since they were all picked using smallestDateTime.
+        return bar.Bars(ret, False)
+
+    def getAllBars(self, instrument):
+        """Returns a list with all the bars loaded for the instrument, sorted by datetime.
+
+        .. note::
+            This is meant for calculations done over the whole history before consuming bars, like
+            :class:`pyalgotrade.talibext.indicator.TALibPrecomputed`. Using these bars in a strategy introduces look-ahead bias.
+        """
+        if len(self.__pending):
+            self.__prepareBars()
+        return list(self.__bars.get(instrument, []))
 
     def getBarsLeft(self):
         return self.__barsLeft
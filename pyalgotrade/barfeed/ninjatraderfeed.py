@@ -60,10 +60,12 @@ class Frequency(object):
 
 
 class RowParser(csvfeed.RowParser):
-    def __init__(self, frequency, dailyBarTime, timezone=None):
+    # Set validate to False to skip bar price checks when bars get validated by the feed.
+    def __init__(self, frequency, dailyBarTime, timezone=None, validate=True):
         self.__frequency = frequency
         self.__dailyBarTime = dailyBarTime
         self.__timezone = timezone
+        self.__validate = validate
 
     def __parseDateTime(self, dateTime):
         ret = None
@@ -98,7 +100,7 @@ class RowParser(csvfeed.RowParser):
         high = float(csvRowDict["High"])
         low = float(csvRowDict["Low"])
         volume = float(csvRowDict["Volume"])
-        return bar.BasicBar(dateTime, open_, high, low, close, volume, None, self.__frequency)
+        return bar.BasicBar(dateTime, open_, high, low, close, volume, None, self.__frequency, self.__validate)
 
 
 class Feed(csvfeed.BarFeed):
@@ -144,5 +146,6 @@ class Feed(csvfeed.BarFeed):
         if timezone is None:
             timezone = self.__timezone
 
-        rowParser = RowParser(self.getFrequency(), self.getDailyBarTime(), timezone)
+        # Trusted bars are validated all at once before they get dispatched.
+        rowParser = RowParser(self.getFrequency(), self.getDailyBarTime(), timezone, not self.getTrustedData())
         csvfeed.BarFeed.addBarsFromCSV(self, instrument, path, rowParser)
@@ -0,0 +1,143 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+from pyalgotrade import barfeed
+from pyalgotrade import bar
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import resampled
+from pyalgotrade.utils import dt
+
+
+class ResampledBarFeed(barfeed.BaseBarFeed):
+    """A real-time BarFeed that groups bars from another real-time BarFeed, for example trades, into bars of a given frequency.
+    Only completed bars are dispatched, and bars are completed as soon as their time is over, even if no new bars are received.
+
+    :param barFeed: The real-time bar feed that will provide the bars to resample. It gets started, stopped and dispatched
+        by this bar feed, so it should not be dispatched by anything else.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param frequency: The grouping frequency in seconds. Must be > 0.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
+    :type maxLen: int.
+
+    .. note::
+        * Bars that are received after the bar they belong to was completed are discarded.
+        * Check :class:`pyalgotrade.dataseries.resampled.SlotCalendar` for details on how bars are grouped.
+    """
+
+    def __init__(self, barFeed, frequency, maxLen=dataseries.DEFAULT_MAX_LEN):
+        if not barFeed.isRealTime():
+            raise Exception("Only real-time bar feeds can be resampled")
+        if not frequency > 0:
+            raise Exception("Invalid frequency")
+
+        barfeed.BaseBarFeed.__init__(self, frequency, maxLen)
+        for instrument in barFeed.getRegisteredInstruments():
+            self.registerInstrument(instrument)
+
+        self.__barFeed = barFeed
+        self.__calendar = resampled.SlotCalendar(frequency)
+        # instrument -> Slot for the current slot.
+        self.__slots = {}
+        self.__slotClosed = False
+        # Completed bar dicts waiting to be dispatched.
+        self.__barDicts = []
+        barFeed.getNewBarsEvent().subscribe(self.__onBars)
+
+    def __closeSlot(self):
+        if len(self.__slots):
+            barDict = {}
+            for instrument, slot in self.__slots.iteritems():
+                barDict[instrument] = slot.buildBasicBar()
+            self.__barDicts.append(barDict)
+            self.__slots = {}
+
+    def __onBars(self, dateTime, bars):
+        if self.__calendar.update(dateTime):
+            self.__closeSlot()
+            self.__slotClosed = False
+        elif self.__slotClosed:
+            return
+
+        slotDateTime = self.__calendar.getSlotDateTime()
+        frequency = self.getFrequency()
+        for instrument in bars.getInstruments():
+            bar_ = bars[instrument]
+            slot = self.__slots.get(instrument)
+            if slot is None:
+                self.__slots[instrument] = resampled.Slot(slotDateTime, bar_, frequency)
+            else:
+                slot.addBar(bar_)
+
+    # Nothing else dispatches the bar feed being resampled, so its bars are pulled from here.
+    def __dispatchBarFeed(self):
+        while not self.__barFeed.eof():
+            if not self.__barFeed.dispatch():
+                break
+
+    def __checkSlotEnded(self):
+        # Complete the current slot once its time is over, even if no new bars were received.
+        if len(self.__slots) and self.__calendar.slotEnded(self.getCurrentDateTime()):
+            self.__closeSlot()
+            self.__slotClosed = True
+
+    def getCurrentDateTime(self):
+        """Returns the current :class:`datetime.datetime` used to complete bars once their time is over.
+        It will be naive, in local time, or in UTC, depending on the datetimes of the resampled bars.
+        """
+        slotDateTime = self.__calendar.getSlotDateTime()
+        if slotDateTime is None or dt.datetime_is_naive(slotDateTime):
+            return datetime.datetime.now()
+        else:
+            return dt.as_utc(datetime.datetime.utcnow())
+
+    def barsHaveAdjClose(self):
+        return self.__barFeed.barsHaveAdjClose()
+
+    def isRealTime(self):
+        return True
+
+    def getNextBars(self):
+        self.__dispatchBarFeed()
+        self.__checkSlotEnded()
+        ret = None
+        if len(self.__barDicts):
+            ret = bar.Bars(self.__barDicts.pop(0))
+        return ret
+
+    def peekDateTime(self):
+        # Return None since this is a realtime subject.
+        return None
+
+    def eof(self):
+        self.__dispatchBarFeed()
+        self.__checkSlotEnded()
+        return len(self.__barDicts) == 0
+
+    def start(self):
+        self.__barFeed.start()
+
+    def stop(self):
+        self.__barFeed.stop()
+
+    def join(self):
+        self.__barFeed.join()
@@ -109,7 +109,8 @@ class Database(dbfeed.Database):
             params = [bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose(), instrumentId, frequency, timeStamp]
             self.__connection.execute(sql, params)
 
-    def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+    # Set validate to False to skip bar price checks when bars get validated by the feed.
+    def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None, validate=True):
         instrument = normalize_instrument(instrument)
         sql = "select bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.adj_close, bar.frequency" \
             " from bar join instrument on (bar.instrument_id = instrument.instrument_id)" \
@@ -131,7 +132,7 @@ class Database(dbfeed.Database):
             dateTime = dt.timestamp_to_datetime(row[0])
             if timezone:
                 dateTime = dt.localize(dateTime, timezone)
-            ret.append(bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7]))
+            ret.append(bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7], validate))
         cursor.close()
         return ret
 
@@ -152,5 +153,6 @@ class Feed(membf.BarFeed):
         return self.__db
 
     def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
-        bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
+        # Trusted bars are validated all at once before they get dispatched.
+        bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime, not self.getTrustedData())
         self.addBarsFromSequence(instrument, bars)
@@ -47,11 +47,13 @@ def parse_date(date):
 
 
 class RowParser(csvfeed.RowParser):
-    def __init__(self, dailyBarTime, frequency, timezone=None, sanitize=False):
+    # Set validate to False to skip bar price checks when bars get validated by the feed.
+    def __init__(self, dailyBarTime, frequency, timezone=None, sanitize=False, validate=True):
         self.__dailyBarTime = dailyBarTime
         self.__frequency = frequency
         self.__timezone = timezone
         self.__sanitize = sanitize
+        self.__validate = validate
 
     def __parseDate(self, dateString):
         ret = parse_date(dateString)
@@ -89,7 +91,7 @@ class RowParser(csvfeed.RowParser):
             if high < close:
                 high = close
 
-        return bar.BasicBar(dateTime, open_, high, low, close, volume, adjClose, self.__frequency)
+        return bar.BasicBar(dateTime, open_, high, low, close, volume, adjClose, self.__frequency, self.__validate)
 
 
 class Feed(csvfeed.BarFeed):
@@ -145,5 +147,6 @@ class Feed(csvfeed.BarFeed):
 
         if timezone is None:
             timezone = self.__timezone
-        rowParser = RowParser(self.getDailyBarTime(), self.getFrequency(), timezone, self.__sanitizeBars)
+        # Trusted bars are validated all at once before they get dispatched.
+        rowParser = RowParser(self.getDailyBarTime(), self.getFrequency(), timezone, self.__sanitizeBars, not self.getTrustedData())
         csvfeed.BarFeed.addBarsFromCSV(self, instrument, path, rowParser)
@@ -38,6 +38,13 @@ from pyalgotrade import observer
 # PARTIALLY_FILLED  -> FILLED
 # PARTIALLY_FILLED  -> CANCELED
 
+# Returns the attribute name for a slot declared in cls, applying name mangling to private names.
+def _get_slot_attr_name(cls, slot):
+    if slot.startswith("__") and not slot.endswith("__"):
+        return "_%s%s" % (cls.__name__.lstrip("_"), slot)
+    return slot
+
+
 class Order(object):
     """Base class for orders.
 
@@ -107,6 +114,9 @@ class Order(object):
         STOP = 3
         STOP_LIMIT = 4
 
+    # Optimization to reduce memory footprint.
+    __slots__ = ('__id', '__type', '__action', '__instrument', '__quantity', '__filled', '__avgFillPrice', '__executionInfo', '__goodTillCanceled', '__commissions', '__allOrNone', '__state')
+
     # Valid state transitions.
     VALID_TRANSITIONS = {
         State.INITIAL : [State.SUBMITTED, State.CANCELED],
@@ -131,6 +141,21 @@ class Order(object):
         self.__allOrNone = False
         self.__state = Order.State.INITIAL
 
+    # Subclasses declare their own slots, so the state is built from the slots declared along the class hierarchy.
+    def __getstate__(self):
+        ret = {}
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                name = _get_slot_attr_name(cls, slot)
+                if hasattr(self, name):
+                    ret[name] = getattr(self, name)
+        ret.update(getattr(self, "__dict__", {}))
+        return ret
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
+
     # This is to check that orders are not compared directly. order ids should be compared.
     #def __eq__(self, other):
     #    if other is None:
@@ -318,6 +343,8 @@ class MarketOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ('__onClose',)
+
     def __init__(self, orderId, action, instrument, quantity, onClose):
         Order.__init__(self, orderId, Order.Type.MARKET, action, instrument, quantity)
         self.__onClose = onClose
@@ -335,6 +362,8 @@ class LimitOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ('__limitPrice',)
+
     def __init__(self, orderId, action, instrument, limitPrice, quantity):
         Order.__init__(self, orderId, Order.Type.LIMIT, action, instrument, quantity)
         self.__limitPrice = limitPrice
@@ -352,6 +381,8 @@ class StopOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ('__stopPrice',)
+
     def __init__(self, orderId, action, instrument, stopPrice, quantity):
         Order.__init__(self, orderId, Order.Type.STOP, action, instrument, quantity)
         self.__stopPrice = stopPrice
@@ -369,6 +400,8 @@ class StopLimitOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ('__limitPrice', '__stopPrice')
+
     def __init__(self, orderId, action, instrument, limitPrice, stopPrice, quantity):
         Order.__init__(self, orderId, Order.Type.STOP_LIMIT, action, instrument, quantity)
         self.__limitPrice = limitPrice
@@ -385,12 +418,22 @@ class StopLimitOrder(Order):
 
 class OrderExecutionInfo(object):
     """Execution information for an order."""
+
+    # Optimization to reduce memory footprint.
+    __slots__ = ('__price', '__quantity', '__commission', '__dateTime')
+
     def __init__(self, price, quantity, commission, dateTime):
         self.__price = price
         self.__quantity = quantity
         self.__commission = commission
         self.__dateTime = dateTime
 
+    def __setstate__(self, state):
+        (self.__price, self.__quantity, self.__commission, self.__dateTime) = state
+
+    def __getstate__(self):
+        return (self.__price, self.__quantity, self.__commission, self.__dateTime)
+
     def getPrice(self):
         """Returns the fill price."""
         return self.__price
@@ -445,6 +488,7 @@ class Broker(observer.Subject):
 
     def __init__(self):
         self.__orderEvent = observer.Event()
+        self.__ordersPlacedEvent = observer.Event()
 
     def notifyOrderEvent(self, orderEvent):
         self.__orderEvent.emit(self, orderEvent)
@@ -455,6 +499,12 @@ class Broker(observer.Subject):
     def getOrderUpdatedEvent(self):
         return self.__orderEvent
 
+    # Handlers should expect 2 parameters:
+    # 1: broker instance
+    # 2: A list with the orders placed using placeOrders.
+    def getOrdersPlacedEvent(self):
+        return self.__ordersPlacedEvent
+
     def getShares(self, instrument):
         """Returns the number of shares for an instrument."""
         raise NotImplementedError()
@@ -463,6 +513,10 @@ class Broker(observer.Subject):
         """Returns a dictionary that maps instruments to shares."""
         raise NotImplementedError()
 
+    def getAllowFractions(self):
+        """Returns True if orders can be placed for fractions of a share. Brokers that support it should override this."""
+        return False
+
     def getActiveOrders(self):
         """Returns a sequence with the orders that are still active."""
         raise NotImplementedError()
@@ -479,6 +533,31 @@ class Broker(observer.Subject):
         """
         raise NotImplementedError()
 
+    def placeOrders(self, orders):
+        """Submits a basket of orders.
+
+        :param orders: The orders to submit.
+        :type orders: A list of :class:`Order`.
+
+        .. note::
+            * All the orders are checked before submitting any of them, so if an exception is raised none is submitted.
+            * After this call the orders are in SUBMITTED state and a single event is emitted for the whole basket
+              through the event returned by getOrdersPlacedEvent.
+            * Only the submission is batched. Each order is still placed using :meth:`placeOrder`, and gets accepted and
+              filled on its own, emitting the usual events through the event returned by getOrderUpdatedEvent.
+        """
+        orderIds = set()
+        for order in orders:
+            if not order.isInitial():
+                raise Exception("The order was already processed")
+            if order.getId() in orderIds:
+                raise Exception("The order was included more than once")
+            orderIds.add(order.getId())
+
+        for order in orders:
+            self.placeOrder(order)
+        self.__ordersPlacedEvent.emit(self, orders)
+
     def createMarketOrder(self, action, instrument, quantity, onClose=False):
         """Creates a Market order.
         A market order is an order to buy or sell a stock at the best available price.
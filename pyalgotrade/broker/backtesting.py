@@ -18,7 +18,12 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import bisect
+import math
+import sys
+
 from pyalgotrade import broker
+from pyalgotrade import observer
 from pyalgotrade import warninghelpers
 import pyalgotrade.logger
 import pyalgotrade.bar
@@ -88,6 +93,159 @@ class TradePercentage(Commission):
         return price * quantity * self.__percentage
 
 
+######################################################################
+## Slippage models
+
+class Slippage(object):
+    """Base class for implementing different slippage and market impact models.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def calculatePrice(self, order, price, quantity, bar):
+        """Returns the price at which the order gets filled once slippage is taken into account.
+
+        :param order: The order being executed.
+        :type order: :class:`pyalgotrade.broker.Order`.
+        :param price: The price for each share, without slippage.
+        :type price: float.
+        :param quantity: The number of shares that will get filled.
+        :type quantity: float.
+        :param bar: The current bar.
+        :type bar: :class:`pyalgotrade.bar.Bar`.
+        :rtype: float.
+        """
+        raise NotImplementedError()
+
+
+class NoSlippage(Slippage):
+    """A :class:`Slippage` class that always returns the price unchanged."""
+
+    def calculatePrice(self, order, price, quantity, bar):
+        return price
+
+
+class FixedSpread(Slippage):
+    """A :class:`Slippage` class that pays half of a fixed spread on every fill.
+
+    :param basisPoints: The spread in basis points. 10 means that buys are filled 0.05% above the price and sells 0.05%
+        below the price.
+    :type basisPoints: float.
+    """
+
+    def __init__(self, basisPoints):
+        assert(basisPoints >= 0)
+        self.__halfSpread = basisPoints / 20000.0
+
+    def calculatePrice(self, order, price, quantity, bar):
+        if order.isBuy():
+            ret = price * (1 + self.__halfSpread)
+        else:
+            ret = price * (1 - self.__halfSpread)
+        return ret
+
+
+class SquareRootImpact(Slippage):
+    """A :class:`Slippage` class where the price moves against the order proportionally to the square root of the
+    share of the bar's volume that the fill takes up.
+
+    :param coefficient: The price impact when the fill takes up the whole bar's volume. 0.1 means that taking up the
+        whole volume moves the price 10%, taking up 25% of the volume moves the price 5%, and so on.
+    :type coefficient: float.
+
+    .. note::
+        If the bar has no volume, the price is left unchanged.
+    """
+
+    def __init__(self, coefficient):
+        assert(coefficient >= 0)
+        self.__coefficient = coefficient
+
+    def calculatePrice(self, order, price, quantity, bar):
+        volume = bar.getVolume()
+        if not volume:
+            return price
+
+        impact = self.__coefficient * math.sqrt(quantity / float(volume))
+        if order.isBuy():
+            ret = price * (1 + impact)
+        else:
+            ret = price * (1 - impact)
+        return ret
+
+
+######################################################################
+## Margin accounting
+
+class Margin(object):
+    """Margin requirements and financing charges for the backtesting broker.
+
+    :param initialMargin: The proportion of the gross position value that the equity must cover after a fill that
+        increases the gross position value. 0.5 means that positions can be leveraged up to 2 times.
+    :type initialMargin: float.
+    :param maintenanceMargin: The proportion of the gross position value that the equity must cover after each bar.
+        If it doesn't, a margin call event is emitted.
+    :type maintenanceMargin: float.
+    :param borrowRate: The annual fee charged on the value of short positions. 0.01 means 1%.
+    :type borrowRate: float.
+    :param creditRate: The annual interest earned on free cash, that is, cash not including short sale proceeds.
+    :type creditRate: float.
+    :param debitRate: The annual interest charged on borrowed cash.
+    :type debitRate: float.
+
+    .. note::
+        * Fees and interest are accrued at the beginning of each bar for the time elapsed since the previous bar,
+          using the previous bar's prices, and are taken from cash.
+        * Fills that reduce the gross position value are always allowed.
+        * Margin only holds the settings, so it can be shared between brokers. The fees and interest charged are kept by
+          the broker. Check :meth:`Broker.getBorrowFees` and :meth:`Broker.getInterest`.
+    """
+
+    def __init__(self, initialMargin=0.5, maintenanceMargin=0.25, borrowRate=0, creditRate=0, debitRate=0):
+        assert(initialMargin > 0 and initialMargin <= 1)
+        assert(maintenanceMargin > 0 and maintenanceMargin <= initialMargin)
+        self.__initialMargin = initialMargin
+        self.__maintenanceMargin = maintenanceMargin
+        self.__borrowRate = borrowRate
+        self.__creditRate = creditRate
+        self.__debitRate = debitRate
+
+    def getInitialMargin(self):
+        return self.__initialMargin
+
+    def getMaintenanceMargin(self):
+        return self.__maintenanceMargin
+
+    def canFill(self, equity, grossValue, prevGrossValue):
+        """Returns True if a fill that leaves the account with the given equity and gross position value is allowed."""
+        return grossValue <= prevGrossValue or equity >= grossValue * self.__initialMargin
+
+    def isMarginCall(self, equity, grossValue):
+        """Returns True if the equity doesn't cover the maintenance margin."""
+        return equity < grossValue * self.__maintenanceMargin
+
+    def accrue(self, freeCash, shortValue, elapsed):
+        """Returns a (borrow fee, interest) tuple with the charges for the time elapsed. The borrow fee is to be taken
+        from cash and the interest is to be added to cash.
+
+        :param freeCash: The cash, not including short sale proceeds.
+        :type freeCash: float.
+        :param shortValue: The value of the short positions. This is a negative number.
+        :type shortValue: float.
+        :param elapsed: The time elapsed.
+        :type elapsed: datetime.timedelta.
+        :rtype: tuple.
+        """
+        years = elapsed.total_seconds() / (365 * 24 * 60 * 60.0)
+        borrowFee = -shortValue * self.__borrowRate * years
+        if freeCash >= 0:
+            interest = freeCash * self.__creditRate * years
+        else:
+            interest = freeCash * self.__debitRate * years
+        return (borrowFee, interest)
+
+
 ######################################################################
 ## Order filling strategies
 
@@ -179,6 +337,13 @@ class FillStrategy(object):
         """Override (optional) to get notified when an order was filled, or partially filled."""
         pass
 
+    def isPriceTriggered(self):
+        """Override (optional) to return True if limit and stop orders can only get filled on bars that reach their
+        trigger price, as described in :class:`DefaultStrategy`. This allows the broker to skip resting orders
+        whose prices are out of the bar's range. The default implementation returns False.
+        """
+        return False
+
     def fillMarketOrder(self, order, broker_, bar):
         """Override to return the fill price and quantity for a market order or None if the order can't be filled at the given time.
 
@@ -258,38 +423,86 @@ class DefaultStrategy(FillStrategy):
             * If the limit order was activated in this same bar and the limit price is penetrated as well, then the best between
               the stop price and the limit fill price (as described earlier) is used.
             * If the limit order was activated at a previous bar then the limit fill price (as described earlier) is used.
+    * The price is then adjusted using the :class:`Slippage` model. Limit and stop limit orders don't get filled if the
+      resulting price is worse than the limit price.
 
     .. note::
         * This is the default strategy used by the Broker.
         * If volumeLimit is 0.25, and a certain bar's volume is 100, then no more than 25 shares can be used by all
           orders that get processed at that bar.
         * If using trade bars, then all the volume from that bar can be used.
+        * The default slippage model is :class:`NoSlippage`.
     """
 
     def __init__(self, volumeLimit=0.25):
         assert(volumeLimit > 0 and volumeLimit <= 1)
         self.__volumeLimit = volumeLimit
         self.__volumeLeft = {}
+        self.__slippageModel = NoSlippage()
+
+    def isPriceTriggered(self):
+        """Returns True unless a subclass overrides how limit, stop or stop limit orders get filled, since those
+        may get filled on bars that don't reach the order's price. Subclasses that still fill these orders
+        only on bars that reach their prices can override this method to return True.
+        """
+        cls = type(self)
+        for methodName in ("fillLimitOrder", "fillStopOrder", "fillStopLimitOrder"):
+            if getattr(cls, methodName).im_func is not getattr(DefaultStrategy, methodName).im_func:
+                return False
+        return True
 
     def onBars(self, dateTime, bars):
-        # Update the volume available for each instrument.
-        volumeLeft = {}
-        for instrument in bars.getInstruments():
-            bar = bars[instrument]
-            if bar.getFrequency() == pyalgotrade.bar.Frequency.TRADE:
-                volumeLeft[instrument] = bar.getVolume()
-            elif self.__volumeLimit is not None:
-                volumeLeft[instrument] = bar.getVolume() * self.__volumeLimit
-        self.__volumeLeft = volumeLeft
+        # Update the volume available for each instrument, in a single pass over the bars.
+        # If there is no volume limit, the volume left is not used.
+        volumeLimit = self.__volumeLimit
+        if volumeLimit is None:
+            self.__volumeLeft = {}
+        else:
+            tradeFrequency = pyalgotrade.bar.Frequency.TRADE
+            self.__volumeLeft = dict(
+                (instrument, bar.getVolume() if bar.getFrequency() == tradeFrequency else bar.getVolume() * volumeLimit)
+                for instrument, bar in bars.items()
+            )
 
     def onOrderFilled(self, order):
         # Update the volume left.
+        # Other fill strategies, like tickreplay.TickReplayStrategy, may fill more than the volume left.
         if self.__volumeLimit is not None:
-            self.__volumeLeft[order.getInstrument()] -= order.getExecutionInfo().getQuantity()
+            volumeLeft = self.__volumeLeft[order.getInstrument()] - order.getExecutionInfo().getQuantity()
+            self.__volumeLeft[order.getInstrument()] = max(volumeLeft, 0)
      
     def setVolumeLimit(self, volumeLimit):
         self.__volumeLimit = volumeLimit
 
+    def setSlippageModel(self, slippageModel):
+        """Sets the slippage model to use.
+
+        :param slippageModel: An object responsible for adjusting fill prices.
+        :type slippageModel: :class:`Slippage`.
+        """
+        self.__slippageModel = slippageModel
+
+    def getSlippageModel(self):
+        """Returns the :class:`Slippage` model currently set."""
+        return self.__slippageModel
+
+    def getMarketOrderPrice(self, order, broker_, bar):
+        """Override (optional) to return the price, before slippage, for a market order that is able to get filled.
+        The default implementation returns the open price, or the close price if the order was set to fill on close."""
+        if order.getFillOnClose():
+            ret = pyalgotrade.bar.get_close(bar, broker_.getUseAdjustedValues())
+        else:
+            ret = pyalgotrade.bar.get_open(bar, broker_.getUseAdjustedValues())
+        return ret
+
+    def __buildFillInfo(self, order, price, fillSize, bar):
+        price = self.__slippageModel.calculatePrice(order, price, fillSize, bar)
+        # Slippage can't take limit orders beyond their limit price.
+        if order.getType() in [broker.Order.Type.LIMIT, broker.Order.Type.STOP_LIMIT]:
+            if (order.isBuy() and price > order.getLimitPrice()) or (order.isSell() and price < order.getLimitPrice()):
+                return None
+        return FillInfo(price, fillSize)
+
     def __calculateFillSize(self, order, broker_, bar):
         ret = 0
 
@@ -315,12 +528,9 @@ class DefaultStrategy(FillStrategy):
             return None
 
         ret = None
-        if order.getFillOnClose():
-            price = pyalgotrade.bar.get_close(bar, broker_.getUseAdjustedValues())
-        else:
-            price = pyalgotrade.bar.get_open(bar, broker_.getUseAdjustedValues())
+        price = self.getMarketOrderPrice(order, broker_, bar)
         if price is not None:
-            ret = FillInfo(price, fillSize)
+            ret = self.__buildFillInfo(order, price, fillSize, bar)
         return ret
 
     def fillLimitOrder(self, order, broker_, bar):
@@ -331,7 +541,7 @@ class DefaultStrategy(FillStrategy):
         ret = None
         price = get_limit_price_trigger(order.getAction(), order.getLimitPrice(), broker_.getUseAdjustedValues(), bar)
         if price is not None:
-            ret = FillInfo(price, fillSize)
+            ret = self.__buildFillInfo(order, price, fillSize, bar)
         return ret
 
     def fillStopOrder(self, order, broker_, bar):
@@ -356,7 +566,7 @@ class DefaultStrategy(FillStrategy):
             else:
                 price = pyalgotrade.bar.get_open(bar, broker_.getUseAdjustedValues())
 
-            ret = FillInfo(price, fillSize)
+            ret = self.__buildFillInfo(order, price, fillSize, bar)
         return ret
 
     def fillStopLimitOrder(self, order, broker_, bar):
@@ -385,15 +595,55 @@ class DefaultStrategy(FillStrategy):
                         # If the stop price triggered is greater than the limit price, then use that one. Else use the limit price.
                         price = max(stopPriceTrigger, order.getLimitPrice())
 
-                ret = FillInfo(price, fillSize)
+                ret = self.__buildFillInfo(order, price, fillSize, bar)
+
+        return ret
+
+
+class VolumeParticipationStrategy(DefaultStrategy):
+    """
+    A :class:`DefaultStrategy` that works market orders through the bars, like an order scheduled to take up a
+    fixed share of the traded volume.
+
+    :param participation: The proportion of each bar's volume that orders can take up. Must be > 0 and <= 1.
+    :type participation: float.
+
+    Market orders that are not filled on close are filled using the bar's typical price, (high + low + close) / 3,
+    instead of the open price, since the fill is spread throughout the bar. Orders that are too large for a bar's
+    volume are partially filled, and the remainder is filled on the following bars while the order is still active.
+    Limit and stop orders are filled like in :class:`DefaultStrategy`.
+
+    .. note::
+        With daily (or greater) bars, orders that are not good till canceled are canceled after the first bar, so
+        only the first bar's share gets filled. Use good till canceled orders to work them through several bars.
+    """
+
+    def __init__(self, participation=0.1):
+        DefaultStrategy.__init__(self, participation)
 
+    def getMarketOrderPrice(self, order, broker_, bar):
+        if order.getFillOnClose():
+            ret = pyalgotrade.bar.get_close(bar, broker_.getUseAdjustedValues())
+        else:
+            useAdjustedValues = broker_.getUseAdjustedValues()
+            high = pyalgotrade.bar.get_high(bar, useAdjustedValues)
+            low = pyalgotrade.bar.get_low(bar, useAdjustedValues)
+            close = pyalgotrade.bar.get_close(bar, useAdjustedValues)
+            ret = (high + low + close) / 3.0
         return ret
 
 
 ######################################################################
 ## Orders
 
+# Only one base class can have a non empty instance layout, so the concrete backtesting orders declare the slots for
+# the attributes set by BacktestingOrder.
+_backtesting_order_slots = ('_BacktestingOrder__accepted',)
+
+
 class BacktestingOrder(object):
+    __slots__ = ()
+
     def __init__(self):
         self.__accepted = None
 
@@ -410,6 +660,8 @@ class BacktestingOrder(object):
 
 
 class MarketOrder(broker.MarketOrder, BacktestingOrder):
+    __slots__ = _backtesting_order_slots
+
     def __init__(self, orderId, action, instrument, quantity, onClose):
         broker.MarketOrder.__init__(self, orderId, action, instrument, quantity, onClose)
         BacktestingOrder.__init__(self)
@@ -419,6 +671,8 @@ class MarketOrder(broker.MarketOrder, BacktestingOrder):
 
 
 class LimitOrder(broker.LimitOrder, BacktestingOrder):
+    __slots__ = _backtesting_order_slots
+
     def __init__(self, orderId, action, instrument, limitPrice, quantity):
         broker.LimitOrder.__init__(self, orderId, action, instrument, limitPrice, quantity)
         BacktestingOrder.__init__(self)
@@ -428,6 +682,8 @@ class LimitOrder(broker.LimitOrder, BacktestingOrder):
 
 
 class StopOrder(broker.StopOrder, BacktestingOrder):
+    __slots__ = _backtesting_order_slots + ('__stopHit',)
+
     def __init__(self, orderId, action, instrument, stopPrice, quantity):
         broker.StopOrder.__init__(self, orderId, action, instrument, stopPrice, quantity)
         BacktestingOrder.__init__(self)
@@ -445,6 +701,8 @@ class StopOrder(broker.StopOrder, BacktestingOrder):
 # http://www.sec.gov/answers/stoplim.htm
 # http://www.interactivebrokers.com/en/trading/orders/stopLimit.php
 class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
+    __slots__ = _backtesting_order_slots + ('__stopHit',)
+
     def __init__(self, orderId, action, instrument, limitPrice, stopPrice, quantity):
         broker.StopLimitOrder.__init__(self, orderId, action, instrument, limitPrice, stopPrice, quantity)
         BacktestingOrder.__init__(self)
@@ -463,6 +721,155 @@ class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
     def process(self, broker_, bar_):
         return broker_.getFillStrategy().fillStopLimitOrder(self, broker_, bar_)
 
+######################################################################
+## Active order index
+
+# Books used to index resting orders by trigger price.
+# Orders in the LOW book get triggered by bars with low <= price (buy limit and sell stop orders).
+# Orders in the HIGH book get triggered by bars with high >= price (sell limit and buy stop orders).
+LOW_BOOK = 0
+HIGH_BOOK = 1
+
+
+# Returns a (book, price) tuple if the order can only get filled once its trigger price is reached, or None if the
+# order has to be processed on every bar.
+def get_order_trigger(order):
+    # Orders waiting to be accepted and orders that may expire need to be looked at every bar.
+    if order.isSubmitted() or not order.getGoodTillCanceled():
+        return None
+
+    orderType = order.getType()
+    if orderType == broker.Order.Type.LIMIT or (orderType == broker.Order.Type.STOP_LIMIT and order.getStopHit()):
+        if order.isBuy():
+            ret = (LOW_BOOK, order.getLimitPrice())
+        else:
+            ret = (HIGH_BOOK, order.getLimitPrice())
+    elif orderType in [broker.Order.Type.STOP, broker.Order.Type.STOP_LIMIT] and not order.getStopHit():
+        if order.isBuy():
+            ret = (HIGH_BOOK, order.getStopPrice())
+        else:
+            ret = (LOW_BOOK, order.getStopPrice())
+    else:
+        # Market orders and stop orders that were already hit.
+        ret = None
+    return ret
+
+
+class InstrumentOrders(object):
+    def __init__(self):
+        # Orders that need to be processed on every bar.
+        self.__unindexed = {}
+        # Sorted lists of (price, orderId) for each book.
+        self.__books = ([], [])
+
+    def isEmpty(self):
+        return len(self.__unindexed) == 0 and len(self.__books[LOW_BOOK]) == 0 and len(self.__books[HIGH_BOOK]) == 0
+
+    def add(self, order, trigger):
+        if trigger is None:
+            self.__unindexed[order.getId()] = order
+        else:
+            bisect.insort(self.__books[trigger[0]], (trigger[1], order.getId()))
+
+    def remove(self, order, trigger):
+        if trigger is None:
+            del self.__unindexed[order.getId()]
+        else:
+            book = self.__books[trigger[0]]
+            entry = (trigger[1], order.getId())
+            pos = bisect.bisect_left(book, entry)
+            assert(book[pos] == entry)
+            del book[pos]
+
+    # Returns the ids of the orders that need to be processed for a bar with the given range.
+    def getOrderIds(self, low, high):
+        ret = self.__unindexed.keys()
+        lowBook = self.__books[LOW_BOOK]
+        for i in xrange(bisect.bisect_left(lowBook, (low,)), len(lowBook)):
+            ret.append(lowBook[i][1])
+        highBook = self.__books[HIGH_BOOK]
+        for i in xrange(bisect.bisect_right(highBook, (high, sys.maxint))):
+            ret.append(highBook[i][1])
+        return ret
+
+    # Returns the ids of all the orders.
+    def getAllOrderIds(self):
+        ret = self.__unindexed.keys()
+        for book in self.__books:
+            ret.extend([orderId for price, orderId in book])
+        return ret
+
+
+# Keeps active orders indexed by instrument. Resting limit and stop orders are sorted by trigger price so bars only
+# have to look at the orders they can fill.
+class OrderIndex(object):
+    def __init__(self):
+        self.__orders = {}
+        self.__triggers = {}
+        self.__instrumentOrders = {}
+
+    def __getitem__(self, orderId):
+        return self.__orders[orderId]
+
+    def __contains__(self, orderId):
+        return orderId in self.__orders
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def get(self, orderId):
+        return self.__orders.get(orderId)
+
+    def getOrders(self):
+        return self.__orders.values()
+
+    def add(self, order):
+        assert(order.getId() not in self.__orders)
+        instrumentOrders = self.__instrumentOrders.get(order.getInstrument())
+        if instrumentOrders is None:
+            instrumentOrders = InstrumentOrders()
+            self.__instrumentOrders[order.getInstrument()] = instrumentOrders
+
+        trigger = get_order_trigger(order)
+        instrumentOrders.add(order, trigger)
+        self.__orders[order.getId()] = order
+        self.__triggers[order.getId()] = trigger
+
+    def remove(self, order):
+        instrumentOrders = self.__instrumentOrders[order.getInstrument()]
+        instrumentOrders.remove(order, self.__triggers[order.getId()])
+        if instrumentOrders.isEmpty():
+            del self.__instrumentOrders[order.getInstrument()]
+        del self.__orders[order.getId()]
+        del self.__triggers[order.getId()]
+
+    # Moves the order to the right place if its trigger changed.
+    def update(self, order):
+        trigger = get_order_trigger(order)
+        if trigger != self.__triggers[order.getId()]:
+            instrumentOrders = self.__instrumentOrders[order.getInstrument()]
+            instrumentOrders.remove(order, self.__triggers[order.getId()])
+            instrumentOrders.add(order, trigger)
+            self.__triggers[order.getId()] = trigger
+
+    # Returns the orders that need to be processed for the given bars, sorted by id.
+    # If priceTriggered is False, all the orders for the instruments in the bars are returned.
+    def getOrdersToProcess(self, bars, useAdjustedValues, priceTriggered):
+        orderIds = []
+        for instrument in bars.getInstruments():
+            instrumentOrders = self.__instrumentOrders.get(instrument)
+            if instrumentOrders is not None:
+                if priceTriggered:
+                    bar_ = bars[instrument]
+                    low = pyalgotrade.bar.get_low(bar_, useAdjustedValues)
+                    high = pyalgotrade.bar.get_high(bar_, useAdjustedValues)
+                    orderIds.extend(instrumentOrders.getOrderIds(low, high))
+                else:
+                    orderIds.extend(instrumentOrders.getAllOrderIds())
+        orderIds.sort()
+        return [self.__orders[orderId] for orderId in orderIds]
+
+
 ######################################################################
 ## Broker
 
@@ -487,7 +894,15 @@ class Broker(broker.Broker):
         else:
             self.__commission = commission
         self.__shares = {}
-        self.__activeOrders = {}
+        # To get equity in O(1) we keep the last close price for each instrument, the value of each open position and
+        # the totals, and update them incrementally as new bars arrive and orders get filled.
+        self.__lastPrices = {}
+        self.__positionValues = {}
+        self.__positionsValue = 0
+        self.__shortPositionsValue = 0
+        # The number of position value updates since the totals were recalculated.
+        self.__valueUpdates = 0
+        self.__activeOrders = OrderIndex()
         self.__useAdjustedValues = False
         self.__fillStrategy = DefaultStrategy()
         self.__allowFractions = False
@@ -497,17 +912,67 @@ class Broker(broker.Broker):
         self.__barFeed = barFeed
         self.__allowNegativeCash = False
         self.__nextOrderId = 1
+        self.__margin = None
+        self.__borrowFees = 0
+        self.__interest = 0
+        self.__marginCallEvent = observer.Event()
+        self.__lastDateTime = None
 
     def __getNextOrderId(self):
         ret = self.__nextOrderId
         self.__nextOrderId += 1
         return ret
 
-    def __getBar(self, bars, instrument):
-        ret = bars.getBar(instrument)
-        if ret is None:
-            ret = self.__barFeed.getLastBar(instrument)
-        return ret
+    def __setPositionValue(self, instrument, value):
+        prevValue = self.__positionValues.get(instrument, 0)
+        if value != 0:
+            self.__positionValues[instrument] = value
+        elif prevValue != 0:
+            del self.__positionValues[instrument]
+
+        if len(self.__positionValues):
+            self.__positionsValue += value - prevValue
+            if prevValue < 0:
+                self.__shortPositionsValue -= prevValue
+            if value < 0:
+                self.__shortPositionsValue += value
+
+            # Recalculate the totals once every as many updates as open positions to keep rounding errors from
+            # adding up. This is O(1) amortized.
+            self.__valueUpdates += 1
+            if self.__valueUpdates >= len(self.__positionValues):
+                self.__recalculateTotals()
+        else:
+            # Reset the totals once all positions are closed to avoid accumulating rounding errors.
+            self.__positionsValue = 0
+            self.__shortPositionsValue = 0
+            self.__valueUpdates = 0
+
+    # Recalculates the totals from the value of each open position. This is O(open positions).
+    def __recalculateTotals(self):
+        self.__valueUpdates = 0
+        self.__positionsValue = math.fsum(self.__positionValues.itervalues())
+        self.__shortPositionsValue = math.fsum(value for value in self.__positionValues.itervalues() if value < 0)
+
+    def __updatePrices(self, bars):
+        useAdjustedValues = self.getUseAdjustedValues()
+        for instrument in bars.getInstruments():
+            price = pyalgotrade.bar.get_close(bars[instrument], useAdjustedValues)
+            self.__lastPrices[instrument] = price
+            shares = self.__shares.get(instrument)
+            if shares:
+                self.__setPositionValue(instrument, price * shares)
+
+    # Recalculates prices and position values from scratch.
+    def __revaluePositions(self):
+        useAdjustedValues = self.getUseAdjustedValues()
+        self.__positionValues = {}
+        for instrument in self.__lastPrices.keys():
+            self.__lastPrices[instrument] = pyalgotrade.bar.get_close(self.__barFeed.getLastBar(instrument), useAdjustedValues)
+        for instrument, shares in self.__shares.iteritems():
+            if shares:
+                self.__positionValues[instrument] = self.__lastPrices[instrument] * shares
+        self.__recalculateTotals()
 
     def setAllowFractions(self, allowFractions):
         self.__allowFractions = allowFractions
@@ -518,6 +983,37 @@ class Broker(broker.Broker):
     def setAllowNegativeCash(self, allowNegativeCash):
         self.__allowNegativeCash = allowNegativeCash
 
+    def setMargin(self, margin):
+        """Sets the margin requirements and financing charges. If set, fills are checked against the initial margin
+        instead of the available cash.
+
+        :param margin: The margin settings, or None to use a cash account.
+        :type margin: :class:`Margin`.
+        """
+        self.__margin = margin
+
+    def getMargin(self):
+        """Returns the :class:`Margin` currently set, or None."""
+        return self.__margin
+
+    def getBorrowFees(self):
+        """Returns the short borrow fees charged so far."""
+        return self.__borrowFees
+
+    def getInterest(self):
+        """Returns the net interest accrued so far. Negative means that interest was paid."""
+        return self.__interest
+
+    # Handlers should expect 2 parameters:
+    # 1: broker instance
+    # 2: The equity required to cover the maintenance margin.
+    def getMarginCallEvent(self):
+        return self.__marginCallEvent
+
+    # The value of long positions plus the absolute value of short positions.
+    def __getGrossValue(self):
+        return self.__positionsValue - 2 * self.__shortPositionsValue
+
     def getCash(self, includeShort=True):
         """
         Returns the available cash.
@@ -526,12 +1022,8 @@ class Broker(broker.Broker):
         :type includeShort: boolean.
         """
         ret = self.__cash
-        if not includeShort and self.__barFeed.getCurrentBars() is not None:
-            bars = self.__barFeed.getCurrentBars()
-            for instrument, shares in self.__shares.iteritems():
-                if shares < 0:
-                    instrumentPrice = pyalgotrade.bar.get_close(self.__getBar(bars, instrument), self.getUseAdjustedValues())
-                    ret += instrumentPrice * shares
+        if not includeShort:
+            ret += self.__shortPositionsValue
         return ret
 
     def setCash(self, cash):
@@ -571,9 +1063,10 @@ class Broker(broker.Broker):
         if deprecationCheck is None:
             warninghelpers.deprecation_warning("setUseAdjustedValues will be deprecated in the next version. Please use setUseAdjustedValues on the strategy instead.", stacklevel=2)
         self.__useAdjustedValues = useAdjusted
+        self.__revaluePositions()
 
     def getActiveOrders(self):
-        return self.__activeOrders.values()
+        return self.__activeOrders.getOrders()
 
     def getPendingOrders(self):
         warninghelpers.deprecation_warning("getPendingOrders will be deprecated in the next version. Please use getActiveOrders instead.", stacklevel=2)
@@ -588,23 +1081,15 @@ class Broker(broker.Broker):
     def getActiveInstruments(self):
         return [instrument for instrument, shares in self.__shares.iteritems() if shares != 0]
 
-    def __getEquityWithBars(self, bars):
-        ret = self.getCash()
-        if bars is not None:
-            for instrument, shares in self.__shares.iteritems():
-                instrumentPrice = pyalgotrade.bar.get_close(self.__getBar(bars, instrument), self.getUseAdjustedValues())
-                ret += instrumentPrice * shares
-        return ret
-
     def getValue(self, deprecated=None):
         if deprecated is not None:
             warninghelpers.deprecation_warning("The bars parameter is no longer used and will be removed in the next version.", stacklevel=2)
 
-        return self.__getEquityWithBars(self.__barFeed.getCurrentBars())
+        return self.getEquity()
 
     def getEquity(self):
         """Returns the portfolio value (cash + shares)."""
-        return self.__getEquityWithBars(self.__barFeed.getCurrentBars())
+        return self.__cash + self.__positionsValue
 
     # Tries to commit an order execution. Returns True if the order was commited, or False is there is not enough cash.
     def commitOrderExecution(self, order, dateTime, fillInfo):
@@ -626,8 +1111,19 @@ class Broker(broker.Broker):
         cost -= commission
         resultingCash = self.getCash() + cost
 
-        # Check that we're ok on cash after the commission.
-        if resultingCash >= 0 or self.__allowNegativeCash:
+        # Check that we're ok on cash, or margin, after the commission.
+        if self.__margin is None:
+            canFill = resultingCash >= 0 or self.__allowNegativeCash
+        else:
+            instrument = order.getInstrument()
+            prevValue = self.__positionValues.get(instrument, 0)
+            value = self.__lastPrices.get(instrument, price) * (self.getShares(instrument) + sharesDelta)
+            prevGrossValue = self.__getGrossValue()
+            grossValue = prevGrossValue - abs(prevValue) + abs(value)
+            equity = resultingCash + self.__positionsValue - prevValue + value
+            canFill = self.__margin.canFill(equity, grossValue, prevGrossValue)
+
+        if canFill:
 
             # Update the order before updating internal state since addExecutionInfo may raise.
             # addExecutionInfo should switch the order state.
@@ -636,14 +1132,17 @@ class Broker(broker.Broker):
 
             # Commit the order execution.
             self.__cash = resultingCash
-            self.__shares[order.getInstrument()] = self.getShares(order.getInstrument()) + sharesDelta
+            instrument = order.getInstrument()
+            shares = self.getShares(instrument) + sharesDelta
+            self.__shares[instrument] = shares
+            self.__setPositionValue(instrument, self.__lastPrices.get(instrument, price) * shares)
 
             # Let the strategy know that the order was filled.
             self.__fillStrategy.onOrderFilled(order)
 
             # Notify the order update
             if order.isFilled():
-                del self.__activeOrders[order.getId()]
+                self.__activeOrders.remove(order)
                 self.notifyOrderEvent(broker.OrderEvent(order, broker.OrderEvent.Type.FILLED, orderExecutionInfo))
             elif order.isPartiallyFilled():
                 self.notifyOrderEvent(broker.OrderEvent(order, broker.OrderEvent.Type.PARTIALLY_FILLED, orderExecutionInfo))
@@ -654,12 +1153,11 @@ class Broker(broker.Broker):
 
     def placeOrder(self, order):
         if order.isInitial():
-            # assert(order.getId() not in self.__activeOrders)
-            self.__activeOrders[order.getId()] = order
             # Switch from INITIAL -> SUBMITTED
             # IMPORTANT: Do not emit an event for this switch because when using the position interface
             # the order is not yet mapped to the position and Position.onOrderUpdated will get called.
             order.switchState(broker.Order.State.SUBMITTED)
+            self.__activeOrders.add(order)
         else:
             raise Exception("The order was already processed")
 
@@ -674,7 +1172,7 @@ class Broker(broker.Broker):
             # Cancel the order if it is expired.
             if expired:
                 ret = False
-                del self.__activeOrders[order.getId()]
+                self.__activeOrders.remove(order)
                 order.switchState(broker.Order.State.CANCELED)
                 self.notifyOrderEvent(broker.OrderEvent(order, broker.OrderEvent.Type.CANCELED, "Expired"))
 
@@ -690,7 +1188,7 @@ class Broker(broker.Broker):
 
             # Cancel the order if it will expire in the next bar.
             if expired:
-                del self.__activeOrders[order.getId()]
+                self.__activeOrders.remove(order)
                 order.switchState(broker.Order.State.CANCELED)
                 self.notifyOrderEvent(broker.OrderEvent(order, broker.OrderEvent.Type.CANCELED, "Expired"))
 
@@ -720,23 +1218,46 @@ class Broker(broker.Broker):
             if order.isActive():
                 # This may trigger orders to be added/removed from __activeOrders.
                 self.__processOrder(order, bar_)
+                # The order may have been accepted, or its stop price may have been hit, so it needs to be reindexed.
+                if order.isActive():
+                    self.__activeOrders.update(order)
             else:
                 # If an order is not active it should be because it was canceled in this same loop and it should have been removed.
                 assert(order.isCanceled())
-                assert(order not in self.__activeOrders)
+                assert(order.getId() not in self.__activeOrders)
+
+    def __accrueCharges(self, dateTime):
+        if self.__lastDateTime is not None:
+            borrowFee, interest = self.__margin.accrue(self.getCash(False), self.__shortPositionsValue, dateTime - self.__lastDateTime)
+            self.__borrowFees += borrowFee
+            self.__interest += interest
+            self.__cash += interest - borrowFee
 
     def onBars(self, dateTime, bars):
+        if self.__margin is not None:
+            self.__accrueCharges(dateTime)
+        self.__lastDateTime = dateTime
+
+        self.__updatePrices(bars)
+
         # Let the strategy know that new bars are being processed.
         self.__fillStrategy.onBars(dateTime, bars)
 
         # This is to froze the orders that will be processed in this event, to avoid new getting orders introduced
         # and processed on this very same event.
-        ordersToProcess = self.__activeOrders.values()
+        # If the fill strategy allows it, resting limit and stop orders whose prices are out of the bar's range are
+        # skipped.
+        ordersToProcess = self.__activeOrders.getOrdersToProcess(bars, self.getUseAdjustedValues(), self.__fillStrategy.isPriceTriggered())
 
         for order in ordersToProcess:
             # This may trigger orders to be added/removed from __activeOrders.
             self.__onBarsImpl(order, bars)
 
+        if self.__margin is not None:
+            grossValue = self.__getGrossValue()
+            if self.__margin.isMarginCall(self.getEquity(), grossValue):
+                self.__marginCallEvent.emit(self, grossValue * self.__margin.getMaintenanceMargin())
+
     def start(self):
         pass
 
@@ -777,6 +1298,6 @@ class Broker(broker.Broker):
         if activeOrder.isFilled():
             raise Exception("Can't cancel order that has already been filled")
 
-        del self.__activeOrders[activeOrder.getId()]
+        self.__activeOrders.remove(activeOrder)
         activeOrder.switchState(broker.Order.State.CANCELED)
         self.notifyOrderEvent(broker.OrderEvent(activeOrder, broker.OrderEvent.Type.CANCELED, "User requested cancellation"))
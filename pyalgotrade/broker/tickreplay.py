@@ -0,0 +1,317 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import bisect
+import datetime
+
+from pyalgotrade.broker import backtesting
+from pyalgotrade.utils import dt
+from pyalgotrade import bar
+
+
+######################################################################
+## Tick stores
+
+class TickStore(object):
+    """Base class for tick stores. Ticks are (dateTime, price, volume) tuples.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def getTicks(self, instrument, fromDateTime, toDateTime):
+        """Returns the ticks for an instrument, sorted by datetime, such that fromDateTime <= dateTime < toDateTime.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param fromDateTime: The beginning of the period.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The end of the period (not included).
+        :type toDateTime: datetime.datetime.
+        :rtype: A list of (dateTime, price, volume) tuples.
+        """
+        raise NotImplementedError()
+
+
+class MemTickStore(TickStore):
+    """A :class:`TickStore` that keeps ticks in memory."""
+
+    def __init__(self):
+        self.__dateTimes = {}
+        self.__ticks = {}
+
+    def addTicks(self, instrument, ticks):
+        """Adds ticks for an instrument.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param ticks: A sequence of (dateTime, price, volume) tuples.
+        """
+        allTicks = self.__ticks.get(instrument, [])
+        allTicks.extend(ticks)
+        allTicks.sort(key=lambda tick: tick[0])
+        self.__ticks[instrument] = allTicks
+        self.__dateTimes[instrument] = [tick[0] for tick in allTicks]
+
+    def getTicks(self, instrument, fromDateTime, toDateTime):
+        dateTimes = self.__dateTimes.get(instrument)
+        if dateTimes is None:
+            return []
+        begin = bisect.bisect_left(dateTimes, fromDateTime)
+        end = bisect.bisect_left(dateTimes, toDateTime, begin)
+        return self.__ticks[instrument][begin:end]
+
+
+class CSVTickStore(TickStore):
+    """A :class:`TickStore` that loads ticks on demand from CSV files with the following format: ::
+
+        Date Time,Price,Volume
+        2013-01-01 13:59:55,100.1,3
+        2013-01-01 13:59:58,100.15,1
+
+    The files are scanned once, the first time ticks for an instrument are requested, to build a sparse index of
+    file offsets. After that, only the rows for the requested period are read.
+
+    :param dateTimeFormat: The format used to parse the Date Time column.
+    :type dateTimeFormat: string.
+    :param timezone: The timezone to use to localize ticks. Check :mod:`pyalgotrade.marketsession`.
+    :type timezone: A pytz timezone.
+    :param indexStep: The number of rows between index entries.
+    :type indexStep: int.
+
+    .. note::
+        * Rows must be sorted by datetime.
+        * If timezone is None, datetimes are left naive and should be compared with naive bar datetimes.
+    """
+
+    def __init__(self, dateTimeFormat="%Y-%m-%d %H:%M:%S", timezone=None, indexStep=1000):
+        assert(indexStep > 0)
+        self.__dateTimeFormat = dateTimeFormat
+        self.__timezone = timezone
+        self.__indexStep = indexStep
+        self.__paths = {}
+        # Sparse indexes, built lazily. For each instrument a (dateTimes, offsets) tuple.
+        self.__indexes = {}
+
+    def addTicksFromCSV(self, instrument, path):
+        """Adds a CSV file with ticks for an instrument. The file is not read until ticks are requested.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param path: The path to the CSV file.
+        :type path: string.
+        """
+        self.__paths[instrument] = path
+        self.__indexes.pop(instrument, None)
+
+    def __parseRow(self, line):
+        dateTime, price, volume = line.rstrip("\r\n").split(",")
+        dateTime = datetime.datetime.strptime(dateTime, self.__dateTimeFormat)
+        if self.__timezone is not None:
+            dateTime = dt.localize(dateTime, self.__timezone)
+        return (dateTime, float(price), float(volume))
+
+    def __buildIndex(self, instrument):
+        dateTimes = []
+        offsets = []
+        with open(self.__paths[instrument], "r") as f:
+            f.readline()  # Skip the header.
+            rowCount = 0
+            offset = f.tell()
+            line = f.readline()
+            while line:
+                if rowCount % self.__indexStep == 0:
+                    dateTimes.append(self.__parseRow(line)[0])
+                    offsets.append(offset)
+                rowCount += 1
+                offset = f.tell()
+                line = f.readline()
+        ret = (dateTimes, offsets)
+        self.__indexes[instrument] = ret
+        return ret
+
+    def getTicks(self, instrument, fromDateTime, toDateTime):
+        if instrument not in self.__paths:
+            return []
+        index = self.__indexes.get(instrument)
+        if index is None:
+            index = self.__buildIndex(instrument)
+        dateTimes, offsets = index
+
+        # Find the last index entry before fromDateTime. There may be rows with the same datetime before it.
+        pos = bisect.bisect_left(dateTimes, fromDateTime) - 1
+        if pos < 0:
+            if len(offsets) == 0:
+                return []
+            pos = 0
+
+        ret = []
+        with open(self.__paths[instrument], "r") as f:
+            f.seek(offsets[pos])
+            line = f.readline()
+            while line:
+                tick = self.__parseRow(line)
+                if tick[0] >= toDateTime:
+                    break
+                if tick[0] >= fromDateTime:
+                    ret.append(tick)
+                line = f.readline()
+        return ret
+
+
+######################################################################
+## Fill strategy
+
+class TickReplayStrategy(backtesting.FillStrategy):
+    """A :class:`pyalgotrade.broker.backtesting.FillStrategy` that fills limit and stop orders by replaying the ticks
+    that took place during the bar, instead of guessing using the bar's open, high and low prices.
+
+    :param tickStore: The store to load ticks from.
+    :type tickStore: :class:`TickStore`.
+    :param fillStrategy: The fill strategy used for market orders, and for bars that have no ticks. If None,
+        :class:`pyalgotrade.broker.backtesting.DefaultStrategy` is used.
+    :type fillStrategy: :class:`pyalgotrade.broker.backtesting.FillStrategy`.
+
+    This strategy works as follows:
+
+    * Ticks are only loaded for bars where an active order needs to be processed. If the fill strategy is price
+      triggered, like the default one, the broker only processes resting limit and stop orders when the bar reaches
+      their prices, so bars with no triggered orders don't load ticks at all.
+    * A bar covers the ticks in [bar datetime, bar datetime + bar frequency).
+    * A :class:`pyalgotrade.broker.LimitOrder` is filled using the ticks at the limit price or better.
+    * A :class:`pyalgotrade.broker.StopOrder` is filled using the ticks following the first one that hits the stop price.
+    * A :class:`pyalgotrade.broker.StopLimitOrder` is filled using the ticks following the first one that hits the stop
+      price, that are at the limit price or better.
+    * Each tick's volume can only be used once. The fill price is the volume weighted average price of the ticks used.
+    * Fills from ticks are also reported to the wrapped fill strategy, so they use up the volume available for market
+      orders in the same bar.
+    """
+
+    def __init__(self, tickStore, fillStrategy=None):
+        self.__tickStore = tickStore
+        if fillStrategy is None:
+            self.__fillStrategy = backtesting.DefaultStrategy()
+        else:
+            self.__fillStrategy = fillStrategy
+        # Ticks for the current bars, loaded on demand. Each tick is a [dateTime, price, volumeLeft] list.
+        self.__ticks = {}
+        # The ticks consumed by the last fill, to update the volume left once the broker commits it.
+        self.__pendingFill = None
+
+    def getFillStrategy(self):
+        """Returns the fill strategy used for market orders and for bars that have no ticks."""
+        return self.__fillStrategy
+
+    def onBars(self, dateTime, bars):
+        self.__ticks = {}
+        self.__pendingFill = None
+        self.__fillStrategy.onBars(dateTime, bars)
+
+    def onOrderFilled(self, order):
+        if self.__pendingFill is not None and self.__pendingFill[0] is order:
+            for tick, quantity in self.__pendingFill[1]:
+                tick[2] -= quantity
+            self.__pendingFill = None
+        # Fills from ticks also use up the bar's volume, which is tracked by the wrapped strategy.
+        self.__fillStrategy.onOrderFilled(order)
+
+    def isPriceTriggered(self):
+        return self.__fillStrategy.isPriceTriggered()
+
+    def __getTicks(self, instrument, bar_):
+        ret = self.__ticks.get(instrument)
+        if ret is None:
+            if bar_.getFrequency() == bar.Frequency.TRADE:
+                ret = []
+            else:
+                begin = bar_.getDateTime()
+                end = begin + datetime.timedelta(seconds=bar_.getFrequency())
+                ret = [[tick[0], tick[1], tick[2]] for tick in self.__tickStore.getTicks(instrument, begin, end)]
+            self.__ticks[instrument] = ret
+        return ret
+
+    # Returns the position of the first tick that hits the stop price, or None.
+    def __findStopHit(self, order, ticks):
+        stopPrice = order.getStopPrice()
+        for i in xrange(len(ticks)):
+            price = ticks[i][1]
+            if (order.isBuy() and price >= stopPrice) or (order.isSell() and price <= stopPrice):
+                return i
+        return None
+
+    def __fillFromTicks(self, order, broker_, ticks, begin, limitPrice):
+        remaining = order.getRemaining()
+        used = []
+        filled = 0
+        cost = 0
+        for i in xrange(begin, len(ticks)):
+            tick = ticks[i]
+            price = tick[1]
+            if limitPrice is not None and ((order.isBuy() and price > limitPrice) or (order.isSell() and price < limitPrice)):
+                continue
+            quantity = min(tick[2], remaining - filled)
+            if not broker_.getAllowFractions():
+                quantity = int(quantity)
+            if quantity > 0:
+                used.append((tick, quantity))
+                filled += quantity
+                cost += price * quantity
+                if filled >= remaining:
+                    break
+
+        if filled == 0 or (order.getAllOrNone() and filled < remaining):
+            return None
+        self.__pendingFill = (order, used)
+        return backtesting.FillInfo(cost / float(filled), filled)
+
+    def fillMarketOrder(self, order, broker_, bar_):
+        return self.__fillStrategy.fillMarketOrder(order, broker_, bar_)
+
+    def fillLimitOrder(self, order, broker_, bar_):
+        ticks = self.__getTicks(order.getInstrument(), bar_)
+        if len(ticks) == 0:
+            return self.__fillStrategy.fillLimitOrder(order, broker_, bar_)
+        return self.__fillFromTicks(order, broker_, ticks, 0, order.getLimitPrice())
+
+    def fillStopOrder(self, order, broker_, bar_):
+        ticks = self.__getTicks(order.getInstrument(), bar_)
+        if len(ticks) == 0:
+            return self.__fillStrategy.fillStopOrder(order, broker_, bar_)
+
+        begin = 0
+        if not order.getStopHit():
+            begin = self.__findStopHit(order, ticks)
+            if begin is None:
+                return None
+            order.setStopHit(True)
+        return self.__fillFromTicks(order, broker_, ticks, begin, None)
+
+    def fillStopLimitOrder(self, order, broker_, bar_):
+        ticks = self.__getTicks(order.getInstrument(), bar_)
+        if len(ticks) == 0:
+            return self.__fillStrategy.fillStopLimitOrder(order, broker_, bar_)
+
+        begin = 0
+        if not order.getStopHit():
+            begin = self.__findStopHit(order, ticks)
+            if begin is None:
+                return None
+            order.setStopHit(True)
+        return self.__fillFromTicks(order, broker_, ticks, begin, order.getLimitPrice())
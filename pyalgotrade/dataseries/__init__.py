@@ -21,6 +21,8 @@
 from pyalgotrade import observer
 from pyalgotrade.utils import collections
 
+import bisect
+
 DEFAULT_MAX_LEN = 1024
 
 
@@ -76,6 +78,7 @@ class SequenceDataSeries(DataSeries):
         self.__values = collections.ListDeque(maxLen)
         self.__dateTimes = collections.ListDeque(maxLen)
         self.__maxLen = maxLen
+        self.__validateDateTimes = True
 
     def __len__(self):
         return len(self.__values)
@@ -92,6 +95,13 @@ class SequenceDataSeries(DataSeries):
         """Returns the maximum number of values to hold."""
         return self.__values.getMaxLen()
 
+    # Set to False to skip checking that datetimes are in order when appending values that were already validated.
+    def setDateTimeValidation(self, validate):
+        self.__validateDateTimes = validate
+
+    def getDateTimeValidation(self):
+        return self.__validateDateTimes
+
     # Event handler receives:
     # 1: Dataseries generating the event
     # 2: The datetime for the new value
@@ -117,10 +127,11 @@ class SequenceDataSeries(DataSeries):
             If dateTime is not None, it must be greater than the last one.
         """
 
-        if dateTime is not None and len(self.__dateTimes) != 0 and self.__dateTimes[-1] >= dateTime:
-            raise Exception("Invalid datetime. It must be bigger than that last one")
+        if self.__validateDateTimes:
+            if dateTime is not None and len(self.__dateTimes) != 0 and self.__dateTimes[-1] >= dateTime:
+                raise Exception("Invalid datetime. It must be bigger than that last one")
+            assert(len(self.__values) == len(self.__dateTimes))
 
-        assert(len(self.__values) == len(self.__dateTimes))
         self.__dateTimes.append(dateTime)
         self.__values.append(value)
 
@@ -128,3 +139,49 @@ class SequenceDataSeries(DataSeries):
 
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+    def indexOf(self, dateTime):
+        """Returns the position of the value associated with a given datetime, or None if there is no such value.
+        This is a binary search, so it takes O(log n).
+
+        :param dateTime: The datetime to look for.
+        :type dateTime: :class:`datetime.datetime`.
+
+        .. note::
+            Datetimes are assumed to be sorted, which is the case if values were appended with datetimes and
+            datetime validation was not disabled.
+        """
+        dateTimes = self.__dateTimes.data()
+        pos = bisect.bisect_left(dateTimes, dateTime)
+        if pos < len(dateTimes) and dateTimes[pos] == dateTime:
+            return pos
+        return None
+
+    def getValueAt(self, dateTime):
+        """Returns the value associated with a given datetime, or None if there is no such value.
+
+        :param dateTime: The datetime to look for.
+        :type dateTime: :class:`datetime.datetime`.
+        """
+        ret = None
+        pos = self.indexOf(dateTime)
+        if pos is not None:
+            ret = self.__values[pos]
+        return ret
+
+    def slice(self, fromDateTime=None, toDateTime=None):
+        """Returns a list with the values such that fromDateTime <= dateTime <= toDateTime.
+
+        :param fromDateTime: The beginning of the period, or None to start with the first value.
+        :type fromDateTime: :class:`datetime.datetime`.
+        :param toDateTime: The end of the period, or None to end with the last value.
+        :type toDateTime: :class:`datetime.datetime`.
+        """
+        dateTimes = self.__dateTimes.data()
+        begin = 0
+        end = len(dateTimes)
+        if fromDateTime is not None:
+            begin = bisect.bisect_left(dateTimes, fromDateTime)
+        if toDateTime is not None:
+            end = bisect.bisect_right(dateTimes, toDateTime, begin)
+        return self.__values[begin:end]
@@ -20,6 +20,8 @@
 
 from pyalgotrade import dataseries
 
+import bisect
+
 
 def datetime_aligned(ds1, ds2, maxLen=dataseries.DEFAULT_MAX_LEN):
     """
@@ -50,17 +52,13 @@ class Syncer(object):
         sourceDS2.getNewValueEvent().subscribe(self.__onNewValue2)
         # Source dataseries will keep a reference to self and that will prevent from getting this destroyed.
 
-    # Scan backwards for the position of dateTime in ds.
+    # Binary search for the position of dateTime in the buffered values, which are sorted by datetime.
     def __findPosForDateTime(self, values, dateTime):
         ret = None
-        i = len(values) - 1
-        while i >= 0:
-            if values[i][0] == dateTime:
-                ret = i
-                break
-            elif values[i][0] < dateTime:
-                break
-            i -= 1
+        # (dateTime,) sorts before any (dateTime, value) tuple, so values never get compared.
+        i = bisect.bisect_left(values, (dateTime,))
+        if i < len(values) and values[i][0] == dateTime:
+            ret = i
         return ret
 
     def __onNewValue1(self, dataSeries, dateTime, value):
@@ -38,6 +38,11 @@ class BarDataSeries(dataseries.SequenceDataSeries):
         self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
         self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
 
+    def setDateTimeValidation(self, validate):
+        dataseries.SequenceDataSeries.setDateTimeValidation(self, validate)
+        for ds in [self.__openDS, self.__closeDS, self.__highDS, self.__lowDS, self.__volumeDS, self.__adjCloseDS]:
+            ds.setDateTimeValidation(validate)
+
     def append(self, value):
         self.appendWithDateTime(value.getDateTime(), value)
 
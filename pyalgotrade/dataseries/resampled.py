@@ -14,6 +14,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+
+import pytz
+
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade import bar
@@ -31,6 +35,119 @@ def get_slot_datetime(dateTime, frequency):
     return ret
 
 
+epoch_naive = datetime.datetime(1970, 1, 1)
+
+
+# Naive datetimes are converted as is, without timezone conversions, so no pytz work is involved.
+def _datetime_to_timestamp(dateTime):
+    if dt.datetime_is_naive(dateTime):
+        return (dateTime - epoch_naive).total_seconds()
+    else:
+        return (dateTime - dt.epoch_utc).total_seconds()
+
+
+class SlotCalendar(object):
+    """Groups datetimes into slots of a given frequency.
+
+    * Frequencies that are not a multiple of a day are aligned to the epoch.
+    * Frequencies that are a multiple of a day follow the calendar for the given timezone, taking daylight saving time
+      into account, and start at the beginning of the session. Weekly slots start on Mondays.
+
+    Slot boundaries are calculated only when a datetime falls outside the current slot, so checking if a datetime
+    belongs to the current slot takes a single comparison.
+
+    :param frequency: The grouping frequency in seconds. Must be > 0.
+    :param timezone: The timezone for the calendar. If None, UTC is used. Naive datetimes are assumed to be in this timezone.
+    :type timezone: A pytz timezone.
+    :param sessionStart: The local time when sessions start. If None, sessions start at midnight.
+    :type sessionStart: :class:`datetime.time`.
+
+    .. note::
+        * Use :meth:`pyalgotrade.marketsession.MarketSession.getTimezone` to get the timezone for a given market session.
+        * Datetimes should be supplied in ascending order.
+    """
+
+    def __init__(self, frequency, timezone=None, sessionStart=None):
+        if not frequency > 0:
+            raise Exception("Invalid frequency")
+        if timezone is None:
+            timezone = pytz.utc
+        if sessionStart is None:
+            sessionStart = datetime.time()
+
+        self.__frequency = frequency
+        self.__timezone = timezone
+        self.__sessionStart = sessionStart
+        self.__sessionStartDelta = datetime.timedelta(hours=sessionStart.hour, minutes=sessionStart.minute, seconds=sessionStart.second, microseconds=sessionStart.microsecond)
+        if frequency % bar.Frequency.DAY == 0:
+            self.__days = frequency / bar.Frequency.DAY
+        else:
+            self.__days = None
+        self.__slotBegin = None
+        self.__slotEnd = None
+        self.__slotDateTime = None
+
+    def __openIntradaySlot(self, dateTime, timestamp):
+        self.__slotBegin = int(timestamp) / self.__frequency * self.__frequency
+        self.__slotEnd = self.__slotBegin + self.__frequency
+        if dt.datetime_is_naive(dateTime):
+            self.__slotDateTime = dt.timestamp_to_datetime(self.__slotBegin, False)
+        else:
+            self.__slotDateTime = dt.localize(dt.timestamp_to_datetime(self.__slotBegin), dateTime.tzinfo)
+
+    def __openCalendarSlot(self, dateTime):
+        naive = dt.datetime_is_naive(dateTime)
+        if naive:
+            localDateTime = dateTime
+        else:
+            localDateTime = dateTime.astimezone(self.__timezone).replace(tzinfo=None)
+
+        # Values before the beginning of the session belong to the previous day's session.
+        # Day ordinal 1 is a Monday so weekly slots start on Mondays.
+        day = (localDateTime - self.__sessionStartDelta).toordinal()
+        day -= (day - 1) % self.__days
+        begin = datetime.datetime.combine(datetime.date.fromordinal(day), self.__sessionStart)
+        end = begin + datetime.timedelta(days=self.__days)
+
+        if naive:
+            self.__slotDateTime = begin
+        else:
+            begin = dt.localize(begin, self.__timezone)
+            end = dt.localize(end, self.__timezone)
+            self.__slotDateTime = dt.localize(begin, dateTime.tzinfo)
+        self.__slotBegin = _datetime_to_timestamp(begin)
+        self.__slotEnd = _datetime_to_timestamp(end)
+
+    def update(self, dateTime):
+        """Moves to the slot for the given datetime, if necessary.
+        Returns True if dateTime falls in a different slot than the previous one.
+
+        :param dateTime: The datetime.
+        :type dateTime: :class:`datetime.datetime`.
+        """
+        timestamp = _datetime_to_timestamp(dateTime)
+        if self.__slotBegin is not None and self.__slotBegin <= timestamp < self.__slotEnd:
+            return False
+
+        if self.__days is None:
+            self.__openIntradaySlot(dateTime, timestamp)
+        else:
+            self.__openCalendarSlot(dateTime)
+        return True
+
+    def getSlotDateTime(self):
+        """Returns the :class:`datetime.datetime` for the beginning of the current slot, or None."""
+        return self.__slotDateTime
+
+    def slotEnded(self, dateTime):
+        """Returns True if dateTime is past the end of the current slot.
+
+        :param dateTime: The datetime.
+        :type dateTime: :class:`datetime.datetime`.
+        """
+        return self.__slotEnd is not None and _datetime_to_timestamp(dateTime) >= self.__slotEnd
+
+
 class Slot(object):
     def __init__(self, dateTime, bar_, frequency):
         self.__dateTime = dateTime
@@ -71,7 +188,8 @@ class Slot(object):
         self.__volume += bar_.getVolume()
 
     def buildBasicBar(self):
-        return bar.BasicBar(self.__dateTime, self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose, self.__frequency)
+        # Prices come from valid bars so there is no need to check them again.
+        return bar.BasicBar(self.__dateTime, self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose, self.__frequency, False)
 
 
 class ResampledBarDataSeries(bards.BarDataSeries):
@@ -83,9 +201,16 @@ class ResampledBarDataSeries(bards.BarDataSeries):
     :param maxLen: The maximum number of values to hold.
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
     :type maxLen: int.
+    :param timezone: The timezone used for daily and weekly slots. If None, UTC is used.
+    :type timezone: A pytz timezone.
+    :param sessionStart: The local time when daily and weekly slots start. If None, slots start at midnight.
+    :type sessionStart: :class:`datetime.time`.
+
+    .. note::
+        Check :class:`SlotCalendar` for details on how bars are grouped.
     """
 
-    def __init__(self, dataSeries, frequency, maxLen=dataseries.DEFAULT_MAX_LEN):
+    def __init__(self, dataSeries, frequency, maxLen=dataseries.DEFAULT_MAX_LEN, timezone=None, sessionStart=None):
         bards.BarDataSeries.__init__(self, maxLen)
 
         if not isinstance(dataSeries, bards.BarDataSeries):
@@ -96,6 +221,7 @@ class ResampledBarDataSeries(bards.BarDataSeries):
         else:
             raise Exception("Invalid frequency")
 
+        self.__calendar = SlotCalendar(frequency, timezone, sessionStart)
         self.__slot = None
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
@@ -105,12 +231,10 @@ class ResampledBarDataSeries(bards.BarDataSeries):
         self.__slot = None
 
     def __onNewValue(self, dataSeries, dateTime, value):
-        dateTime = get_slot_datetime(value.getDateTime(), self.__frequency)
+        if self.__calendar.update(value.getDateTime()):
+            self.pushLast()
 
         if self.__slot is None:
-            self.__slot = Slot(dateTime, value, self.__frequency)
-        elif self.__slot.getDateTime() == dateTime:
-            self.__slot.addBar(value)
+            self.__slot = Slot(self.__calendar.getSlotDateTime(), value, self.__frequency)
         else:
-            self.appendWithDateTime(self.__slot.getDateTime(), self.__slot.buildBasicBar())
-            self.__slot = Slot(dateTime, value, self.__frequency)
+            self.__slot.addBar(value)
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import multiprocessing
+
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -35,18 +37,27 @@ class Results(object):
         self.__values = [[] for i in xrange(lookBack+lookForward+1)]
         self.__eventCount = 0
 
-        # Process events.
-        for instrument, events in eventsDict.items():
-            for event in events:
-                # Skip events which are on the boundary or for some reason are not complete.
-                if event.isComplete():
-                    self.__eventCount += 1
-                    # Compute cumulative returns: (1 + R1)*(1 + R2)*...*(1 + Rn)
-                    values = np.cumprod(event.getValues() + 1)
-                    # Normalize everything to the time of the event
-                    values = values / values[event.getLookBack()]
-                    for t in range(event.getLookBack()*-1, event.getLookForward()+1):
-                        self.setValue(t, values[t+event.getLookBack()])
+        # Process events. Skip events which are on the boundary or for some reason are not complete.
+        returns = [event.getValues() for events in eventsDict.values() for event in events if event.isComplete()]
+        self._addReturns(np.array(returns).reshape((len(returns), lookBack+lookForward+1)))
+
+    # Adds the returns for many events at once. Each row holds the returns from t=-lookBack to t=lookForward for an event.
+    def _addReturns(self, returns):
+        self.__eventCount += returns.shape[0]
+        # Compute cumulative returns: (1 + R1)*(1 + R2)*...*(1 + Rn)
+        values = np.cumprod(returns + 1, axis=1)
+        # Normalize everything to the time of the event
+        values = values / values[:, self.__lookBack][:, np.newaxis]
+        for pos in xrange(len(self.__values)):
+            self.__values[pos].extend(values[:, pos].tolist())
+
+    # Adds the values from the results for other events, like the ones for other instruments.
+    def _merge(self, other):
+        assert(self.__lookBack == other.getLookBack())
+        assert(self.__lookForward == other.getLookForward())
+        self.__eventCount += other.getEventCount()
+        for t in xrange(-self.__lookBack, self.__lookForward+1):
+            self.__values[self.__mapPos(t)].extend(other.getValues(t))
 
     def __mapPos(self, t):
         assert(t >= -1*self.__lookBack and t <= self.__lookForward)
@@ -214,6 +225,131 @@ class Profiler(object):
             feed.getNewBarsEvent().unsubscribe(self.__onBars)
 
 
+# Runs in the worker processes. Arguments are packed in a tuple to use it with multiprocessing.Pool.map.
+def _profile_shard(args):
+    predicateFactory, feedFactory, instruments, lookBack, lookForward, useAdjustedCloseForReturns = args
+    feed = feedFactory(instruments)
+    eventProfiler = Profiler(predicateFactory(feed), lookBack, lookForward)
+    eventProfiler.run(feed, useAdjustedCloseForReturns)
+    return eventProfiler.getResults()
+
+
+def run_parallel(predicateFactory, feedFactory, instruments, lookBack, lookForward, useAdjustedCloseForReturns=True, workerCount=None):
+    """Runs the analysis in parallel. Events for different instruments are independent, so instruments are split
+    into shards and each shard is analyzed by a :class:`Profiler` in a different process, using its own feed.
+
+    :param predicateFactory: A callable that receives a feed and returns the :class:`Predicate` to use with it,
+        like a :class:`Predicate` subclass. It has to be picklable, so it should be defined at module level.
+    :param feedFactory: A callable that receives a list of instruments and returns a
+        :class:`pyalgotrade.barfeed.BarFeed` with bars for those instruments. It has to be picklable, so it should
+        be defined at module level.
+    :param instruments: The instruments to analyze.
+    :type instruments: list.
+    :param lookBack: The number of bars before the event to analyze. Must be > 0.
+    :type lookBack: int.
+    :param lookForward: The number of bars after the event to analyze. Must be > 0.
+    :type lookForward: int.
+    :param useAdjustedCloseForReturns: True if adjusted close values should be used to calculate returns.
+    :type useAdjustedCloseForReturns: boolean.
+    :param workerCount: The number of processes to use. If None then as many processes as CPUs are used.
+    :type workerCount: int.
+    :rtype: :class:`Results`.
+
+    .. note::
+        The predicate only gets to see the bars for the instruments in its shard.
+    """
+
+    assert(workerCount is None or workerCount > 0)
+    if workerCount is None:
+        workerCount = multiprocessing.cpu_count()
+    workerCount = max(1, min(workerCount, len(instruments)))
+
+    shards = [instruments[i::workerCount] for i in xrange(workerCount)]
+    jobs = [(predicateFactory, feedFactory, shard, lookBack, lookForward, useAdjustedCloseForReturns) for shard in shards]
+    if workerCount == 1:
+        shardResults = [_profile_shard(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(workerCount)
+        try:
+            shardResults = pool.map(_profile_shard, jobs)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    ret = Results({}, lookBack, lookForward)
+    for shardResult in shardResults:
+        ret._merge(shardResult)
+    return ret
+
+
+def compute_returns(prices):
+    """Returns a NumPy array with the returns for each row of prices. The first row is NaN.
+
+    :param prices: A 2D array with the prices for each date (rows) and instrument (columns).
+    :type prices: numpy.ndarray.
+    """
+    prices = np.asarray(prices, dtype=float)
+    ret = np.empty(prices.shape)
+    ret[0] = np.NAN
+    ret[1:] = prices[1:] / prices[:-1] - 1
+    return ret
+
+
+class BatchProfiler(object):
+    """This class analyzes returns before and after the events like :class:`Profiler` does, but using matrices that hold
+    the events and the returns for every date and instrument. Windows are extracted for all the events at once, so this
+    is much faster than :class:`Profiler` for large universes or long periods.
+
+    :param lookBack: The number of bars before the event to analyze. Must be > 0.
+    :type lookBack: int.
+    :param lookForward: The number of bars after the event to analyze. Must be > 0.
+    :type lookForward: int.
+    """
+
+    def __init__(self, lookBack, lookForward):
+        assert(lookBack > 0)
+        assert(lookForward > 0)
+        self.__lookBack = lookBack
+        self.__lookForward = lookForward
+        self.__returns = np.empty((0, lookBack + lookForward + 1))
+
+    def getResults(self):
+        """Returns the results of the analysis.
+
+        :rtype: :class:`Results`.
+        """
+        ret = Results({}, self.__lookBack, self.__lookForward)
+        ret._addReturns(self.__returns)
+        return ret
+
+    def run(self, events, returns):
+        """Runs the analysis. Results from previous calls are kept, so this can be called once for every chunk of
+        instruments or dates.
+
+        :param events: A 2D boolean array that is True where an event took place for a date (row) and instrument (column).
+        :type events: numpy.ndarray.
+        :param returns: A 2D array with the same shape as events with the returns for each date and instrument.
+            Missing returns should be NaN. Check :func:`compute_returns`.
+        :type returns: numpy.ndarray.
+        """
+
+        events = np.asarray(events, dtype=bool)
+        returns = np.asarray(returns, dtype=float)
+        if events.shape != returns.shape or events.ndim != 2:
+            raise Exception("The events and returns matrices must be 2D and have the same shape")
+
+        rows, columns = np.nonzero(events)
+        # Skip events which are on the boundary.
+        inRange = (rows >= self.__lookBack) & (rows + self.__lookForward < events.shape[0])
+        rows = rows[inRange]
+        columns = columns[inRange]
+        # Extract the window of returns for every event at once.
+        offsets = np.arange(-self.__lookBack, self.__lookForward + 1)
+        windows = returns[rows[:, np.newaxis] + offsets, columns[:, np.newaxis]]
+        # Skip events which are not complete.
+        self.__returns = np.vstack((self.__returns, windows[~np.isnan(windows).any(axis=1)]))
+
+
 def build_plot(profilerResults):
     # Calculate each value.
     x = []
@@ -26,10 +26,17 @@ class MemFeed(feed.BaseFeed):
     def __init__(self, maxLen=dataseries.DEFAULT_MAX_LEN):
         feed.BaseFeed.__init__(self, maxLen)
         self.__values = []
+        self.__sorted = True
         self.__nextIdx = 0
 
+    def __sortValues(self):
+        # Values that were not added in order get sorted only once, before they are consumed.
+        self.__values.sort(key=lambda x: x[0])
+        self.__sorted = True
+
     def start(self):
-        pass
+        if not self.__sorted:
+            self.__sortValues()
 
     def stop(self):
         pass
@@ -38,12 +45,16 @@ class MemFeed(feed.BaseFeed):
         pass
 
     def eof(self):
+        if not self.__sorted:
+            self.__sortValues()
         if self.__nextIdx < len(self.__values):
             return False
         else:
             return True
 
     def peekDateTime(self):
+        if not self.__sorted:
+            self.__sortValues()
         ret = None
         if self.__nextIdx < len(self.__values):
             ret = self.__values[self.__nextIdx][0]
@@ -56,6 +67,8 @@ class MemFeed(feed.BaseFeed):
         return dataseries.SequenceDataSeries(maxLen)
 
     def getNextValues(self):
+        if not self.__sorted:
+            self.__sortValues()
         ret = (None, None)
         if self.__nextIdx < len(self.__values):
             ret = self.__values[self.__nextIdx]
@@ -71,6 +84,14 @@ class MemFeed(feed.BaseFeed):
             for key in values[0][1].keys():
                 self.registerDataSeries(key)
 
+            # Sorting is deferred until values get consumed and skipped if they are already in order.
+            if self.__sorted:
+                prevDateTime = None
+                if len(self.__values):
+                    prevDateTime = self.__values[-1][0]
+                for dateTime, _ in values:
+                    if prevDateTime is not None and dateTime < prevDateTime:
+                        self.__sorted = False
+                        break
+                    prevDateTime = dateTime
             self.__values.extend(values)
-            cmpFun = lambda x, y: cmp(x[0], y[0])
-            self.__values.sort(cmpFun)
@@ -156,6 +156,7 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
     .. note::
         Note that a :class:`pyalgotrade.bar.Bar` instance will be created for every trade, so
         open, high, low and close values will all be the same.
+        Use :class:`pyalgotrade.barfeed.resampled.ResampledBarFeed` to get bars for a given period instead.
     """
 
     def __init__(self, client, maxLen=dataseries.DEFAULT_MAX_LEN):
@@ -0,0 +1,177 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import stratanalyzer
+from pyalgotrade.stratanalyzer import sharpe
+
+import array
+import datetime
+import math
+import numpy as np
+
+epoch_naive = datetime.datetime(1970, 1, 1)
+seconds_per_day = 24 * 60 * 60
+
+
+# Datetimes are stored as seconds since the epoch using the local (wall clock) time, so days can be grouped
+# just like using dateTime.date().
+def _to_timestamp(dateTime):
+    return (dateTime.replace(tzinfo=None) - epoch_naive).total_seconds()
+
+
+def _to_datetime(timestamp):
+    return epoch_naive + datetime.timedelta(seconds=timestamp)
+
+
+class EquityCurve(stratanalyzer.StrategyAnalyzer):
+    """A :class:`pyalgotrade.stratanalyzer.StrategyAnalyzer` that records the portfolio value for each bar
+    in a compact array, and calculates returns, Sharpe and Sortino ratios and drawdowns once the strategy
+    finished running.
+
+    Use this instead of :class:`pyalgotrade.stratanalyzer.returns.Returns`,
+    :class:`pyalgotrade.stratanalyzer.sharpe.SharpeRatio` and :class:`pyalgotrade.stratanalyzer.drawdown.DrawDown`
+    to keep the calculations out of the bar loop.
+
+    .. note::
+        Datetimes are recorded using local time, so they are returned as naive datetimes.
+    """
+
+    def __init__(self):
+        self.__initialEquity = None
+        self.__equity = array.array("d")
+        self.__timestamps = array.array("d")
+
+    def attached(self, strat):
+        self.__initialEquity = strat.getBroker().getEquity()
+
+    def beforeOnBars(self, strat, bars):
+        self.__timestamps.append(_to_timestamp(bars.getDateTime()))
+        self.__equity.append(strat.getBroker().getEquity())
+
+    def getInitialEquity(self):
+        """Returns the portfolio value when the analyzer was attached."""
+        return self.__initialEquity
+
+    def getEquity(self):
+        """Returns a NumPy array with the portfolio value for each bar."""
+        return np.array(self.__equity, dtype=float)
+
+    def getDateTimes(self):
+        """Returns a list with the datetime for each bar."""
+        return [_to_datetime(timestamp) for timestamp in self.__timestamps]
+
+    def __getReturns(self, equity):
+        # The first return is relative to the portfolio value when the analyzer was attached.
+        prevEquity = np.empty(len(equity))
+        if len(equity):
+            prevEquity[0] = self.__initialEquity
+            prevEquity[1:] = equity[:-1]
+        return equity / prevEquity - 1
+
+    def getReturns(self):
+        """Returns a NumPy array with the returns for each bar."""
+        return self.__getReturns(self.getEquity())
+
+    def getCumulativeReturns(self):
+        """Returns a NumPy array with the cumulative returns for each bar."""
+        return self.getEquity() / float(self.__initialEquity) - 1
+
+    def getDailyReturns(self):
+        """Returns a NumPy array with the returns for each day."""
+        days = np.floor(np.array(self.__timestamps, dtype=float) / seconds_per_day)
+        # The last bar for each day.
+        lastBars = np.flatnonzero(np.append(days[1:] != days[:-1], True)) if len(days) else np.array([], dtype=int)
+        return self.__getReturns(self.getEquity()[lastBars])
+
+    def getRollingReturns(self, window):
+        """Returns a NumPy array with the returns over a rolling window of bars.
+
+        :param window: The number of bars in the window.
+        :type window: int.
+        """
+        assert(window > 0)
+        equity = self.getEquity()
+        return equity[window:] / equity[:-window] - 1
+
+    def getSharpeRatio(self, riskFreeRate, annualized=True, useDailyReturns=True):
+        """Returns the Sharpe ratio, calculated like :class:`pyalgotrade.stratanalyzer.sharpe.SharpeRatio` does.
+        If the volatility is 0, 0 is returned.
+
+        :param riskFreeRate: The risk free rate per annum.
+        :type riskFreeRate: int/float.
+        :param annualized: True if the sharpe ratio should be annualized.
+        :type annualized: boolean.
+        :param useDailyReturns: True if daily returns should be used instead of the returns for each bar.
+        :type useDailyReturns: boolean.
+        """
+        ret = 0.0
+        if len(self.__equity):
+            if useDailyReturns:
+                ret = sharpe.sharpe_ratio(self.getDailyReturns(), riskFreeRate, 252, annualized)
+            else:
+                ret = sharpe.sharpe_ratio_2(self.getReturns(), riskFreeRate, _to_datetime(self.__timestamps[0]), _to_datetime(self.__timestamps[-1]), annualized)
+        return ret
+
+    def getSortinoRatio(self, riskFreeRate, annualized=True):
+        """Returns the Sortino ratio using daily returns. If there is no downside deviation, 0 is returned.
+
+        :param riskFreeRate: The risk free rate per annum.
+        :type riskFreeRate: int/float.
+        :param annualized: True if the sortino ratio should be annualized.
+        :type annualized: boolean.
+        """
+        ret = 0.0
+        excessReturns = self.getDailyReturns() - riskFreeRate / 252.0
+        if len(excessReturns):
+            downsideDeviation = math.sqrt(np.mean(np.minimum(excessReturns, 0) ** 2))
+            if downsideDeviation != 0:
+                ret = excessReturns.mean() / downsideDeviation
+                if annualized:
+                    ret = ret * math.sqrt(252)
+        return ret
+
+    def getDrawDowns(self):
+        """Returns a NumPy array with the drawdown for each bar. 0.1 means that the portfolio value is 10% below
+        its previous high."""
+        equity = self.getEquity()
+        return 1 - equity / np.maximum.accumulate(equity)
+
+    def getMaxDrawDown(self):
+        """Returns the max. (deepest) drawdown, like :class:`pyalgotrade.stratanalyzer.drawdown.DrawDown` does."""
+        ret = 0
+        if len(self.__equity):
+            ret = self.getDrawDowns().max()
+        return ret
+
+    def getLongestDrawDownDuration(self):
+        """Returns the duration of the longest drawdown, like :class:`pyalgotrade.stratanalyzer.drawdown.DrawDown`
+        does.
+
+        :rtype: :class:`datetime.timedelta`.
+        """
+        ret = datetime.timedelta()
+        if len(self.__equity):
+            equity = self.getEquity()
+            timestamps = np.array(self.__timestamps, dtype=float)
+            # The position of the last high for each bar.
+            isHigh = equity >= np.maximum.accumulate(equity)
+            lastHigh = np.maximum.accumulate(np.where(isHigh, np.arange(len(equity)), 0))
+            ret = datetime.timedelta(seconds=(timestamps - timestamps[lastHigh]).max())
+        return ret
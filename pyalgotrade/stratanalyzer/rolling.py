@@ -0,0 +1,165 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import stratanalyzer
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade import dataseries
+
+import collections
+import math
+
+
+# Keeps the max. value in a sliding window in O(1) amortized per value.
+class WindowMax(object):
+    def __init__(self, windowSize):
+        self.__windowSize = windowSize
+        # (position, value) tuples with decreasing values.
+        self.__candidates = collections.deque()
+        self.__position = 0
+
+    def append(self, value):
+        while len(self.__candidates) and self.__candidates[-1][1] <= value:
+            self.__candidates.pop()
+        self.__candidates.append((self.__position, value))
+        if self.__candidates[0][0] <= self.__position - self.__windowSize:
+            self.__candidates.popleft()
+        self.__position += 1
+
+    def getMax(self):
+        return self.__candidates[0][1]
+
+
+class RollingMetrics(stratanalyzer.StrategyAnalyzer):
+    """A :class:`pyalgotrade.stratanalyzer.StrategyAnalyzer` that calculates performance metrics over a rolling
+    window of bars. Metrics are updated in O(1) for each bar.
+
+    :param windowSize: The number of bars in the window. Must be > 1.
+    :type windowSize: int.
+    :param riskFreeRate: The risk free rate per annum, used for the Sharpe ratio.
+    :type riskFreeRate: int/float.
+    :param tradingPeriods: The number of bars per annum, used to annualize the Sharpe ratio and the volatility.
+    :type tradingPeriods: int.
+    :param maxLen: The maximum number of values to hold in each dataseries.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
+    :type maxLen: int.
+
+    .. note::
+        * If using daily bars, tradingPeriods should be set to 252.
+        * Values are None until the window is full.
+    """
+
+    def __init__(self, windowSize, riskFreeRate=0, tradingPeriods=252, maxLen=dataseries.DEFAULT_MAX_LEN):
+        assert(windowSize > 1)
+        self.__windowSize = windowSize
+        self.__rfPerReturn = riskFreeRate / float(tradingPeriods)
+        self.__annualizationFactor = math.sqrt(tradingPeriods)
+        self.__returns = collections.deque()
+        self.__sum = 0.0
+        self.__sumSquares = 0.0
+        self.__hits = 0
+        # The number of consecutive bars with the same return, to detect windows with no volatility exactly.
+        self.__sameCount = 0
+        # The number of updates since the sums were recalculated.
+        self.__updates = 0
+        self.__maxEquity = WindowMax(windowSize)
+        self.__sharpe = dataseries.SequenceDataSeries(maxLen)
+        self.__volatility = dataseries.SequenceDataSeries(maxLen)
+        self.__drawDown = dataseries.SequenceDataSeries(maxLen)
+        self.__hitRate = dataseries.SequenceDataSeries(maxLen)
+
+    def beforeAttach(self, strat):
+        # Get or create a shared ReturnsAnalyzerBase
+        analyzer = returns.ReturnsAnalyzerBase.getOrCreateShared(strat)
+        analyzer.getEvent().subscribe(self.__onReturns)
+
+    def __onReturns(self, dateTime, returnsAnalyzerBase):
+        netReturn = returnsAnalyzerBase.getNetReturn()
+        # The cumulative return is used as the equity so the drawdown is relative to the window's high.
+        equity = 1 + returnsAnalyzerBase.getCumulativeReturn()
+
+        if len(self.__returns) and self.__returns[-1] == netReturn:
+            self.__sameCount += 1
+        else:
+            self.__sameCount = 1
+
+        # Update the running sums.
+        self.__returns.append(netReturn)
+        self.__sum += netReturn
+        self.__sumSquares += netReturn * netReturn
+        if netReturn > 0:
+            self.__hits += 1
+        if len(self.__returns) > self.__windowSize:
+            oldReturn = self.__returns.popleft()
+            self.__sum -= oldReturn
+            self.__sumSquares -= oldReturn * oldReturn
+            if oldReturn > 0:
+                self.__hits -= 1
+        self.__maxEquity.append(equity)
+
+        # Recalculate the sums once every window to keep rounding errors from adding up. This is O(1) amortized.
+        self.__updates += 1
+        if self.__updates == self.__windowSize:
+            self.__updates = 0
+            self.__sum = math.fsum(self.__returns)
+            self.__sumSquares = math.fsum(value * value for value in self.__returns)
+
+        sharpe = None
+        volatility = None
+        drawDown = None
+        hitRate = None
+        if len(self.__returns) == self.__windowSize:
+            n = self.__windowSize
+            if self.__sameCount >= n:
+                mean = netReturn
+                variance = 0
+            else:
+                mean = self.__sum / n
+                # Avoid negative variances due to rounding errors.
+                variance = max(self.__sumSquares - n * mean * mean, 0) / (n - 1)
+            stdDev = math.sqrt(variance)
+            volatility = stdDev * self.__annualizationFactor
+            sharpe = 0.0
+            if stdDev != 0:
+                sharpe = (mean - self.__rfPerReturn) / stdDev * self.__annualizationFactor
+            drawDown = 1 - equity / self.__maxEquity.getMax()
+            hitRate = self.__hits / float(n)
+
+        self.__sharpe.appendWithDateTime(dateTime, sharpe)
+        self.__volatility.appendWithDateTime(dateTime, volatility)
+        self.__drawDown.appendWithDateTime(dateTime, drawDown)
+        self.__hitRate.appendWithDateTime(dateTime, hitRate)
+
+    def getSharpeRatio(self):
+        """Returns a :class:`pyalgotrade.dataseries.SequenceDataSeries` with the annualized Sharpe ratio for each bar."""
+        return self.__sharpe
+
+    def getVolatility(self):
+        """Returns a :class:`pyalgotrade.dataseries.SequenceDataSeries` with the annualized volatility for each bar."""
+        return self.__volatility
+
+    def getDrawDown(self):
+        """Returns a :class:`pyalgotrade.dataseries.SequenceDataSeries` with the drawdown from the window's high for each bar.
+        0.1 means that the portfolio value is 10% below the window's high."""
+        return self.__drawDown
+
+    def getHitRate(self):
+        """Returns a :class:`pyalgotrade.dataseries.SequenceDataSeries` with the proportion of bars in the window
+        that had a positive return."""
+        return self.__hitRate
@@ -21,14 +21,66 @@
 from pyalgotrade import stratanalyzer
 from pyalgotrade import broker
 from pyalgotrade.stratanalyzer import returns
+from pyalgotrade.utils import stats
 
 import numpy as np
 
 
+class TradeValues(object):
+    """The values recorded by :class:`Trades` for a category of trades, like the profits or the commissions.
+
+    :param keepValues: True to keep every value, False to only keep running stats.
+    :type keepValues: boolean.
+    :param compression: The compression for the quantile sketch used to estimate quantiles.
+    :type compression: int.
+    """
+
+    def __init__(self, keepValues=True, compression=100):
+        self.__compression = compression
+        self.__values = None
+        self.__stats = None
+        if keepValues:
+            # Running stats are built from the values when requested.
+            self.__values = []
+        else:
+            self.__stats = stats.RunningStats(compression)
+
+    def add(self, value):
+        if self.__values is not None:
+            self.__values.append(value)
+            self.__stats = None
+        else:
+            self.__stats.add(value)
+
+    def getCount(self):
+        if self.__values is not None:
+            return len(self.__values)
+        return self.__stats.getCount()
+
+    def getValues(self):
+        if self.__values is None:
+            raise Exception("Values are not kept in streaming mode. Use the running stats instead.")
+        return np.array(self.__values)
+
+    def getStats(self):
+        if self.__stats is None:
+            self.__stats = stats.RunningStats(self.__compression)
+            for value in self.__values:
+                self.__stats.add(value)
+        return self.__stats
+
+
 class Trades(stratanalyzer.StrategyAnalyzer):
     """A :class:`pyalgotrade.stratanalyzer.StrategyAnalyzer` that records the profit/loss
     and returns of every completed trade.
 
+    :param streaming: True to only keep running stats instead of the values for every trade. Memory usage
+        doesn't grow with the number of trades, but the methods that return numpy.arrays raise an exception.
+        Use the methods that return :class:`pyalgotrade.utils.stats.RunningStats` instead.
+    :type streaming: boolean.
+    :param compression: The compression for the quantile sketches. Check :class:`pyalgotrade.utils.stats.QuantileSketch`.
+    :type compression: int.
+
     .. note::
         This analyzer operates on individual completed trades.
         For example, lets say you start with a $1000 cash, and then you buy 1 share of XYZ
@@ -36,20 +88,24 @@ class Trades(stratanalyzer.StrategyAnalyzer):
 
             * The trade's profit was $10.
             * The trade's return is 100%, even though your whole portfolio went from $1000 to $1020, a 2% return.
+
+    .. note::
+        Running stats can be merged, for example to combine the results for different periods
+        or from different optimizer workers. Check :meth:`pyalgotrade.utils.stats.RunningStats.merge`.
     """
 
-    def __init__(self):
-        self.__all = []
-        self.__profits = []
-        self.__losses = []
-        self.__allReturns = []
-        self.__positiveReturns = []
-        self.__negativeReturns = []
-        self.__allCommissions = []
-        self.__profitableCommissions = []
-        self.__unprofitableCommissions = []
-        self.__evenCommissions = []
-        self.__evenTrades = 0
+    def __init__(self, streaming=False, compression=100):
+        keepValues = not streaming
+        self.__all = TradeValues(keepValues, compression)
+        self.__profits = TradeValues(keepValues, compression)
+        self.__losses = TradeValues(keepValues, compression)
+        self.__allReturns = TradeValues(keepValues, compression)
+        self.__positiveReturns = TradeValues(keepValues, compression)
+        self.__negativeReturns = TradeValues(keepValues, compression)
+        self.__allCommissions = TradeValues(keepValues, compression)
+        self.__profitableCommissions = TradeValues(keepValues, compression)
+        self.__unprofitableCommissions = TradeValues(keepValues, compression)
+        self.__evenCommissions = TradeValues(keepValues, compression)
         self.__posTrackers = {}
 
     def __updateTrades(self, posTracker):
@@ -59,20 +115,19 @@ class Trades(stratanalyzer.StrategyAnalyzer):
         netReturn = posTracker.getReturn(price)
 
         if netProfit > 0:
-            self.__profits.append(netProfit)
-            self.__positiveReturns.append(netReturn)
-            self.__profitableCommissions.append(posTracker.getCommissions())
+            self.__profits.add(netProfit)
+            self.__positiveReturns.add(netReturn)
+            self.__profitableCommissions.add(posTracker.getCommissions())
         elif netProfit < 0:
-            self.__losses.append(netProfit)
-            self.__negativeReturns.append(netReturn)
-            self.__unprofitableCommissions.append(posTracker.getCommissions())
+            self.__losses.add(netProfit)
+            self.__negativeReturns.add(netReturn)
+            self.__unprofitableCommissions.add(posTracker.getCommissions())
         else:
-            self.__evenTrades += 1
-            self.__evenCommissions.append(posTracker.getCommissions())
+            self.__evenCommissions.add(posTracker.getCommissions())
 
-        self.__all.append(netProfit)
-        self.__allReturns.append(netReturn)
-        self.__allCommissions.append(posTracker.getCommissions())
+        self.__all.add(netProfit)
+        self.__allReturns.add(netReturn)
+        self.__allCommissions.add(posTracker.getCommissions())
 
         posTracker.update(price)
 
@@ -149,56 +204,96 @@ class Trades(stratanalyzer.StrategyAnalyzer):
 
     def getCount(self):
         """Returns the total number of trades."""
-        return len(self.__all)
+        return self.__all.getCount()
 
     def getProfitableCount(self):
         """Returns the number of profitable trades."""
-        return len(self.__profits)
+        return self.__profits.getCount()
 
     def getUnprofitableCount(self):
         """Returns the number of unprofitable trades."""
-        return len(self.__losses)
+        return self.__losses.getCount()
 
     def getEvenCount(self):
         """Returns the number of trades whose net profit was 0."""
-        return self.__evenTrades
+        return self.__evenCommissions.getCount()
 
     def getAll(self):
         """Returns a numpy.array with the profits/losses for each trade."""
-        return np.array(self.__all)
+        return self.__all.getValues()
 
     def getProfits(self):
         """Returns a numpy.array with the profits for each profitable trade."""
-        return np.array(self.__profits)
+        return self.__profits.getValues()
 
     def getLosses(self):
         """Returns a numpy.array with the losses for each unprofitable trade."""
-        return np.array(self.__losses)
+        return self.__losses.getValues()
 
     def getAllReturns(self):
         """Returns a numpy.array with the returns for each trade."""
-        return np.array(self.__allReturns)
+        return self.__allReturns.getValues()
 
     def getPositiveReturns(self):
         """Returns a numpy.array with the positive returns for each trade."""
-        return np.array(self.__positiveReturns)
+        return self.__positiveReturns.getValues()
 
     def getNegativeReturns(self):
         """Returns a numpy.array with the negative returns for each trade."""
-        return np.array(self.__negativeReturns)
+        return self.__negativeReturns.getValues()
 
     def getCommissionsForAllTrades(self):
         """Returns a numpy.array with the commissions for each trade."""
-        return np.array(self.__allCommissions)
+        return self.__allCommissions.getValues()
 
     def getCommissionsForProfitableTrades(self):
         """Returns a numpy.array with the commissions for each profitable trade."""
-        return np.array(self.__profitableCommissions)
+        return self.__profitableCommissions.getValues()
 
     def getCommissionsForUnprofitableTrades(self):
         """Returns a numpy.array with the commissions for each unprofitable trade."""
-        return np.array(self.__unprofitableCommissions)
+        return self.__unprofitableCommissions.getValues()
 
     def getCommissionsForEvenTrades(self):
         """Returns a numpy.array with the commissions for each trade whose net profit was 0."""
-        return np.array(self.__evenCommissions)
+        return self.__evenCommissions.getValues()
+
+    def getAllStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the profits/losses for each trade."""
+        return self.__all.getStats()
+
+    def getProfitsStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the profits for each profitable trade."""
+        return self.__profits.getStats()
+
+    def getLossesStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the losses for each unprofitable trade."""
+        return self.__losses.getStats()
+
+    def getAllReturnsStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the returns for each trade."""
+        return self.__allReturns.getStats()
+
+    def getPositiveReturnsStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the positive returns for each trade."""
+        return self.__positiveReturns.getStats()
+
+    def getNegativeReturnsStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the negative returns for each trade."""
+        return self.__negativeReturns.getStats()
+
+    def getCommissionsForAllTradesStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the commissions for each trade."""
+        return self.__allCommissions.getStats()
+
+    def getCommissionsForProfitableTradesStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the commissions for each profitable trade."""
+        return self.__profitableCommissions.getStats()
+
+    def getCommissionsForUnprofitableTradesStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the commissions for each unprofitable trade."""
+        return self.__unprofitableCommissions.getStats()
+
+    def getCommissionsForEvenTradesStats(self):
+        """Returns a :class:`pyalgotrade.utils.stats.RunningStats` with the commissions for each trade whose net profit was 0."""
+        return self.__evenCommissions.getStats()
@@ -21,10 +21,18 @@
 import pyalgotrade.broker
 from pyalgotrade.broker import backtesting
 from pyalgotrade import observer
+from pyalgotrade import stratanalyzer
 import pyalgotrade.strategy.position
 from pyalgotrade import warninghelpers
 
 
+# Returns False only if the analyzer's beforeOnBars is StrategyAnalyzer's no-op. Anything else, including wrapped
+# or decorated methods and callables set on the instance, is assumed to need the bars.
+def _needs_bars(strategyAnalyzer):
+    beforeOnBars = getattr(strategyAnalyzer, "beforeOnBars", None)
+    return getattr(beforeOnBars, "im_func", None) is not stratanalyzer.StrategyAnalyzer.beforeOnBars.im_func
+
+
 class BaseStrategy(object):
     """Base class for strategies.
 
@@ -44,6 +52,8 @@ class BaseStrategy(object):
         self.__orderToPosition = {}
         self.__barsProcessedEvent = observer.Event()
         self.__analyzers = []
+        # The analyzers whose beforeOnBars needs to be called, built when analyzers are attached.
+        self.__barAnalyzers = []
         self.__namedAnalyzers = {}
         self.__dispatcher = observer.Dispatcher()
         self.__broker.getOrderUpdatedEvent().subscribe(self.__onOrderEvent)
@@ -85,10 +95,6 @@ class BaseStrategy(object):
         if not position.isOpen():
             self.__activePositions.remove(position)
 
-    def __notifyAnalyzers(self, lambdaExpression):
-        for s in self.__analyzers:
-            lambdaExpression(s)
-
     def attachAnalyzerEx(self, strategyAnalyzer, name=None):
         if strategyAnalyzer not in self.__analyzers:
             if name is not None:
@@ -98,6 +104,8 @@ class BaseStrategy(object):
 
             strategyAnalyzer.beforeAttach(self)
             self.__analyzers.append(strategyAnalyzer)
+            if _needs_bars(strategyAnalyzer):
+                self.__barAnalyzers.append(strategyAnalyzer)
             strategyAnalyzer.attached(self)
 
     def getLastPrice(self, instrument):
@@ -159,6 +167,71 @@ class BaseStrategy(object):
             self.getBroker().placeOrder(ret)
         return ret
 
+    def orderBasket(self, quantities, onClose=False, goodTillCanceled=False, allOrNone=False):
+        """Places a basket of market orders in a single call.
+
+        :param quantities: A dictionary that maps instruments to the amount of shares. Positive means buy, negative means sell.
+        :type quantities: dict.
+        :param onClose: True if the orders should be filled as close to the closing price as possible (Market-On-Close order). Default is False.
+        :type onClose: boolean.
+        :param goodTillCanceled: True if the orders are good till canceled. If False then the orders get automatically canceled when the session closes.
+        :type goodTillCanceled: boolean.
+        :param allOrNone: True if the orders should be completely filled or not at all.
+        :type allOrNone: boolean.
+        :rtype: A list with the :class:`pyalgotrade.broker.MarketOrder` submitted.
+
+        .. note::
+            Sell orders are created first, so the backtesting broker processes them before buy orders.
+        """
+        sells = []
+        buys = []
+        for instrument in sorted(quantities.keys()):
+            quantity = quantities[instrument]
+            if quantity > 0:
+                buys.append(self.getBroker().createMarketOrder(pyalgotrade.broker.Order.Action.BUY, instrument, quantity, onClose))
+            elif quantity < 0:
+                sells.append(self.getBroker().createMarketOrder(pyalgotrade.broker.Order.Action.SELL, instrument, abs(quantity), onClose))
+
+        ret = sells + buys
+        for order in ret:
+            order.setGoodTillCanceled(goodTillCanceled)
+            order.setAllOrNone(allOrNone)
+        if len(ret):
+            self.getBroker().placeOrders(ret)
+        return ret
+
+    def orderTargetWeights(self, weights, onClose=False, goodTillCanceled=False, allOrNone=False):
+        """Places the market orders needed to rebalance the portfolio to the given weights.
+
+        :param weights: A dictionary that maps instruments to the proportion of the portfolio value to hold. Negative means short.
+        :type weights: dict.
+        :param onClose: True if the orders should be filled as close to the closing price as possible (Market-On-Close order). Default is False.
+        :type onClose: boolean.
+        :param goodTillCanceled: True if the orders are good till canceled. If False then the orders get automatically canceled when the session closes.
+        :type goodTillCanceled: boolean.
+        :param allOrNone: True if the orders should be completely filled or not at all.
+        :type allOrNone: boolean.
+        :rtype: A list with the :class:`pyalgotrade.broker.MarketOrder` submitted.
+
+        .. note::
+            * The number of shares is calculated using the portfolio value and the last price for each instrument,
+              and rounded towards zero unless the broker allows fractions.
+            * Instruments not included in weights are left untouched. Use a weight of 0 to close a position.
+            * Active orders are not taken into account.
+        """
+        equity = self.getBroker().getEquity()
+        allowFractions = self.getBroker().getAllowFractions()
+        quantities = {}
+        for instrument, weight in weights.iteritems():
+            price = self.getLastPrice(instrument)
+            if price is None:
+                raise Exception("There is no price available for %s" % (instrument))
+            targetShares = equity * weight / float(price)
+            if not allowFractions:
+                targetShares = int(targetShares)
+            quantities[instrument] = targetShares - self.getBroker().getShares(instrument)
+        return self.orderBasket(quantities, onClose, goodTillCanceled, allOrNone)
+
     def enterLong(self, instrument, quantity, goodTillCanceled=False):
         """Generates a buy :class:`pyalgotrade.broker.MarketOrder` to enter a long position.
 
@@ -359,7 +432,8 @@ class BaseStrategy(object):
         # THE ORDER HERE IS VERY IMPORTANT
 
         # 1: Let analyzers process bars.
-        self.__notifyAnalyzers(lambda s: s.beforeOnBars(self, bars))
+        for strategyAnalyzer in self.__barAnalyzers:
+            strategyAnalyzer.beforeOnBars(self, bars)
 
         # 2: Let the strategy process current bars and place orders.
         self.onBars(bars)
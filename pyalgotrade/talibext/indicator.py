@@ -21,16 +21,23 @@
 import talib
 import numpy
 
+from pyalgotrade import technical
+from pyalgotrade import dataseries
+from pyalgotrade.utils import collections
+
 
 # Returns the last values of a dataseries as a numpy.array, or None if not enough values could be retrieved from the dataseries.
 def value_ds_to_numpy(ds, count):
     ret = None
     try:
         values = ds[count*-1:]
-        ret = numpy.array([float(value) for value in values])
+        # numpy would convert None to NaN.
+        if None not in values:
+            # Convert all the values in a single call instead of calling float() for each one.
+            ret = numpy.array(values, dtype=float)
     except IndexError:
         pass
-    except TypeError:  # In case we try to convert None to float.
+    except (TypeError, ValueError):  # In case we try to convert something that is not a number.
         pass
     return ret
 
@@ -137,6 +144,169 @@ def call_talib_with_hl(barDs, count, talibFunc, *args, **kwargs):
     return talibFunc(high, low, *args, **kwargs)
 
 
+class TALibEventWindow(technical.EventWindow):
+    """An :class:`pyalgotrade.technical.EventWindow` that calls a TA-Lib function with the values in the window and
+    keeps the last value returned.
+
+    :param windowSize: The number of values to pass to the TA-Lib function.
+    :type windowSize: int.
+    :param talibFunc: The TA-Lib function, like talib.SMA.
+    :param inputs: None if the values are numbers, or the bar values to use as inputs, like "hlc" for the high, low and
+        close values. Valid letters are "o", "h", "l", "c" and "v".
+    :type inputs: string.
+    :param outputIndex: The output to use if the TA-Lib function returns more than one, like talib.MACD.
+    :type outputIndex: int.
+    """
+
+    def __init__(self, windowSize, talibFunc, inputs=None, outputIndex=None, *args, **kwargs):
+        technical.EventWindow.__init__(self, windowSize, dtype=float)
+        self.__talibFunc = talibFunc
+        self.__outputIndex = outputIndex
+        self.__args = args
+        self.__kwargs = kwargs
+        self.__barInputs = None
+        if inputs is not None:
+            self.__barInputs = [(getter, collections.NumPyDeque(windowSize)) for getter in bar_value_getters(inputs)]
+
+    def onNewValue(self, dateTime, value):
+        if self.__barInputs is None:
+            technical.EventWindow.onNewValue(self, dateTime, value)
+        elif value is not None:
+            for getter, values in self.__barInputs:
+                values.append(getter(value))
+
+    def windowFull(self):
+        if self.__barInputs is None:
+            return technical.EventWindow.windowFull(self)
+        return len(self.__barInputs[0][1]) == self.getWindowSize()
+
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            # The windows are backed by numpy.arrays so no values are copied.
+            if self.__barInputs is None:
+                inputs = [self.getValues()]
+            else:
+                inputs = [values.data() for getter, values in self.__barInputs]
+            args = inputs + list(self.__args)
+            output = self.__talibFunc(*args, **self.__kwargs)
+            if self.__outputIndex is not None:
+                output = output[self.__outputIndex]
+            ret = output[-1]
+            if numpy.isnan(ret):
+                ret = None
+        return ret
+
+
+class TALibFilter(technical.EventBasedFilter):
+    """Turns a TA-Lib function into a filter that calculates a new value every time the dataseries gets a new value.
+    Only the last windowSize values are passed to the TA-Lib function, and they are kept in numpy.arrays so
+    there is no need to build them from the dataseries for every value.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param windowSize: The number of values to pass to the TA-Lib function. Must be large enough for the TA-Lib
+        function to return a value, and large enough for the unstable period of functions like talib.EMA.
+    :type windowSize: int.
+    :param talibFunc: The TA-Lib function, like talib.SMA.
+    :param inputs: None if dataSeries holds numbers, or the bar values to use as inputs if it is a
+        :class:`pyalgotrade.dataseries.bards.BarDataSeries`, like "hlc" for the high, low and close values.
+        Valid letters are "o", "h", "l", "c" and "v".
+    :type inputs: string.
+    :param outputIndex: The output to use if the TA-Lib function returns more than one, like talib.MACD.
+    :type outputIndex: int.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
+    :type maxLen: int.
+
+    Additional positional and keyword arguments are passed to the TA-Lib function. For example: ::
+
+        sma = TALibFilter(closeDs, 20, talib.SMA, timeperiod=20)
+        slowk = TALibFilter(barDs, 20, talib.STOCH, "hlc", 0, fastk_period=14)
+    """
+
+    def __init__(self, dataSeries, windowSize, talibFunc, inputs=None, outputIndex=None, *args, **kwargs):
+        maxLen = kwargs.pop("maxLen", dataseries.DEFAULT_MAX_LEN)
+        technical.EventBasedFilter.__init__(self, dataSeries, TALibEventWindow(windowSize, talibFunc, inputs, outputIndex, *args, **kwargs), maxLen)
+
+
+class TALibPrecomputed(dataseries.SequenceDataSeries):
+    """A :class:`pyalgotrade.dataseries.SequenceDataSeries` that calls a TA-Lib function only once, with all the bars
+    loaded in a :class:`pyalgotrade.barfeed.membf.BarFeed` for an instrument, instead of once for every bar.
+
+    Values are revealed in step with the feed: the value for a bar is appended when that bar is dispatched, so values
+    for bars that were not dispatched yet can't be accessed. TA-Lib functions only use past and current values
+    to calculate each output, so the values are the same that would be calculated bar by bar.
+
+    :param barFeed: The bar feed. Bars must be loaded before building this dataseries.
+    :type barFeed: :class:`pyalgotrade.barfeed.membf.BarFeed`.
+    :param instrument: Instrument identifier.
+    :type instrument: string.
+    :param talibFunc: The TA-Lib function, like talib.SMA.
+    :param inputs: The bar values to use as inputs, like "hlc" for the high, low and close values.
+        Valid letters are "o", "h", "l", "c" and "v".
+    :type inputs: string.
+    :param outputIndex: The output to use if the TA-Lib function returns more than one, like talib.MACD.
+    :type outputIndex: int.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
+    :type maxLen: int.
+
+    Additional positional and keyword arguments are passed to the TA-Lib function. For example: ::
+
+        sma = TALibPrecomputed(feed, "orcl", talib.SMA, "c", None, timeperiod=20)
+    """
+
+    def __init__(self, barFeed, instrument, talibFunc, inputs="c", outputIndex=None, *args, **kwargs):
+        maxLen = kwargs.pop("maxLen", dataseries.DEFAULT_MAX_LEN)
+        dataseries.SequenceDataSeries.__init__(self, maxLen)
+        bars = barFeed.getAllBars(instrument)
+        columns = [numpy.array([getter(bar) for bar in bars], dtype=float) for getter in bar_value_getters(inputs)]
+        output = talibFunc(*(columns + list(args)), **kwargs)
+        if outputIndex is not None:
+            output = output[outputIndex]
+        self.__output = output
+        self.__dateTimes = [bar.getDateTime() for bar in bars]
+        self.__nextPos = 0
+        barFeed[instrument].getNewValueEvent().subscribe(self.__onNewBar)
+
+    def __onNewBar(self, dataSeries, dateTime, value):
+        pos = self.__nextPos
+        if pos >= len(self.__dateTimes) or self.__dateTimes[pos] != dateTime:
+            raise Exception("The bar for %s was not loaded when the values were calculated" % (dateTime))
+        self.__nextPos += 1
+        ret = self.__output[pos]
+        if numpy.isnan(ret):
+            ret = None
+        self.appendWithDateTime(dateTime, ret)
+
+
+# Returns the functions to get the bar values for inputs like "hlc".
+def bar_value_getters(inputs):
+    getters = {"o": bar_open, "h": bar_high, "l": bar_low, "c": bar_close, "v": bar_volume}
+    return [getters[letter] for letter in inputs]
+
+
+def bar_open(bar):
+    return bar.getOpen()
+
+
+def bar_high(bar):
+    return bar.getHigh()
+
+
+def bar_low(bar):
+    return bar.getLow()
+
+
+def bar_close(bar):
+    return bar.getClose()
+
+
+def bar_volume(bar):
+    return bar.getVolume()
+
+
 ######################################################################
 ## talib wrappers
 
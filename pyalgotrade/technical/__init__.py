@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
 
@@ -39,16 +41,22 @@ class EventWindow(object):
     def __init__(self, windowSize, dtype=float, skipNone=True):
         assert(windowSize > 0)
         assert(isinstance(windowSize, int))
-        self.__values = collections.NumPyDeque(windowSize, dtype)
+        # Allocated on the first value, so subclasses that keep the values elsewhere don't allocate the window.
+        self.__values = None
+        self.__dtype = dtype
         self.__windowSize = windowSize
         self.__skipNone = skipNone
 
     def onNewValue(self, dateTime, value):
         if value is not None or not self.__skipNone:
+            if self.__values is None:
+                self.__values = collections.NumPyDeque(self.__windowSize, self.__dtype)
             self.__values.append(value)
 
     def getValues(self):
         """Returns a numpy.array with the values in the window."""
+        if self.__values is None:
+            return np.empty(0, dtype=self.__dtype)
         return self.__values.data()
 
     def getWindowSize(self):
@@ -56,7 +64,7 @@ class EventWindow(object):
         return self.__windowSize
 
     def windowFull(self):
-        return len(self.__values) == self.__windowSize
+        return self.__values is not None and len(self.__values) == self.__windowSize
 
     def getValue(self):
         """Override to calculate a value using the values in the window."""
@@ -20,7 +20,6 @@
 
 from pyalgotrade import dataseries
 from pyalgotrade.technical import ma
-from pyalgotrade.technical import stats
 
 
 class BollingerBands(object):
@@ -38,25 +37,26 @@ class BollingerBands(object):
     """
 
     def __init__(self, dataSeries, period, numStdDev, maxLen=dataseries.DEFAULT_MAX_LEN):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        # The SMA and the standard deviation are calculated from a single window in a single handler.
+        self.__smaWindow = ma.SMAEventWindow(period)
+        self.__sma = dataseries.SequenceDataSeries(maxLen)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def __onNewValue(self, dataSeries, dateTime, value):
         upperValue = None
         lowerValue = None
 
-        if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+        self.__smaWindow.onNewValue(dateTime, value)
+        sma = self.__smaWindow.getValue()
+        if value is not None and sma is not None:
+            stdDev = self.__smaWindow.getValues().std()
+            upperValue = sma + stdDev * self.__numStdDev
+            lowerValue = sma + stdDev * self.__numStdDev * -1
 
+        self.__sma.appendWithDateTime(dateTime, sma)
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
 
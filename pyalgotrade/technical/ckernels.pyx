@@ -0,0 +1,291 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compiled implementation of the kernels in pyalgotrade/technical/pykernels.py. Both must return the same values.
+# This gets built by setup.py if Cython is available.
+
+import numpy as np
+
+from libc.stdlib cimport malloc, free
+from libc.math cimport fabs
+
+
+# A fixed size ring buffer of doubles.
+cdef class RingBuffer:
+    cdef double* values
+    cdef int size
+    cdef int count
+    cdef int nextPos
+
+    def __cinit__(self, int size):
+        self.values = <double*>malloc(size * sizeof(double))
+        if self.values == NULL:
+            raise MemoryError()
+        self.size = size
+        self.count = 0
+        self.nextPos = 0
+
+    def __dealloc__(self):
+        free(self.values)
+
+    # Appends a value and returns the one that was discarded, if the buffer was full.
+    cdef double append(self, double value):
+        cdef double ret = self.values[self.nextPos]
+        self.values[self.nextPos] = value
+        self.nextPos = (self.nextPos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        return ret
+
+    # Returns the oldest value.
+    cdef double first(self):
+        if self.count < self.size:
+            return self.values[0]
+        return self.values[self.nextPos]
+
+    cdef list toList(self):
+        return [self.values[(self.nextPos - self.count + i + self.size) % self.size] for i in range(self.count)]
+
+
+cdef class SMA:
+    cdef int period
+    cdef RingBuffer values
+    cdef double value
+    cdef bint hasValue
+
+    def __init__(self, int period):
+        assert(period > 0)
+        self.period = period
+        self.values = RingBuffer(period)
+        self.hasValue = False
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        cdef double firstValue
+        if self.hasValue:
+            firstValue = self.values.append(v)
+            self.value = self.value + v / self.period - firstValue / self.period
+        else:
+            self.values.append(v)
+            if self.values.count == self.period:
+                # Use NumPy for the first value to get the same result as technical.EventWindow.getValues().mean().
+                self.value = np.array(self.values.toList()).mean()
+                self.hasValue = True
+
+    def getValue(self):
+        if self.hasValue:
+            return self.value
+        return None
+
+    def getValues(self):
+        return np.array(self.values.toList())
+
+    def windowFull(self):
+        return self.values.count == self.period
+
+
+cdef class EMA:
+    cdef int period
+    cdef double multiplier
+    cdef list firstValues
+    cdef double value
+    cdef bint hasValue
+
+    def __init__(self, int period):
+        assert(period > 1)
+        self.period = period
+        self.multiplier = (2.0 / (period + 1))
+        self.firstValues = []
+        self.hasValue = False
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        if self.hasValue:
+            self.value = (v - self.value) * self.multiplier + self.value
+        else:
+            self.firstValues.append(v)
+            if len(self.firstValues) == self.period:
+                self.value = np.array(self.firstValues).mean()
+                self.hasValue = True
+                self.firstValues = None
+
+    def getValue(self):
+        if self.hasValue:
+            return self.value
+        return None
+
+
+cdef class RSI:
+    cdef int period
+    cdef int count
+    cdef double prevValue
+    cdef double avgGain
+    cdef double avgLoss
+    cdef double value
+
+    def __init__(self, int period):
+        assert(period > 1)
+        self.period = period
+        self.count = 0
+        self.avgGain = 0
+        self.avgLoss = 0
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        cdef double change = 0
+        cdef double rs
+        if self.count > 0:
+            change = v - self.prevValue
+        self.prevValue = v
+        self.count += 1
+
+        # We need N + 1 samples to calculate N averages because they are calculated based on the diff with previous values.
+        if self.count <= self.period + 1:
+            # Accumulate the gains and losses in the same order as the pure Python version.
+            if self.count > 1:
+                if change < 0:
+                    self.avgLoss += fabs(change)
+                else:
+                    self.avgGain += change
+            if self.count < self.period + 1:
+                return
+            self.avgGain = self.avgGain / self.period
+            self.avgLoss = self.avgLoss / self.period
+        else:
+            # Rest of averages are smoothed
+            if change < 0:
+                self.avgGain = (self.avgGain * (self.period-1)) / self.period
+                self.avgLoss = (self.avgLoss * (self.period-1) + fabs(change)) / self.period
+            else:
+                self.avgGain = (self.avgGain * (self.period-1) + change) / self.period
+                self.avgLoss = (self.avgLoss * (self.period-1)) / self.period
+
+        if self.avgLoss == 0:
+            self.value = 100
+        else:
+            rs = self.avgGain / self.avgLoss
+            self.value = 100 - 100 / (1 + rs)
+
+    def getValue(self):
+        if self.count > self.period:
+            return self.value
+        return None
+
+
+cdef class ROC:
+    cdef int valuesAgo
+    cdef RingBuffer values
+    cdef object value
+
+    def __init__(self, int valuesAgo):
+        assert(valuesAgo > 0)
+        self.valuesAgo = valuesAgo
+        self.values = RingBuffer(valuesAgo + 1)
+        self.value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        cdef double prev
+        cdef double diff
+        self.values.append(v)
+        if self.values.count == self.valuesAgo + 1:
+            prev = self.values.first()
+            diff = v - prev
+            if diff == 0:
+                self.value = 0.0
+            elif prev != 0:
+                self.value = diff / prev
+            else:
+                self.value = None
+
+    def getValue(self):
+        return self.value
+
+    def getValues(self):
+        return np.array(self.values.toList())
+
+    def windowFull(self):
+        return self.values.count == self.valuesAgo + 1
+
+
+cdef class CumRet:
+    cdef double prevValue
+    cdef double value
+    cdef int count
+
+    def __init__(self):
+        self.count = 0
+        self.value = 0
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        cdef double netReturn
+        if self.count > 0:
+            netReturn = (v - self.prevValue) / self.prevValue
+            self.value = (1 + self.value) * (1 + netReturn) - 1
+        self.prevValue = v
+        self.count += 1
+
+    def getValue(self):
+        if self.count > 1:
+            return self.value
+        return None
+
+
+cdef class Ratio:
+    cdef double prevValue
+    cdef double value
+    cdef int count
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, value):
+        if value is None:
+            return
+
+        cdef double v = value
+        cdef double prev = self.prevValue
+        self.prevValue = v
+        self.count += 1
+        if self.count > 1:
+            if prev == 0:
+                raise Exception("Invalid values")
+            self.value = (v - prev) / fabs(prev)
+
+    def getValue(self):
+        if self.count > 1:
+            return self.value
+        return None
@@ -18,6 +18,11 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import aligned
+
 
 def compute_diff(values1, values2):
     assert(len(values1) == len(values2))
@@ -33,20 +38,88 @@ def compute_diff(values1, values2):
     return ret
 
 
-def _cross_impl(values1, values2, start, end, signCheck):
+# Returns True if diff went from <= 0 to > 0 (above=True), or from >= 0 to < 0 (above=False).
+# Works with both numbers and numpy.arrays.
+def _crossed(prevDiff, diff, above):
+    if above:
+        return (prevDiff <= 0) & (diff > 0)
+    else:
+        return (prevDiff >= 0) & (diff < 0)
+
+
+def _cross_impl(values1, values2, start, end, above):
     # Get both set of values.
     values1 = values1[start:end]
     values2 = values2[start:end]
+    assert(len(values1) == len(values2))
 
-    # Compute differences and check sign changes.
-    ret = 0
-    diffs = compute_diff(values1, values2)
-    prevDiff = None
-    for diff in diffs:
-        if prevDiff is not None and not signCheck(prevDiff) and signCheck(diff):
-            ret += 1
-        prevDiff = diff
-    return ret
+    # The default range has only 2 values, and that is faster to check without NumPy.
+    if len(values1) == 2:
+        ret = 0
+        if None not in values1 and None not in values2 and _crossed(values1[0] - values2[0], values1[1] - values2[1], above):
+            ret = 1
+        return ret
+
+    # Compute differences and check sign changes. None values are converted to NaN, which never cross.
+    diffs = np.array(values1, dtype=float) - np.array(values2, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return int(np.count_nonzero(_crossed(diffs[:-1], diffs[1:], above)))
+
+
+class CrossDetector(dataseries.SequenceDataSeries):
+    """A :class:`pyalgotrade.dataseries.SequenceDataSeries` that checks for cross above and cross below conditions
+    between two DataSeries as they get new values. Values are aligned by datetime, and for each datetime in both
+    DataSeries the value is 1 if values1 crossed above values2, -1 if values1 crossed below values2, or 0 otherwise.
+    This is updated in O(1) for each new value, instead of calling :func:`cross_above` and :func:`cross_below`
+    for every bar.
+
+    :param values1: The DataSeries that crosses.
+    :type values1: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param values2: The DataSeries being crossed.
+    :type values2: :class:`pyalgotrade.dataseries.DataSeries`.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the opposite end.
+    :type maxLen: int.
+
+    .. note::
+        Values must have datetimes, like the ones from bar feeds or filters over them.
+    """
+
+    def __init__(self, values1, values2, maxLen=dataseries.DEFAULT_MAX_LEN):
+        dataseries.SequenceDataSeries.__init__(self, maxLen)
+        self.__prevDiff = None
+        self.__crossAboveCount = 0
+        self.__crossBelowCount = 0
+        # Only the last pair of aligned values is needed. The second one gets its value after the first one.
+        self.__aligned1 = dataseries.SequenceDataSeries(1)
+        self.__aligned2 = dataseries.SequenceDataSeries(1)
+        self.__aligned2.getNewValueEvent().subscribe(self.__onAlignedValues)
+        aligned.Syncer(values1, values2, self.__aligned1, self.__aligned2)
+
+    def __onAlignedValues(self, dataSeries, dateTime, value2):
+        value1 = self.__aligned1[-1]
+        diff = None
+        if value1 is not None and value2 is not None:
+            diff = value1 - value2
+
+        ret = 0
+        if self.__prevDiff is not None and diff is not None:
+            if _crossed(self.__prevDiff, diff, True):
+                ret = 1
+                self.__crossAboveCount += 1
+            elif _crossed(self.__prevDiff, diff, False):
+                ret = -1
+                self.__crossBelowCount += 1
+        self.__prevDiff = diff
+        self.appendWithDateTime(dateTime, ret)
+
+    def getCrossAboveCount(self):
+        """Returns the number of times values1 crossed above values2."""
+        return self.__crossAboveCount
+
+    def getCrossBelowCount(self):
+        """Returns the number of times values1 crossed below values2."""
+        return self.__crossBelowCount
 
 
 # Note:
@@ -80,7 +153,7 @@ def cross_above(values1, values2, start=-2, end=None):
     .. note::
         The default start and end values check for cross above conditions over the last 2 values.
     """
-    return _cross_impl(values1, values2, start, end, lambda x: x > 0)
+    return _cross_impl(values1, values2, start, end, True)
 
 
 def cross_below(values1, values2, start=-2, end=None):
@@ -100,4 +173,4 @@ def cross_below(values1, values2, start=-2, end=None):
     .. note::
         The default start and end values check for cross below conditions over the last 2 values.
     """
-    return _cross_impl(values1, values2, start, end, lambda x: x < 0)
+    return _cross_impl(values1, values2, start, end, False)
@@ -20,23 +20,20 @@
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
 class CumRetEventWindow(technical.EventWindow):
     def __init__(self):
         technical.EventWindow.__init__(self, 2)
-        self.__prevCumRet = 0
+        self.__cumRet = kernels.CumRet()
+
+    def onNewValue(self, dateTime, value):
+        technical.EventWindow.onNewValue(self, dateTime, value)
+        self.__cumRet.update(value)
 
     def getValue(self):
-        ret = None
-        if self.windowFull():
-            values = self.getValues()
-            prev = values[0]
-            actual = values[1]
-            netReturn = (actual - prev) / float(prev)
-            ret = (1 + self.__prevCumRet) * (1 + netReturn) - 1
-            self.__prevCumRet = ret
-        return ret
+        return self.__cumRet.getValue()
 
 
 class CumulativeReturn(technical.EventBasedFilter):
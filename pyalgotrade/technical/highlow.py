@@ -21,20 +21,53 @@
 from pyalgotrade import technical
 from pyalgotrade import dataseries
 
+import collections
+
+
+# Keeps the lowest or highest value in a sliding window in O(1) amortized per value.
+class WindowMinMax(object):
+    def __init__(self, windowSize, useMin):
+        assert(windowSize > 0)
+        self.__windowSize = windowSize
+        self.__useMin = useMin
+        # (position, value) tuples with increasing (min) or decreasing (max) values.
+        self.__candidates = collections.deque()
+        self.__position = 0
+
+    def append(self, value):
+        candidates = self.__candidates
+        if self.__useMin:
+            while len(candidates) and candidates[-1][1] >= value:
+                candidates.pop()
+        else:
+            while len(candidates) and candidates[-1][1] <= value:
+                candidates.pop()
+        candidates.append((self.__position, value))
+        if candidates[0][0] <= self.__position - self.__windowSize:
+            candidates.popleft()
+        self.__position += 1
+
+    def getValue(self):
+        ret = None
+        if len(self.__candidates):
+            ret = self.__candidates[0][1]
+        return ret
+
 
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         technical.EventWindow.__init__(self, windowSize)
-        self.__useMin = useMin
+        self.__minMax = WindowMinMax(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        technical.EventWindow.onNewValue(self, dateTime, value)
+        if value is not None:
+            self.__minMax.append(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__minMax.getValue()
         return ret
 
 
@@ -0,0 +1,46 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+
+# The incremental kernels used by the technical filters. The compiled implementation (ckernels) is used if it was
+# built, unless the PYALGOTRADE_PURE_PYTHON environment variable is set. Both implementations return the same values.
+#
+# SMA and ROC keep the window of values, so their event windows use the kernel's buffer for getValues(). The EMA, RSI,
+# CumRet and Ratio kernels only keep a few values, so their event windows still keep the window of values for
+# getValues(), which takes more time per value than the kernel itself.
+# VWAP has no kernel since VWAPEventWindow only updates two running sums for each bar.
+
+import os
+
+try:
+    if os.environ.get("PYALGOTRADE_PURE_PYTHON"):
+        raise ImportError("Compiled kernels disabled")
+    from pyalgotrade.technical import ckernels as impl
+    ACCELERATED = True
+except ImportError:
+    from pyalgotrade.technical import pykernels as impl
+    ACCELERATED = False
+
+SMA = impl.SMA
+EMA = impl.EMA
+RSI = impl.RSI
+ROC = impl.ROC
+CumRet = impl.CumRet
+Ratio = impl.Ratio
@@ -21,6 +21,7 @@
 import numpy as np
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
 def calculate_sma(values, begin, end):
@@ -52,28 +53,24 @@ def calculate_sma(values, begin, end):
 # avg1 = avg0 - x
 # avg1 = avg0 + d/3 - a/3
 
+# The values in the window are kept by the kernel.
 class SMAEventWindow(technical.EventWindow):
     def __init__(self, period):
         assert(period > 0)
         technical.EventWindow.__init__(self, period)
-        self.__value = None
+        self.__sma = kernels.SMA(period)
 
     def onNewValue(self, dateTime, value):
-        firstValue = None
-        if len(self.getValues()) > 0:
-            firstValue = self.getValues()[0]
-            assert(firstValue is not None)
+        self.__sma.update(value)
 
-        technical.EventWindow.onNewValue(self, dateTime, value)
+    def getValues(self):
+        return self.__sma.getValues()
 
-        if value is not None and self.windowFull():
-            if self.__value is None:
-                self.__value = self.getValues().mean()
-            else:
-                self.__value = self.__value + value / float(self.getWindowSize()) - firstValue / float(self.getWindowSize())
+    def windowFull(self):
+        return self.__sma.windowFull()
 
     def getValue(self):
-        return self.__value
+        return self.__sma.getValue()
 
 
 class SMA(technical.EventBasedFilter):
@@ -95,21 +92,14 @@ class EMAEventWindow(technical.EventWindow):
     def __init__(self, period):
         assert(period > 1)
         technical.EventWindow.__init__(self, period)
-        self.__multiplier = (2.0 / (period + 1))
-        self.__value = None
+        self.__ema = kernels.EMA(period)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
-
-        # Formula from http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_averages
-        if value is not None and self.windowFull():
-            if self.__value is None:
-                self.__value = self.getValues().mean()
-            else:
-                self.__value = (value - self.__value) * self.__multiplier + self.__value
+        self.__ema.update(value)
 
     def getValue(self):
-        return self.__value
+        return self.__ema.getValue()
 
 
 class EMA(technical.EventBasedFilter):
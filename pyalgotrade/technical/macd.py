@@ -18,8 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
-from pyalgotrade.technical import ma
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
 class MACD(dataseries.SequenceDataSeries):
@@ -50,9 +50,10 @@ class MACD(dataseries.SequenceDataSeries):
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
         self.__fastEMASkip = slowEMA - fastEMA
 
-        self.__fastEMAWindow = ma.EMAEventWindow(fastEMA)
-        self.__slowEMAWindow = ma.EMAEventWindow(slowEMA)
-        self.__signalEMAWindow = ma.EMAEventWindow(signalEMA)
+        # The three EMAs are calculated in a single handler, without keeping windows of values.
+        self.__fastEMA = kernels.EMA(fastEMA)
+        self.__slowEMA = kernels.EMA(slowEMA)
+        self.__signalEMA = kernels.EMA(signalEMA)
         self.__signal = dataseries.SequenceDataSeries(maxLen)
         self.__histogram = dataseries.SequenceDataSeries(maxLen)
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
@@ -71,23 +72,30 @@ class MACD(dataseries.SequenceDataSeries):
         signalValue = None
         histogramValue = None
 
+        # None values are skipped, so both EMAs still calculate their first values at the same time.
+        if value is None:
+            self.appendWithDateTime(dateTime, macdValue)
+            self.__signal.appendWithDateTime(dateTime, signalValue)
+            self.__histogram.appendWithDateTime(dateTime, histogramValue)
+            return
+
         # We need to skip some values when calculating the fast EMA in order for both EMA
         # to calculate their first values at the same time.
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
-        self.__slowEMAWindow.onNewValue(dateTime, value)
+        self.__slowEMA.update(value)
         if self.__fastEMASkip > 0:
             self.__fastEMASkip -= 1
         else:
-            self.__fastEMAWindow.onNewValue(dateTime, value)
-            if self.__fastEMAWindow.windowFull():
-                diff = self.__fastEMAWindow.getValue() - self.__slowEMAWindow.getValue()
+            self.__fastEMA.update(value)
+            if self.__fastEMA.getValue() is not None:
+                diff = self.__fastEMA.getValue() - self.__slowEMA.getValue()
 
         # Make the first MACD value available as soon as the first signal value is available.
         # I'M FORCING THIS BEHAVIOUR ONLY TO MAKE THIS FITLER MATCH TA-Lib MACD VALUES.
-        self.__signalEMAWindow.onNewValue(dateTime, diff)
-        if self.__signalEMAWindow.windowFull():
+        self.__signalEMA.update(diff)
+        if self.__signalEMA.getValue() is not None:
             macdValue = diff
-            signalValue = self.__signalEMAWindow.getValue()
+            signalValue = self.__signalEMA.getValue()
             histogramValue = macdValue - signalValue
 
         self.appendWithDateTime(dateTime, macdValue)
@@ -0,0 +1,224 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Pure Python implementation of the incremental kernels used by the technical filters.
+# pyalgotrade/technical/ckernels.pyx implements the same classes as a compiled extension, and
+# pyalgotrade.technical.kernels picks one of the two when it gets imported.
+#
+# Each kernel gets values through update(value) and getValue() returns the last value calculated, or None.
+# None values are skipped, like technical.EventWindow does.
+# Kernels that keep a window of values (SMA and ROC) also implement getValues() and windowFull(), so the event windows
+# can use them instead of keeping a copy of the values.
+
+import collections
+
+import numpy as np
+
+
+class SMA(object):
+    def __init__(self, period):
+        assert(period > 0)
+        self.__period = period
+        self.__values = collections.deque()
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        value = float(value)
+        self.__values.append(value)
+        if len(self.__values) > self.__period:
+            firstValue = self.__values.popleft()
+            self.__value = self.__value + value / self.__period - firstValue / self.__period
+        elif len(self.__values) == self.__period:
+            # Use NumPy for the first value to get the same result as technical.EventWindow.getValues().mean().
+            self.__value = float(np.array(self.__values).mean())
+
+    def getValue(self):
+        return self.__value
+
+    def getValues(self):
+        return np.array(self.__values)
+
+    def windowFull(self):
+        return len(self.__values) == self.__period
+
+
+class EMA(object):
+    def __init__(self, period):
+        assert(period > 1)
+        self.__period = period
+        self.__multiplier = (2.0 / (period + 1))
+        self.__firstValues = []
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        # Formula from http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_averages
+        value = float(value)
+        if self.__value is None:
+            self.__firstValues.append(value)
+            if len(self.__firstValues) == self.__period:
+                self.__value = float(np.array(self.__firstValues).mean())
+                self.__firstValues = None
+        else:
+            self.__value = (value - self.__value) * self.__multiplier + self.__value
+
+    def getValue(self):
+        return self.__value
+
+
+class RSI(object):
+    def __init__(self, period):
+        assert(period > 1)
+        self.__period = period
+        # We need N + 1 samples to calculate N averages because they are calculated based on the diff with previous values.
+        self.__firstValues = []
+        self.__prevValue = None
+        self.__avgGain = None
+        self.__avgLoss = None
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        # Formula from http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:relative_strength_index_rsi
+        value = float(value)
+        if self.__avgGain is None:
+            self.__firstValues.append(value)
+            if len(self.__firstValues) < self.__period + 1:
+                self.__prevValue = value
+                return
+            avgGain = 0
+            avgLoss = 0
+            for i in xrange(1, len(self.__firstValues)):
+                change = self.__firstValues[i] - self.__firstValues[i-1]
+                if change < 0:
+                    avgLoss += abs(change)
+                else:
+                    avgGain += change
+            avgGain = avgGain / float(self.__period)
+            avgLoss = avgLoss / float(self.__period)
+            self.__firstValues = None
+        else:
+            # Rest of averages are smoothed
+            gain = 0
+            loss = 0
+            change = value - self.__prevValue
+            if change < 0:
+                loss = abs(change)
+            else:
+                gain = change
+            avgGain = (self.__avgGain * (self.__period-1) + gain) / float(self.__period)
+            avgLoss = (self.__avgLoss * (self.__period-1) + loss) / float(self.__period)
+
+        if avgLoss == 0:
+            self.__value = 100
+        else:
+            rs = avgGain / avgLoss
+            self.__value = 100 - 100 / (1 + rs)
+        self.__avgGain = avgGain
+        self.__avgLoss = avgLoss
+        self.__prevValue = value
+
+    def getValue(self):
+        return self.__value
+
+
+class ROC(object):
+    def __init__(self, valuesAgo):
+        assert(valuesAgo > 0)
+        self.__valuesAgo = valuesAgo
+        self.__values = collections.deque()
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        value = float(value)
+        self.__values.append(value)
+        if len(self.__values) > self.__valuesAgo + 1:
+            self.__values.popleft()
+        if len(self.__values) == self.__valuesAgo + 1:
+            prev = self.__values[0]
+            diff = value - prev
+            if diff == 0:
+                self.__value = 0.0
+            elif prev != 0:
+                self.__value = diff / prev
+            else:
+                self.__value = None
+
+    def getValue(self):
+        return self.__value
+
+    def getValues(self):
+        return np.array(self.__values)
+
+    def windowFull(self):
+        return len(self.__values) == self.__valuesAgo + 1
+
+
+class CumRet(object):
+    def __init__(self):
+        self.__prevValue = None
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        value = float(value)
+        if self.__prevValue is not None:
+            netReturn = (value - self.__prevValue) / self.__prevValue
+            prevCumRet = self.__value
+            if prevCumRet is None:
+                prevCumRet = 0
+            self.__value = (1 + prevCumRet) * (1 + netReturn) - 1
+        self.__prevValue = value
+
+    def getValue(self):
+        return self.__value
+
+
+class Ratio(object):
+    def __init__(self):
+        self.__prevValue = None
+        self.__value = None
+
+    def update(self, value):
+        if value is None:
+            return
+
+        value = float(value)
+        prev = self.__prevValue
+        self.__prevValue = value
+        if prev is not None:
+            if prev == 0:
+                raise Exception("Invalid values")
+            self.__value = (value - prev) / abs(prev)
+
+    def getValue(self):
+        return self.__value
@@ -19,21 +19,21 @@
 """
 
 from pyalgotrade import technical
-from pyalgotrade import utils
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
 class RatioEventWindow(technical.EventWindow):
     def __init__(self):
         technical.EventWindow.__init__(self, 2)
+        self.__ratio = kernels.Ratio()
+
+    def onNewValue(self, dateTime, value):
+        technical.EventWindow.onNewValue(self, dateTime, value)
+        self.__ratio.update(value)
 
     def getValue(self):
-        ret = None
-        if self.windowFull():
-            prev = self.getValues()[0]
-            actual = self.getValues()[-1]
-            ret = utils.get_change_percentage(actual, prev)
-        return ret
+        return self.__ratio.getValue()
 
 
 # Calculates the ratio between a value and the previous one.
@@ -20,24 +20,26 @@
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
+# The values in the window are kept by the kernel.
 class ROCEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         technical.EventWindow.__init__(self, windowSize)
+        self.__roc = kernels.ROC(windowSize - 1)
+
+    def onNewValue(self, dateTime, value):
+        self.__roc.update(value)
+
+    def getValues(self):
+        return self.__roc.getValues()
+
+    def windowFull(self):
+        return self.__roc.windowFull()
 
     def getValue(self):
-        ret = None
-        if self.windowFull():
-            prev = self.getValues()[0]
-            actual = self.getValues()[-1]
-            if actual is not None and prev is not None:
-                diff = float(actual - prev)
-                if diff == 0:
-                    ret = float(0)
-                elif prev != 0:
-                    ret = diff / prev
-        return ret
+        return self.__roc.getValue()
 
 
 class RateOfChange(technical.EventBasedFilter):
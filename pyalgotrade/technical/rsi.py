@@ -20,6 +20,7 @@
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade.technical import kernels
 
 
 # RSI = 100 - 100 / (1 + RS)
@@ -90,39 +91,14 @@ class RSIEventWindow(technical.EventWindow):
         assert(period > 1)
         # We need N + 1 samples to calculate N averages because they are calculated based on the diff with previous values.
         technical.EventWindow.__init__(self, period + 1)
-        self.__value = None
-        self.__prevGain = None
-        self.__prevLoss = None
-        self.__period = period
+        self.__rsi = kernels.RSI(period)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
-
-        # Formula from http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:relative_strength_index_rsi
-        if value is not None and self.windowFull():
-            if self.__prevGain is None:
-                assert(self.__prevLoss is None)
-                avgGain, avgLoss = avg_gain_loss(self.getValues(), 0, len(self.getValues()))
-            else:
-                # Rest of averages are smoothed
-                assert(self.__prevLoss is not None)
-                prevValue = self.getValues()[-2]
-                currValue = self.getValues()[-1]
-                currGain, currLoss = gain_loss_one(prevValue, currValue)
-                avgGain = (self.__prevGain * (self.__period-1) + currGain) / float(self.__period)
-                avgLoss = (self.__prevLoss * (self.__period-1) + currLoss) / float(self.__period)
-
-            if avgLoss == 0:
-                self.__value = 100
-            else:
-                rs = avgGain / avgLoss
-                self.__value = 100 - 100 / (1 + rs)
-
-            self.__prevGain = avgGain
-            self.__prevLoss = avgLoss
+        self.__rsi.update(value)
 
     def getValue(self):
-        return self.__value
+        return self.__rsi.getValue()
 
 
 class RSI(technical.EventBasedFilter):
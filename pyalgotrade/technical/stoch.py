@@ -21,6 +21,7 @@
 from pyalgotrade import technical
 from pyalgotrade import dataseries
 from pyalgotrade.technical import ma
+from pyalgotrade.technical import highlow
 
 
 class BarWrapper(object):
@@ -57,17 +58,28 @@ def get_low_high_values(barWrapper, bars):
     return (lowestLow, highestHigh)
 
 
+# The window holds the close prices, and the lowest low and highest high are updated as bars come in and out of the window.
+# Bars are not kept.
 class SOEventWindow(technical.EventWindow):
     def __init__(self, period, useAdjustedValues):
         assert(period > 1)
-        technical.EventWindow.__init__(self, period, dtype=object)
+        technical.EventWindow.__init__(self, period)
         self.__barWrapper = BarWrapper(useAdjustedValues)
+        self.__lowestLow = highlow.WindowMinMax(period, True)
+        self.__highestHigh = highlow.WindowMinMax(period, False)
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            technical.EventWindow.onNewValue(self, dateTime, self.__barWrapper.getClose(value))
+            self.__lowestLow.append(self.__barWrapper.getLow(value))
+            self.__highestHigh.append(self.__barWrapper.getHigh(value))
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__barWrapper, self.getValues())
-            currentClose = self.__barWrapper.getClose(self.getValues()[-1])
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
+            currentClose = self.getValues()[-1]
             ret = (currentClose - lowestLow) / float(highestHigh - lowestLow) * 100
         return ret
 
@@ -92,7 +104,14 @@ class StochasticOscillator(technical.EventBasedFilter):
     def __init__(self, barDataSeries, period, dSMAPeriod=3, useAdjustedValues=False, maxLen=dataseries.DEFAULT_MAX_LEN):
         assert(dSMAPeriod > 1)
         technical.EventBasedFilter.__init__(self, barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen)
-        self.__d = ma.SMA(self, dSMAPeriod, maxLen)
+        self.__dWindow = ma.SMAEventWindow(dSMAPeriod)
+        self.__d = dataseries.SequenceDataSeries(maxLen)
+
+    def appendWithDateTime(self, dateTime, value):
+        # %D is updated here, along with %K, instead of using a SMA filter that subscribes to %K.
+        self.__dWindow.onNewValue(dateTime, value)
+        self.__d.appendWithDateTime(dateTime, self.__dWindow.getValue())
+        technical.EventBasedFilter.appendWithDateTime(self, dateTime, value)
 
     def getD(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the %D values."""
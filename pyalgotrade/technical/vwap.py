@@ -22,26 +22,54 @@ from pyalgotrade import technical
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 
+import collections
+import math
 
+
+# The window holds the prices, and the price * volume and volume sums are updated as bars come in and out of the window.
+# Bars are not kept.
 class VWAPEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useTypicalPrice):
-        technical.EventWindow.__init__(self, windowSize, dtype=object)
+        technical.EventWindow.__init__(self, windowSize)
         self.__useTypicalPrice = useTypicalPrice
+        self.__priceVolumes = collections.deque()
+        self.__volumes = collections.deque()
+        self.__cumTotal = 0.0
+        self.__cumVolume = 0.0
+        # The number of updates since the sums were recalculated.
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        if self.__useTypicalPrice:
+            price = value.getTypicalPrice()
+        else:
+            price = value.getClose()
+        volume = value.getVolume()
+        technical.EventWindow.onNewValue(self, dateTime, price)
+
+        priceVolume = price * volume
+        self.__priceVolumes.append(priceVolume)
+        self.__volumes.append(volume)
+        self.__cumTotal += priceVolume
+        self.__cumVolume += volume
+        if len(self.__volumes) > self.getWindowSize():
+            self.__cumTotal -= self.__priceVolumes.popleft()
+            self.__cumVolume -= self.__volumes.popleft()
+
+        # Recalculate the sums once every window to keep rounding errors from adding up. This is O(1) amortized.
+        self.__updates += 1
+        if self.__updates == self.getWindowSize():
+            self.__updates = 0
+            self.__cumTotal = math.fsum(self.__priceVolumes)
+            self.__cumVolume = math.fsum(self.__volumes)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
-
-            for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getClose() * bar.getVolume()
-                cumVolume += bar.getVolume()
-
-            ret = cumTotal / float(cumVolume)
+            ret = self.__cumTotal / float(self.__cumVolume)
         return ret
 
 
@@ -65,4 +93,4 @@ class VWAP(technical.EventBasedFilter):
         technical.EventBasedFilter.__init__(self, dataSeries, VWAPEventWindow(period, useTypicalPrice), maxLen)
 
     def getPeriod(self):
-        return self.getWindowSize()
+        return self.getEventWindow().getWindowSize()
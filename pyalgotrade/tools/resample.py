@@ -25,16 +25,19 @@ from pyalgotrade.dataseries import resampled
 
 datetime_format = "%Y-%m-%d %H:%M:%S"
 
+# Size, in bytes, of the buffer used when writing each file.
+write_buffer_size = 1024 * 1024
+
 
 class CSVFileWriter(object):
+    __lineFormat = ",".join(["%s"] * 7) + os.linesep
+
     def __init__(self, csvFile):
-        self.__file = open(csvFile, "w")
+        self.__file = open(csvFile, "w", write_buffer_size)
         self.__writeLine("Date Time", "Open", "High", "Low", "Close", "Volume", "Adj Close")
 
     def __writeLine(self, *values):
-        line = ",".join([str(value) for value in values])
-        self.__file.write(line)
-        self.__file.write(os.linesep)
+        self.__file.write(CSVFileWriter.__lineFormat % values)
 
     def writeSlot(self, slot):
         adjClose = slot.getAdjClose()
@@ -47,40 +50,68 @@ class CSVFileWriter(object):
         self.__file.close()
 
 
-class Sampler(object):
+# Resamples every instrument in a BarFeed into one or more frequencies in a single pass.
+# writerFactory is a callable that receives an instrument and a frequency and returns an object with
+# writeSlot(slot) and close() methods, like CSVFileWriter.
+class MultiSampler(object):
+    def __init__(self, barFeed, frequencies, writerFactory, timezone=None, sessionStart=None):
+        # One calendar per frequency, shared by all the instruments.
+        self.__calendars = [(frequency, resampled.SlotCalendar(frequency, timezone, sessionStart)) for frequency in frequencies]
+
+        barFeed.getNewBarsEvent().subscribe(self.__onBars)
+        self.__writerFactory = writerFactory
+        # (instrument, frequency) -> slot
+        self.__slots = {}
+        # (instrument, frequency) -> writer
+        self.__writers = {}
+
+    def __writeSlot(self, key, slot):
+        writer = self.__writers.get(key)
+        if writer is None:
+            writer = self.__writerFactory(*key)
+            self.__writers[key] = writer
+        writer.writeSlot(slot)
+
+    def __onBars(self, dateTime, bars):
+        instruments = bars.getInstruments()
+        for frequency, calendar in self.__calendars:
+            calendar.update(dateTime)
+            slotDateTime = calendar.getSlotDateTime()
+            for instrument in instruments:
+                key = (instrument, frequency)
+                bar = bars[instrument]
+                slot = self.__slots.get(key)
+                if slot is not None and slot.getDateTime() == slotDateTime:
+                    slot.addBar(bar)
+                else:
+                    if slot is not None:
+                        self.__writeSlot(key, slot)
+                    self.__slots[key] = resampled.Slot(slotDateTime, bar, frequency)
+
+    def finish(self):
+        for key, slot in self.__slots.iteritems():
+            self.__writeSlot(key, slot)
+        self.__slots = {}
+        for writer in self.__writers.itervalues():
+            writer.close()
+
+
+class Sampler(MultiSampler):
     def __init__(self, barFeed, frequency, csvFile):
         instruments = barFeed.getRegisteredInstruments()
         if len(instruments) != 1:
             raise Exception("Only barfeeds with 1 instrument can be resampled")
 
-        barFeed.getNewBarsEvent().subscribe(self.__onBars)
-        self.__barFeed = barFeed
-        self.__frequency = frequency
-        self.__instrument = instruments[0]
-        self.__slot = None
         self.__writer = CSVFileWriter(csvFile)
-
-    def __onBars(self, dateTime, bars):
-        slotDateTime = resampled.get_slot_datetime(dateTime, self.__frequency)
-        bar = bars[self.__instrument]
-
-        if self.__slot is None:
-            self.__slot = resampled.Slot(slotDateTime, bar, self.__frequency)
-        elif self.__slot.getDateTime() == slotDateTime:
-            self.__slot.addBar(bar)
-        else:
-            self.__writer.writeSlot(self.__slot)
-            self.__slot = resampled.Slot(slotDateTime, bar, self.__frequency)
+        MultiSampler.__init__(self, barFeed, [frequency], lambda instrument, frequency: self.__writer)
 
     def finish(self):
-        if self.__slot is not None:
-            self.__writer.writeSlot(self.__slot)
+        MultiSampler.finish(self)
+        # The file is opened upfront, so it has to be closed even if no slots were written.
         self.__writer.close()
 
 
-def resample_impl(barFeed, frequency, csvFile):
-    sampler = Sampler(barFeed, frequency, csvFile)
-
+def run_sampler(barFeed, sampler):
     # Process all bars.
     disp = observer.Dispatcher()
     disp.addSubject(barFeed)
@@ -89,6 +120,10 @@ def resample_impl(barFeed, frequency, csvFile):
     sampler.finish()
 
 
+def resample_impl(barFeed, frequency, csvFile):
+    run_sampler(barFeed, Sampler(barFeed, frequency, csvFile))
+
+
 def resample_to_csv(barFeed, frequency, csvFile):
     """Resample a BarFeed into a CSV file grouping bars by a certain frequency.
     The resulting file can be loaded using :class:`pyalgotrade.barfeed.csvfeed.GenericBarFeed`.
@@ -114,3 +149,33 @@ def resample_to_csv(barFeed, frequency, csvFile):
         resample_impl(barFeed, frequency, csvFile)
     else:
         raise Exception("Invalid frequency")
+
+
+def resample_to_csv_files(barFeed, frequencies, csvFilePattern, timezone=None, sessionStart=None):
+    """Resample all the instruments in a BarFeed into multiple CSV files, one for each instrument and frequency.
+    Bars are processed in a single pass, no matter how many instruments and frequencies are requested.
+    The CSV files will have the same format as the ones written by :func:`resample_to_csv`.
+
+    :param barFeed: The bar feed that will provide the bars.
+    :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`
+    :param frequencies: The grouping frequencies in seconds. Must be > 0.
+    :type frequencies: list.
+    :param csvFilePattern: The pattern used to build the path to each CSV file to write.
+        It will be formatted using **instrument** and **frequency** as keys. For example: "%(instrument)s-%(frequency)d.csv".
+    :type csvFilePattern: string.
+    :param timezone: The timezone used for daily and weekly bars. If None, UTC is used.
+    :type timezone: A pytz timezone.
+    :param sessionStart: The local time when daily and weekly bars start. If None, bars start at midnight.
+    :type sessionStart: :class:`datetime.time`.
+
+    .. note::
+        * Datetimes are stored without timezone information.
+        * **Adj Close** column may be empty if the input bar feed doesn't have that info.
+        * A file will only be written for those instruments that have bars.
+        * Check :class:`pyalgotrade.dataseries.resampled.SlotCalendar` for details on how bars are grouped.
+    """
+
+    def writerFactory(instrument, frequency):
+        return CSVFileWriter(csvFilePattern % {"instrument": instrument, "frequency": frequency})
+
+    run_sampler(barFeed, MultiSampler(barFeed, frequencies, writerFactory, timezone, sessionStart))
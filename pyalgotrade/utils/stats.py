@@ -19,6 +19,7 @@
 """
 
 import numpy
+import math
 
 
 def mean(values):
@@ -33,3 +34,192 @@ def stddev(values, ddof=1):
     if len(values):
         ret = numpy.array(values).std(ddof=ddof)
     return ret
+
+
+class QuantileSketch(object):
+    """Estimates quantiles of a stream of values using a fixed amount of memory.
+    Values are clustered into weighted centroids that are kept small near the tails, so extreme quantiles are
+    more accurate. Quantiles are exact until more than 2 * compression values are added.
+
+    :param compression: Controls the number of centroids kept. Higher values are more accurate but use more memory.
+    :type compression: int.
+    """
+
+    def __init__(self, compression=100):
+        assert(compression > 0)
+        self.__compression = compression
+        # Sorted (mean, weight) tuples.
+        self.__centroids = []
+        # (mean, weight) tuples added since the last compression.
+        self.__buffer = []
+        self.__count = 0
+        self.__min = None
+        self.__max = None
+
+    def __compress(self):
+        if len(self.__buffer) == 0:
+            return
+
+        points = sorted(self.__centroids + self.__buffer)
+        self.__buffer = []
+        total = float(self.__count)
+        centroids = []
+        cumulative = 0
+        mean, weight = points[0]
+        for nextMean, nextWeight in points[1:]:
+            # Centroids near the tails can hold less weight than centroids near the median.
+            q = (cumulative + (weight + nextWeight) / 2.0) / total
+            if weight + nextWeight <= 4 * total * q * (1 - q) / self.__compression:
+                weight += nextWeight
+                mean += (nextMean - mean) * nextWeight / float(weight)
+            else:
+                centroids.append((mean, weight))
+                cumulative += weight
+                mean, weight = nextMean, nextWeight
+        centroids.append((mean, weight))
+        self.__centroids = centroids
+
+    def __addCentroids(self, centroids, count, min_, max_):
+        if count == 0:
+            return
+        self.__buffer.extend(centroids)
+        self.__count += count
+        self.__min = min_ if self.__min is None else min(self.__min, min_)
+        self.__max = max_ if self.__max is None else max(self.__max, max_)
+        if len(self.__buffer) >= 2 * self.__compression:
+            self.__compress()
+
+    def add(self, value):
+        """Adds a value."""
+        self.__addCentroids([(value, 1)], 1, value, value)
+
+    def merge(self, other):
+        """Adds the values from another sketch.
+
+        :param other: The sketch to merge.
+        :type other: :class:`QuantileSketch`.
+        """
+        other.__compress()
+        self.__addCentroids(other.__centroids, other.__count, other.__min, other.__max)
+
+    def getCount(self):
+        """Returns the number of values added."""
+        return self.__count
+
+    def getQuantile(self, q):
+        """Returns the estimated quantile, interpolating like numpy.percentile does, or None if no values were added.
+
+        :param q: The quantile to get, between 0 and 1.
+        :type q: float.
+        """
+        assert(q >= 0 and q <= 1)
+        if self.__count == 0:
+            return None
+
+        self.__compress()
+        # The min and max values, and the centroids placed at the rank of their center.
+        ranks = [0]
+        values = [self.__min]
+        cumulative = 0
+        for mean, weight in self.__centroids:
+            ranks.append(cumulative + (weight - 1) / 2.0)
+            values.append(mean)
+            cumulative += weight
+        ranks.append(self.__count - 1)
+        values.append(self.__max)
+        return numpy.interp(q * (self.__count - 1), ranks, values)
+
+
+class RunningStats(object):
+    """Keeps the count, sum, mean, variance, min, max and estimated quantiles of a stream of values using a fixed
+    amount of memory. Instances can be merged, for example to combine the stats calculated by different processes.
+
+    :param compression: The compression for the :class:`QuantileSketch`.
+    :type compression: int.
+    """
+
+    def __init__(self, compression=100):
+        self.__count = 0
+        self.__sum = 0.0
+        self.__mean = 0.0
+        # The sum of squared differences from the mean (Welford's algorithm), which is more accurate than
+        # using the sum of squares.
+        self.__m2 = 0.0
+        self.__min = None
+        self.__max = None
+        self.__sketch = QuantileSketch(compression)
+
+    def add(self, value):
+        """Adds a value."""
+        self.__count += 1
+        self.__sum += value
+        delta = value - self.__mean
+        self.__mean += delta / self.__count
+        self.__m2 += delta * (value - self.__mean)
+        self.__min = value if self.__min is None else min(self.__min, value)
+        self.__max = value if self.__max is None else max(self.__max, value)
+        self.__sketch.add(value)
+
+    def merge(self, other):
+        """Adds the values from another instance.
+
+        :param other: The stats to merge.
+        :type other: :class:`RunningStats`.
+        """
+        if other.__count == 0:
+            return
+        count = self.__count + other.__count
+        delta = other.__mean - self.__mean
+        self.__mean += delta * other.__count / count
+        self.__m2 += other.__m2 + delta * delta * self.__count * other.__count / count
+        self.__count = count
+        self.__sum += other.__sum
+        self.__min = other.__min if self.__min is None else min(self.__min, other.__min)
+        self.__max = other.__max if self.__max is None else max(self.__max, other.__max)
+        self.__sketch.merge(other.__sketch)
+
+    def getCount(self):
+        """Returns the number of values added."""
+        return self.__count
+
+    def getSum(self):
+        """Returns the sum of the values."""
+        return self.__sum
+
+    def getMean(self):
+        """Returns the mean, or None if no values were added."""
+        ret = None
+        if self.__count:
+            ret = self.__mean
+        return ret
+
+    def getStdDev(self, ddof=1):
+        """Returns the standard deviation, or None if no values were added.
+        Like numpy, NaN is returned if there are not enough values for the given delta degrees of freedom.
+
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        """
+        ret = None
+        if self.__count:
+            if self.__count > ddof:
+                ret = math.sqrt(self.__m2 / (self.__count - ddof))
+            else:
+                ret = float("nan")
+        return ret
+
+    def getMin(self):
+        """Returns the min. value, or None if no values were added."""
+        return self.__min
+
+    def getMax(self):
+        """Returns the max. value, or None if no values were added."""
+        return self.__max
+
+    def getQuantile(self, q):
+        """Returns the estimated quantile, or None if no values were added.
+
+        :param q: The quantile to get, between 0 and 1.
+        :type q: float.
+        """
+        return self.__sketch.getQuantile(q)
@@ -47,15 +47,14 @@ class BuyOnGap(eventprofiler.Predicate):
         return ret
 
 
-def main(plot):
-    instruments = ["AA", "AES", "AIG"]
-    feed = yahoofinance.build_feed(instruments, 2008, 2009, ".")
+def build_feed(instruments):
+    return yahoofinance.build_feed(instruments, 2008, 2009, ".")
 
-    predicate = BuyOnGap(feed)
-    eventProfiler = eventprofiler.Profiler(predicate, 5, 5)
-    eventProfiler.run(feed, True)
 
-    results = eventProfiler.getResults()
+def main(plot):
+    instruments = ["AA", "AES", "AIG"]
+    # Instruments are split across processes, each one with its own feed and BuyOnGap predicate.
+    results = eventprofiler.run_parallel(BuyOnGap, build_feed, instruments, 5, 5, True)
     print "%d events found" % (results.getEventCount())
     if plot:
         eventprofiler.plot(results)
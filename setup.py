@@ -17,10 +17,49 @@
 # limitations under the License.
 
 
+import os
+import sys
+
 try:
     from setuptools import setup
+    from setuptools import Extension
+    from setuptools.command.build_ext import build_ext
 except ImportError:
     from distutils.core import setup
+    from distutils.extension import Extension
+    from distutils.command.build_ext import build_ext
+
+from distutils.errors import CCompilerError, DistutilsExecError, DistutilsPlatformError
+
+
+def warn_kernels_not_built(error):
+    sys.stderr.write("WARNING: The compiled kernels were not built (%s). The pure Python ones will be used.\n" % error)
+
+
+# The compiled kernels are optional, so failing to build them should not fail the installation.
+# pyalgotrade.technical.kernels falls back to the pure Python ones if they are not built.
+class OptionalBuildExt(build_ext):
+    def run(self):
+        try:
+            build_ext.run(self)
+        except DistutilsPlatformError, e:
+            warn_kernels_not_built(e)
+
+    def build_extension(self, ext):
+        try:
+            build_ext.build_extension(self, ext)
+        except (CCompilerError, DistutilsExecError, DistutilsPlatformError, ValueError), e:
+            warn_kernels_not_built(e)
+
+
+# Building the compiled kernels is opt-in. Set the PYALGOTRADE_BUILD_KERNELS environment variable to build them.
+extModules = []
+if os.environ.get("PYALGOTRADE_BUILD_KERNELS"):
+    try:
+        from Cython.Build import cythonize
+        extModules = cythonize([Extension("pyalgotrade.technical.ckernels", ["pyalgotrade/technical/ckernels.pyx"])])
+    except Exception, e:
+        warn_kernels_not_built(e)
 
 setup(
     name='PyAlgoTrade',
@@ -45,6 +84,8 @@ setup(
         'pyalgotrade.tools',
         'pyalgotrade.twitter',
         'pyalgotrade.utils'],
+    ext_modules=extModules,
+    cmdclass={'build_ext': OptionalBuildExt},
     install_requires=[
         'numpy',
         'pytz']
@@ -0,0 +1,155 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import datetime
+import pickle
+
+from pyalgotrade import bar
+from pyalgotrade import broker
+from pyalgotrade.broker import backtesting
+from pyalgotrade.mtgox import barfeed
+
+
+class BarTestCase(unittest.TestCase):
+    def testBasicBarPickle(self):
+        b1 = bar.BasicBar(datetime.datetime.now(), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY)
+        b2 = pickle.loads(pickle.dumps(b1))
+        self.assertFalse(hasattr(b1, "__dict__"))
+        self.assertEqual(b1.getDateTime(), b2.getDateTime())
+        self.assertEqual(b1.getOpen(), b2.getOpen())
+        self.assertEqual(b1.getHigh(), b2.getHigh())
+        self.assertEqual(b1.getLow(), b2.getLow())
+        self.assertEqual(b1.getClose(), b2.getClose())
+        self.assertEqual(b1.getVolume(), b2.getVolume())
+        self.assertEqual(b1.getAdjClose(), b2.getAdjClose())
+        self.assertEqual(b1.getFrequency(), b2.getFrequency())
+
+    def testInvalidPrices(self):
+        with self.assertRaises(Exception):
+            bar.BasicBar(datetime.datetime.now(), 2, 1, 1, 2.1, 10, 5, bar.Frequency.DAY)
+        # Prices are not checked if validation is disabled.
+        b = bar.BasicBar(datetime.datetime.now(), 2, 1, 1, 2.1, 10, 5, bar.Frequency.DAY, False)
+        self.assertEqual(b.getHigh(), 1)
+
+    def testBarsNotInSync(self):
+        now = datetime.datetime.now()
+        barDict = {
+            "orcl": bar.BasicBar(now, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY),
+            "ige": bar.BasicBar(now + datetime.timedelta(days=1), 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY),
+        }
+        with self.assertRaises(Exception):
+            bar.Bars(barDict)
+        bars = bar.Bars({"orcl": barDict["orcl"]}, False)
+        self.assertEqual(bars.getDateTime(), now)
+
+    def testTradeBarPickle(self):
+        b1 = barfeed.TradeBar(datetime.datetime.now(), 13.5, 0.01, "ask")
+        b2 = pickle.loads(pickle.dumps(b1))
+        self.assertFalse(hasattr(b1, "__dict__"))
+        self.assertEqual(b1.getDateTime(), b2.getDateTime())
+        self.assertEqual(b1.getClose(), b2.getClose())
+        self.assertEqual(b1.getVolume(), b2.getVolume())
+        self.assertEqual(b1.getTradeType(), b2.getTradeType())
+
+    def testBarsPickle(self):
+        dateTime = datetime.datetime.now()
+        bars1 = bar.Bars({"orcl": bar.BasicBar(dateTime, 2, 3, 1, 2.1, 10, 5, bar.Frequency.DAY)})
+        for protocol in [0, pickle.HIGHEST_PROTOCOL]:
+            bars2 = pickle.loads(pickle.dumps(bars1, protocol))
+            self.assertFalse(hasattr(bars1, "__dict__"))
+            self.assertEqual(bars2.getDateTime(), dateTime)
+            self.assertEqual(bars2.getInstruments(), ["orcl"])
+            self.assertEqual(bars2["orcl"].getClose(), 2.1)
+
+    def testBarsUnpickleDictState(self):
+        # A Bars pickled with protocol 0 before Bars declared __slots__.
+        pickled = "ccopy_reg\n_reconstructor\np0\n(cpyalgotrade.bar\nBars\np1\nc__builtin__\nobject\np2\nNtp3\nRp4\n(dp5\nS'_Bars__barDict'\np6\n(dp7\nS'orcl'\np8\ng0\n(cpyalgotrade.bar\nBasicBar\np9\ng2\nNtp10\nRp11\n(cdatetime\ndatetime\np12\n(S'\\x07\\xdd\\x01\\x02\\x03\\x04\\x05\\x00\\x00\\x00'\np13\ntp14\nRp15\nI2\nF2.1\nI3\nI1\nI10\nI5\nI86400\ntp16\nbssS'_Bars__dateTime'\np17\ng15\nsb."
+        bars = pickle.loads(pickled)
+        self.assertEqual(bars.getDateTime(), datetime.datetime(2013, 1, 2, 3, 4, 5))
+        self.assertEqual(bars.getInstruments(), ["orcl"])
+        self.assertEqual(bars["orcl"].getClose(), 2.1)
+        self.assertEqual(bars["orcl"].getFrequency(), bar.Frequency.DAY)
+
+
+class OrderTestCase(unittest.TestCase):
+    def testExecutionInfoPickle(self):
+        dateTime = datetime.datetime.now()
+        info = pickle.loads(pickle.dumps(broker.OrderExecutionInfo(10, 1, 0.1, dateTime)))
+        self.assertEqual(info.getPrice(), 10)
+        self.assertEqual(info.getQuantity(), 1)
+        self.assertEqual(info.getCommission(), 0.1)
+        self.assertEqual(info.getDateTime(), dateTime)
+
+    def testNoDict(self):
+        order = broker.StopLimitOrder(1, broker.Order.Action.BUY, "orcl", 10, 11, 1)
+        self.assertFalse(hasattr(order, "__dict__"))
+        self.assertFalse(hasattr(broker.OrderExecutionInfo(10, 1, 0.1, datetime.datetime.now()), "__dict__"))
+        self.assertEqual(order.getLimitPrice(), 10)
+        self.assertEqual(order.getStopPrice(), 11)
+
+    def testBacktestingOrderNoDict(self):
+        for order in [
+            backtesting.MarketOrder(1, broker.Order.Action.BUY, "orcl", 1, False),
+            backtesting.LimitOrder(1, broker.Order.Action.BUY, "orcl", 10, 1),
+            backtesting.StopOrder(1, broker.Order.Action.BUY, "orcl", 10, 1),
+            backtesting.StopLimitOrder(1, broker.Order.Action.BUY, "orcl", 10, 11, 1),
+        ]:
+            self.assertFalse(hasattr(order, "__dict__"))
+
+    def testOrderPickle(self):
+        dateTime = datetime.datetime.now()
+        order = backtesting.StopLimitOrder(1, broker.Order.Action.BUY, "orcl", 10, 11, 2)
+        order.setGoodTillCanceled(True)
+        order.setState(broker.Order.State.SUBMITTED)
+        order.setAcceptedDateTime(dateTime)
+        order.setStopHit(True)
+        for protocol in [0, pickle.HIGHEST_PROTOCOL]:
+            order2 = pickle.loads(pickle.dumps(order, protocol))
+            self.assertEqual(type(order2), backtesting.StopLimitOrder)
+            self.assertEqual(order2.getId(), 1)
+            self.assertEqual(order2.getInstrument(), "orcl")
+            self.assertEqual(order2.getQuantity(), 2)
+            self.assertEqual(order2.getLimitPrice(), 10)
+            self.assertEqual(order2.getStopPrice(), 11)
+            self.assertTrue(order2.getGoodTillCanceled())
+            self.assertTrue(order2.isSubmitted())
+            self.assertEqual(order2.getAcceptedDateTime(), dateTime)
+            self.assertTrue(order2.getStopHit())
+
+        order = broker.MarketOrder(2, broker.Order.Action.SELL, "orcl", 1, True)
+        for protocol in [0, pickle.HIGHEST_PROTOCOL]:
+            order2 = pickle.loads(pickle.dumps(order, protocol))
+            self.assertEqual(order2.getId(), 2)
+            self.assertTrue(order2.isSell())
+            self.assertTrue(order2.getFillOnClose())
+
+    def testOrderUnpickleDictState(self):
+        # A LimitOrder pickled with protocol 0 before orders declared __slots__.
+        pickled = "ccopy_reg\n_reconstructor\np0\n(cpyalgotrade.broker.backtesting\nLimitOrder\np1\nc__builtin__\nobject\np2\nNtp3\nRp4\n(dp5\nS'_Order__id'\np6\nI1\nsS'_Order__avgFillPrice'\np7\nNsS'_Order__commissions'\np8\nI0\nsS'_Order__executionInfo'\np9\nNsS'_Order__allOrNone'\np10\nI00\nsS'_Order__quantity'\np11\nI2\nsS'_Order__action'\np12\nI1\nsS'_BacktestingOrder__accepted'\np13\nNsS'_Order__filled'\np14\nI0\nsS'_Order__state'\np15\nI1\nsS'_Order__goodTillCanceled'\np16\nI00\nsS'_Order__instrument'\np17\nS'orcl'\np18\nsS'_Order__type'\np19\nI2\nsS'_LimitOrder__limitPrice'\np20\nI10\nsb."
+        order = pickle.loads(pickled)
+        self.assertFalse(hasattr(order, "__dict__"))
+        self.assertEqual(order.getId(), 1)
+        self.assertEqual(order.getInstrument(), "orcl")
+        self.assertEqual(order.getQuantity(), 2)
+        self.assertEqual(order.getLimitPrice(), 10)
+        self.assertTrue(order.isBuy())
+        self.assertTrue(order.isInitial())
+        self.assertEqual(order.getAcceptedDateTime(), None)
@@ -20,11 +20,14 @@
 
 import unittest
 import datetime
+import math
+import random
 
 from pyalgotrade import broker
 from pyalgotrade.broker import backtesting
 from pyalgotrade import bar
 from pyalgotrade import barfeed
+from pyalgotrade.barfeed import membf
 
 
 class OrderUpdateCallback:
@@ -2313,3 +2316,455 @@ class StopLimitOrderTestCase(BaseTestCase):
         self.assertTrue(order.getExecutionInfo().getPrice() == 8)
         self.assertEqual(order.getFilled(), 1)
         self.assertEqual(order.getRemaining(), 0)
+
+
+class MemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class EquityTestCase(unittest.TestCase):
+    def __buildBars(self, instrument, closes):
+        ret = []
+        dateTime = datetime.datetime(2011, 1, 1)
+        for close in closes:
+            if close is not None:
+                ret.append(bar.BasicBar(dateTime, close, close, close, close, 1000, close / 2.0, bar.Frequency.DAY))
+            dateTime += datetime.timedelta(days=1)
+        return ret
+
+    def __checkEquity(self, brk, barFeed, useAdjustedValues):
+        expectedEquity = brk.getCash()
+        expectedCash = brk.getCash()
+        for instrument, shares in brk.getPositions().iteritems():
+            price = bar.get_close(barFeed.getLastBar(instrument), useAdjustedValues)
+            expectedEquity += price * shares
+            if shares < 0:
+                expectedCash += price * shares
+        self.assertEqual(brk.getEquity(), expectedEquity)
+        self.assertEqual(brk.getCash(False), expectedCash)
+
+    def testEquityWithMultipleInstruments(self):
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("ins1", self.__buildBars("ins1", [10, 11, 12, 13, 14, 15]))
+        # ins2 has no bars on some days, so the last available price has to be used.
+        barFeed.addBarsFromSequence("ins2", self.__buildBars("ins2", [20, None, 18, None, 22, 24]))
+        brk = backtesting.Broker(1000, barFeed)
+        brk.getFillStrategy().setVolumeLimit(None)
+        barFeed.start()
+
+        self.assertEqual(brk.getEquity(), 1000)
+        brk.placeOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 10))
+        brk.placeOrder(brk.createMarketOrder(broker.Order.Action.SELL_SHORT, "ins2", 5))
+        barFeed.dispatch()
+        self.assertEqual(brk.getShares("ins1"), 10)
+        self.assertEqual(brk.getShares("ins2"), -5)
+        self.__checkEquity(brk, barFeed, False)
+
+        barFeed.dispatch()
+        self.__checkEquity(brk, barFeed, False)
+        self.assertEqual(brk.getEquity(), 1000 + 10)
+
+        brk.placeOrder(brk.createMarketOrder(broker.Order.Action.BUY_TO_COVER, "ins2", 5))
+        barFeed.dispatch()
+        self.assertEqual(brk.getShares("ins2"), 0)
+        self.__checkEquity(brk, barFeed, False)
+        self.assertEqual(brk.getCash(False), brk.getCash())
+
+        barFeed.dispatch()
+        self.__checkEquity(brk, barFeed, False)
+
+        # Switch to adjusted values.
+        brk.setUseAdjustedValues(True, True)
+        self.__checkEquity(brk, barFeed, True)
+        brk.placeOrder(brk.createMarketOrder(broker.Order.Action.SELL, "ins1", 10))
+        barFeed.dispatch()
+        self.__checkEquity(brk, barFeed, True)
+        self.assertEqual(brk.getEquity(), brk.getCash())
+        barFeed.dispatch()
+        self.__checkEquity(brk, barFeed, True)
+
+    def testBuyAndHoldDoesNotDrift(self):
+        # Position values are updated on every bar, so rounding errors should not add up while the position is open.
+        rnd = random.Random(1234)
+        closes = [rnd.uniform(1, 100) for i in xrange(1000)]
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("ins1", self.__buildBars("ins1", closes))
+        brk = backtesting.Broker(1000, barFeed)
+        brk.getFillStrategy().setVolumeLimit(None)
+        barFeed.start()
+
+        brk.placeOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 3))
+        while not barFeed.eof():
+            barFeed.dispatch()
+            self.assertEqual(brk.getShares("ins1"), 3)
+            self.assertEqual(brk.getEquity(), brk.getCash() + barFeed.getLastBar("ins1").getClose() * 3)
+
+    def testBuyAndHoldMultipleInstruments(self):
+        # Totals are updated incrementally and recalculated periodically, so they should stay in line with the values.
+        rnd = random.Random(1234)
+        instruments = ["ins%d" % i for i in range(1, 6)]
+        barFeed = MemBarFeed(bar.Frequency.DAY)
+        for instrument in instruments:
+            barFeed.addBarsFromSequence(instrument, self.__buildBars(instrument, [rnd.uniform(1, 100) for i in xrange(1000)]))
+        brk = backtesting.Broker(10000, barFeed)
+        brk.getFillStrategy().setVolumeLimit(None)
+        barFeed.start()
+
+        for instrument in instruments:
+            brk.placeOrder(brk.createMarketOrder(broker.Order.Action.BUY, instrument, 3))
+        while not barFeed.eof():
+            barFeed.dispatch()
+            expected = brk.getCash() + math.fsum(barFeed.getLastBar(instrument).getClose() * 3 for instrument in instruments)
+            self.assertAlmostEqual(brk.getEquity(), expected, places=9)
+
+
+class AlwaysFillLimitStrategy(backtesting.DefaultStrategy):
+    def isPriceTriggered(self):
+        return False
+
+    def fillLimitOrder(self, order, broker_, bar):
+        return backtesting.FillInfo(order.getLimitPrice(), order.getRemaining())
+
+
+# Fills stop orders on the bars following the one they were accepted on, regardless of the stop price.
+# Doesn't override isPriceTriggered.
+class DelayedStopStrategy(backtesting.DefaultStrategy):
+    def fillStopOrder(self, order, broker_, bar):
+        if bar.getDateTime() > order.getAcceptedDateTime():
+            return backtesting.FillInfo(order.getStopPrice(), order.getRemaining())
+        return None
+
+
+class OrderIndexTestCase(BaseTestCase):
+    def __buildLimitOrders(self, brk, action, prices):
+        ret = []
+        for price in prices:
+            order = brk.createLimitOrder(action, BaseTestCase.TestInstrument, price, 1)
+            order.setGoodTillCanceled(True)
+            brk.placeOrder(order)
+            ret.append(order)
+        return ret
+
+    def testOrderTrigger(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+
+        order = brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, 1)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        # Submitted orders need to be processed on the next bar.
+        self.assertEqual(backtesting.get_order_trigger(order), None)
+        barFeed.dispatchBars(12, 15, 11, 12)
+        self.assertTrue(order.isAccepted())
+        self.assertEqual(backtesting.get_order_trigger(order), (backtesting.LOW_BOOK, 10))
+
+        order = brk.createStopOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 20, 1)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(12, 15, 11, 12)
+        self.assertEqual(backtesting.get_order_trigger(order), (backtesting.HIGH_BOOK, 20))
+
+        # Orders that may expire are not indexed.
+        order = brk.createLimitOrder(broker.Order.Action.SELL, BaseTestCase.TestInstrument, 20, 1)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(12, 15, 11, 12)
+        self.assertEqual(backtesting.get_order_trigger(order), None)
+
+    def testOnlyTouchedOrdersGetFilled(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.getFillStrategy().setVolumeLimit(None)
+
+        buyOrders = self.__buildLimitOrders(brk, broker.Order.Action.BUY, [5, 9, 7, 8, 6])
+        barFeed.dispatchBars(10, 12, 10, 11)
+        self.assertEqual(len(brk.getActiveOrders()), 5)
+        for order in buyOrders:
+            self.assertTrue(order.isAccepted())
+
+        barFeed.dispatchBars(10, 12, 7, 8)
+        self.assertEqual(len(brk.getActiveOrders()), 2)
+        self.assertEqual([order.isFilled() for order in buyOrders], [False, True, True, True, False])
+        self.assertEqual(brk.getShares(BaseTestCase.TestInstrument), 3)
+
+        # Gapping bar. Both remaining orders get filled at the open price.
+        barFeed.dispatchBars(4, 5, 3, 4)
+        self.assertEqual(len(brk.getActiveOrders()), 0)
+        self.assertEqual(buyOrders[0].getAvgFillPrice(), 4)
+        self.assertEqual(buyOrders[4].getAvgFillPrice(), 4)
+
+        sellOrders = self.__buildLimitOrders(brk, broker.Order.Action.SELL, [8, 6, 5])
+        barFeed.dispatchBars(4, 4.5, 3, 4)
+        self.assertEqual(len(brk.getActiveOrders()), 3)
+        barFeed.dispatchBars(5, 6, 5, 6)
+        self.assertEqual([order.isFilled() for order in sellOrders], [False, True, True])
+        self.assertEqual(len(brk.getActiveOrders()), 1)
+
+        brk.cancelOrder(sellOrders[0])
+        self.assertEqual(len(brk.getActiveOrders()), 0)
+
+    def testStopOrderReindexedOnceHit(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+
+        order = brk.createStopOrder(broker.Order.Action.SELL_SHORT, BaseTestCase.TestInstrument, 8, 10)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 12, 9, 11)
+        self.assertFalse(order.getStopHit())
+
+        # Stop price hit but there is no volume left, so it becomes a market order that needs to be processed
+        # every bar, regardless of its stop price.
+        barFeed.dispatchBars(9, 10, 7, 8, volume=1)
+        self.assertTrue(order.getStopHit())
+        self.assertEqual(order.getFilled(), 0)
+        self.assertEqual(backtesting.get_order_trigger(order), None)
+
+        barFeed.dispatchBars(12, 14, 12, 13)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 12)
+
+    def testFillStrategyNotPriceTriggered(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setFillStrategy(AlwaysFillLimitStrategy())
+
+        orders = self.__buildLimitOrders(brk, broker.Order.Action.BUY, [5, 6])
+        brk.getFillStrategy().setVolumeLimit(None)
+        barFeed.dispatchBars(10, 12, 10, 11)
+        self.assertTrue(orders[0].isFilled())
+        self.assertTrue(orders[1].isFilled())
+        self.assertEqual(brk.getShares(BaseTestCase.TestInstrument), 2)
+
+    def testSubclassNotPriceTriggered(self):
+        self.assertTrue(backtesting.DefaultStrategy().isPriceTriggered())
+        self.assertTrue(backtesting.VolumeParticipationStrategy().isPriceTriggered())
+        self.assertFalse(DelayedStopStrategy().isPriceTriggered())
+
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setFillStrategy(DelayedStopStrategy())
+        brk.getFillStrategy().setVolumeLimit(None)
+
+        order = brk.createStopOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 20, 1)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 12, 10, 11)
+        self.assertTrue(order.isAccepted())
+        # The bar doesn't reach the stop price, but the resting order is not skipped.
+        barFeed.dispatchBars(10, 12, 10, 11)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 20)
+
+
+class SlippageTestCase(BaseTestCase):
+    def testNoSlippage(self):
+        order = backtesting.MarketOrder(1, broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1, False)
+        self.assertEqual(backtesting.NoSlippage().calculatePrice(order, 10, 1, None), 10)
+
+    def testFixedSpread(self):
+        slippage = backtesting.FixedSpread(20)
+        order = backtesting.MarketOrder(1, broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1, False)
+        self.assertEqual(round(slippage.calculatePrice(order, 100, 1, None), 4), 100.1)
+        order = backtesting.MarketOrder(1, broker.Order.Action.SELL_SHORT, BaseTestCase.TestInstrument, 1, False)
+        self.assertEqual(round(slippage.calculatePrice(order, 100, 1, None), 4), 99.9)
+
+    def testSquareRootImpact(self):
+        slippage = backtesting.SquareRootImpact(0.1)
+        bar_ = bar.BasicBar(datetime.datetime(2011, 1, 1), 10, 10, 10, 10, 100, 10, bar.Frequency.DAY)
+        order = backtesting.MarketOrder(1, broker.Order.Action.BUY, BaseTestCase.TestInstrument, 25, False)
+        self.assertEqual(round(slippage.calculatePrice(order, 10, 25, bar_), 4), 10.5)
+        order = backtesting.MarketOrder(1, broker.Order.Action.SELL, BaseTestCase.TestInstrument, 100, False)
+        self.assertEqual(round(slippage.calculatePrice(order, 10, 100, bar_), 4), 9)
+        # No volume, no impact.
+        bar_ = bar.BasicBar(datetime.datetime(2011, 1, 1), 10, 10, 10, 10, 0, 10, bar.Frequency.DAY)
+        self.assertEqual(slippage.calculatePrice(order, 10, 100, bar_), 10)
+
+    def testMarketOrderWithSpread(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.getFillStrategy().setSlippageModel(backtesting.FixedSpread(200))
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 12, 9, 11, volume=1000)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(round(order.getAvgFillPrice(), 4), 10.1)
+        self.assertEqual(round(brk.getCash(), 4), 1000 - 101)
+
+    def testLimitOrderNotFilledBeyondLimit(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.getFillStrategy().setSlippageModel(backtesting.FixedSpread(200))
+
+        order = brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, 10)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        # The limit price is hit, but the spread takes the price beyond the limit.
+        barFeed.dispatchBars(11, 12, 9, 11, volume=1000)
+        self.assertTrue(order.isAccepted())
+        self.assertEqual(order.getFilled(), 0)
+
+        # Opens below the limit price.
+        barFeed.dispatchBars(9, 10, 8, 9, volume=1000)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(round(order.getAvgFillPrice(), 4), 9.09)
+
+
+class VolumeParticipationStrategyTestCase(BaseTestCase):
+    def testFillAcrossBars(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setFillStrategy(backtesting.VolumeParticipationStrategy(0.1))
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 25)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertTrue(order.isPartiallyFilled())
+        self.assertEqual(order.getFilled(), 10)
+        self.assertEqual(order.getExecutionInfo().getPrice(), 11)
+
+        barFeed.dispatchBars(10, 13, 8, 9, volume=100)
+        self.assertEqual(order.getFilled(), 20)
+        self.assertEqual(order.getExecutionInfo().getPrice(), 10)
+
+        barFeed.dispatchBars(10, 13, 8, 12, volume=1000)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getExecutionInfo().getQuantity(), 5)
+        self.assertEqual(order.getAvgFillPrice(), (11 * 10 + 10 * 10 + 11 * 5) / 25.0)
+
+    def testDailyBars(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.DAY)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setFillStrategy(backtesting.VolumeParticipationStrategy(0.1))
+
+        # Orders that are not GTC get canceled after the first bar, so only the first bar's share is filled.
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 25)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertTrue(order.isCanceled())
+        self.assertEqual(order.getFilled(), 10)
+
+        # GTC orders are worked through the following bars.
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 25)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertTrue(order.isPartiallyFilled())
+        self.assertEqual(order.getFilled(), 10)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertEqual(order.getFilled(), 20)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(brk.getShares(BaseTestCase.TestInstrument), 35)
+
+    def testFillOnClose(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setFillStrategy(backtesting.VolumeParticipationStrategy(0.5))
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, True)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 13, 8, 12, volume=100)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 12)
+
+
+class MarginTestCase(BaseTestCase):
+    def __buildBroker(self, cash, margin):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.DAY)
+        brk = self.buildBroker(cash, barFeed)
+        brk.getFillStrategy().setVolumeLimit(None)
+        brk.setMargin(margin)
+        return barFeed, brk
+
+    def testInitialMargin(self):
+        barFeed, brk = self.__buildBroker(1000, backtesting.Margin(initialMargin=0.5))
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 250)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 10, 10, 10)
+        # Not filled and canceled since it is not GTC.
+        self.assertFalse(order.isFilled())
+        self.assertTrue(order.isCanceled())
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 150)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 10, 10, 10)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(brk.getCash(), -500)
+        self.assertEqual(brk.getEquity(), 1000)
+
+        # Reducing the position is always allowed.
+        order = brk.createMarketOrder(broker.Order.Action.SELL, BaseTestCase.TestInstrument, 50)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(5, 5, 5, 5)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(brk.getShares(BaseTestCase.TestInstrument), 100)
+
+    def testBorrowFee(self):
+        margin = backtesting.Margin(borrowRate=0.365)
+        barFeed, brk = self.__buildBroker(1000, margin)
+
+        order = brk.createMarketOrder(broker.Order.Action.SELL_SHORT, BaseTestCase.TestInstrument, 10)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(100, 100, 100, 100)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(brk.getCash(), 2000)
+
+        # 1 day at 0.365 per year on a 1000 short.
+        barFeed.dispatchBars(100, 100, 100, 100)
+        self.assertEqual(round(brk.getCash(), 4), 1999)
+        barFeed.dispatchBars(100, 100, 100, 100)
+        self.assertEqual(round(brk.getCash(), 4), 1998)
+        self.assertEqual(round(brk.getBorrowFees(), 4), 2)
+        self.assertEqual(brk.getInterest(), 0)
+
+    def testInterest(self):
+        margin = backtesting.Margin(creditRate=0.0365, debitRate=0.365)
+        barFeed, brk = self.__buildBroker(1000, margin)
+
+        # 1 day at 0.0365 per year on 1000.
+        barFeed.dispatchBars(10, 10, 10, 10)
+        barFeed.dispatchBars(10, 10, 10, 10)
+        self.assertEqual(round(brk.getCash(), 4), 1000.1)
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 110)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 10, 10, 10)
+        self.assertTrue(order.isFilled())
+        # Another day of interest on 1000.1 was earned before the fill.
+        cash = brk.getCash()
+        self.assertEqual(round(cash, 4), -99.8)
+
+        barFeed.dispatchBars(10, 10, 10, 10)
+        self.assertEqual(round(brk.getCash(), 4), round(cash * 1.001, 4))
+        self.assertEqual(round(brk.getInterest(), 4), round(0.1 + 1000.1 * 0.0001 + cash * 0.001, 4))
+
+    def testSharedMargin(self):
+        # Charges are kept by each broker, so the same Margin can be used for different runs.
+        margin = backtesting.Margin(borrowRate=0.365)
+        for i in range(2):
+            barFeed, brk = self.__buildBroker(1000, margin)
+            order = brk.createMarketOrder(broker.Order.Action.SELL_SHORT, BaseTestCase.TestInstrument, 10)
+            brk.placeOrder(order)
+            barFeed.dispatchBars(100, 100, 100, 100)
+            barFeed.dispatchBars(100, 100, 100, 100)
+            self.assertEqual(round(brk.getBorrowFees(), 4), 1)
+            self.assertEqual(round(brk.getCash(), 4), 1999)
+
+    def testMarginCall(self):
+        barFeed, brk = self.__buildBroker(1000, backtesting.Margin(initialMargin=0.5, maintenanceMargin=0.3))
+        marginCalls = []
+        brk.getMarginCallEvent().subscribe(lambda broker_, requiredEquity: marginCalls.append(requiredEquity))
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 200)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 10, 10, 10)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(len(marginCalls), 0)
+
+        # Equity is 200 * 7 - 1000 = 400. Required is 200 * 7 * 0.3 = 420.
+        barFeed.dispatchBars(7, 7, 7, 7)
+        self.assertEqual(len(marginCalls), 1)
+        self.assertEqual(round(marginCalls[0], 4), 420)
@@ -20,6 +20,7 @@
 
 import unittest
 import datetime
+import os
 
 from pyalgotrade.barfeed import csvfeed
 from pyalgotrade.barfeed import yahoofeed
@@ -291,3 +292,58 @@ class NinjaTraderTestCase(unittest.TestCase):
         self.assertEqual(len(barDS.getHighDataSeries()), 2)
         self.assertEqual(len(barDS.getLowDataSeries()), 2)
         self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
+
+
+class TrustedDataTestCase(unittest.TestCase):
+    # The high price in the second row is lower than the close price.
+    def __writeCSV(self, fileName, header, rows):
+        common.init_temp_path()
+        path = os.path.join(common.get_temp_path(), fileName)
+        with open(path, "w") as f:
+            if header is not None:
+                f.write(header + "\n")
+            for row in rows:
+                f.write(row + "\n")
+        return path
+
+    def __testInvalidBars(self, buildFeed, path):
+        # Without trusted data bars are validated as they get loaded.
+        barFeed = buildFeed()
+        with self.assertRaisesRegexp(Exception, "high < close"):
+            barFeed.addBarsFromCSV("orcl", path)
+
+        # With trusted data bars are built without validation, and validated all at once before they get dispatched.
+        barFeed = buildFeed()
+        barFeed.setTrustedData(True)
+        barFeed.addBarsFromCSV("orcl", path)
+        with self.assertRaisesRegexp(Exception, "Invalid high prices found for orcl"):
+            barFeed.loadAll()
+
+        # Bars loaded without validation are still validated if data is no longer trusted.
+        barFeed = buildFeed()
+        barFeed.setTrustedData(True)
+        barFeed.addBarsFromCSV("orcl", path)
+        barFeed.setTrustedData(False)
+        with self.assertRaisesRegexp(Exception, "Invalid high prices found for orcl"):
+            barFeed.loadAll()
+
+    def testYahoo(self):
+        path = self.__writeCSV("trusted-yahoo.csv", "Date,Open,High,Low,Close,Volume,Adj Close", [
+            "2000-01-04,10,11,9,10,100,10",
+            "2000-01-03,10,11,9,12,100,12",
+        ])
+        self.__testInvalidBars(lambda: yahoofeed.Feed(), path)
+
+    def testGenericCSV(self):
+        path = self.__writeCSV("trusted-generic.csv", "Date Time,Open,High,Low,Close,Volume,Adj Close", [
+            "2013-01-01 13:59:00,10,11,9,10,100,",
+            "2013-01-01 14:00:00,10,11,9,12,100,",
+        ])
+        self.__testInvalidBars(lambda: csvfeed.GenericBarFeed(bar.Frequency.MINUTE), path)
+
+    def testNinjaTrader(self):
+        path = self.__writeCSV("trusted-nt.csv", None, [
+            "20110103 092900;10;11;9;10;100",
+            "20110103 093000;10;11;9;12;100",
+        ])
+        self.__testInvalidBars(lambda: ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE), path)
@@ -139,6 +139,42 @@ class TestSequenceDataSeries(unittest.TestCase):
         self.assertEqual(ds[0], 90)
         self.assertEqual(ds[-1], 99)
 
+    def testDateTimeLookup(self):
+        ds = dataseries.SequenceDataSeries()
+        begin = datetime.datetime(2013, 1, 1)
+        # Every other day.
+        for i in xrange(10):
+            ds.appendWithDateTime(begin + datetime.timedelta(days=i*2), i)
+
+        for i in xrange(10):
+            dateTime = begin + datetime.timedelta(days=i*2)
+            self.assertEqual(ds.indexOf(dateTime), i)
+            self.assertEqual(ds.getValueAt(dateTime), i)
+            self.assertEqual(ds.indexOf(dateTime + datetime.timedelta(days=1)), None)
+            self.assertEqual(ds.getValueAt(dateTime + datetime.timedelta(days=1)), None)
+        self.assertEqual(ds.indexOf(begin - datetime.timedelta(days=1)), None)
+
+        self.assertEqual(ds.slice(), range(10))
+        self.assertEqual(ds.slice(begin + datetime.timedelta(days=4)), range(2, 10))
+        self.assertEqual(ds.slice(begin + datetime.timedelta(days=3)), range(2, 10))
+        self.assertEqual(ds.slice(toDateTime=begin + datetime.timedelta(days=4)), range(3))
+        self.assertEqual(ds.slice(toDateTime=begin + datetime.timedelta(days=5)), range(3))
+        self.assertEqual(ds.slice(begin + datetime.timedelta(days=2), begin + datetime.timedelta(days=6)), [1, 2, 3])
+        self.assertEqual(ds.slice(begin + datetime.timedelta(days=6), begin + datetime.timedelta(days=2)), [])
+        self.assertEqual(ds.slice(begin + datetime.timedelta(days=100)), [])
+
+    def testDateTimeLookupBounded(self):
+        ds = dataseries.SequenceDataSeries(maxLen=3)
+        begin = datetime.datetime(2013, 1, 1)
+        for i in xrange(10):
+            ds.appendWithDateTime(begin + datetime.timedelta(days=i), i)
+
+        self.assertEqual(ds.indexOf(begin), None)
+        self.assertEqual(ds.getValueAt(begin), None)
+        self.assertEqual(ds.indexOf(begin + datetime.timedelta(days=7)), 0)
+        self.assertEqual(ds.getValueAt(begin + datetime.timedelta(days=9)), 9)
+        self.assertEqual(ds.slice(begin, begin + datetime.timedelta(days=8)), [7, 8])
+
 
 class TestBarDataSeries(unittest.TestCase):
     def testEmpty(self):
@@ -160,6 +196,18 @@ class TestBarDataSeries(unittest.TestCase):
             # Adding a previous datetime should fail
             self.assertRaises(Exception, ds.append, bar.BasicBar(now - datetime.timedelta(seconds=i), 0, 0, 0, 0, 0, 0, bar.Frequency.SECOND))
 
+    def testAppendWithoutDateTimeValidation(self):
+        ds = bards.BarDataSeries()
+        ds.setDateTimeValidation(False)
+        self.assertFalse(ds.getDateTimeValidation())
+        self.assertFalse(ds.getCloseDataSeries().getDateTimeValidation())
+        now = datetime.datetime.now()
+        ds.append(bar.BasicBar(now, 0, 0, 0, 0, 0, 0, bar.Frequency.SECOND))
+        # Datetimes are not checked.
+        ds.append(bar.BasicBar(now, 1, 1, 1, 1, 1, 1, bar.Frequency.SECOND))
+        self.assertEqual(len(ds), 2)
+        self.assertEqual(len(ds.getCloseDataSeries()), 2)
+
     def testNonEmpty(self):
         ds = bards.BarDataSeries()
         for i in range(10):
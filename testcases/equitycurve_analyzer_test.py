@@ -0,0 +1,124 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import datetime
+
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.stratanalyzer import equitycurve
+from pyalgotrade.stratanalyzer import sharpe
+from pyalgotrade.stratanalyzer import drawdown
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade import broker
+from pyalgotrade import bar
+
+import strategy_test
+import common
+
+
+class EquityCurveTestCase(unittest.TestCase):
+    def __attachAnalyzers(self, strat):
+        ret = {
+            "equity": equitycurve.EquityCurve(),
+            "sharpe": sharpe.SharpeRatio(),
+            "sharpeNotDaily": sharpe.SharpeRatio(False),
+            "drawdown": drawdown.DrawDown(),
+            "returns": returns.Returns(),
+        }
+        for analyzer in ret.values():
+            strat.attachAnalyzer(analyzer)
+        return ret
+
+    def __checkAnalyzers(self, analyzers):
+        equityCurve = analyzers["equity"]
+        for riskFreeRate in [0, 0.04]:
+            for annualized in [True, False]:
+                self.assertAlmostEqual(equityCurve.getSharpeRatio(riskFreeRate, annualized), analyzers["sharpe"].getSharpeRatio(riskFreeRate, annualized))
+                self.assertAlmostEqual(equityCurve.getSharpeRatio(riskFreeRate, annualized, False), analyzers["sharpeNotDaily"].getSharpeRatio(riskFreeRate, annualized))
+        self.assertAlmostEqual(equityCurve.getMaxDrawDown(), analyzers["drawdown"].getMaxDrawDown())
+        self.assertEqual(equityCurve.getLongestDrawDownDuration(), analyzers["drawdown"].getLongestDrawDownDuration())
+
+        returnsDS = analyzers["returns"].getReturns()
+        cumReturnsDS = analyzers["returns"].getCumulativeReturns()
+        # The dataseries only keep the last values.
+        for i in xrange(1, len(returnsDS) + 1):
+            self.assertAlmostEqual(equityCurve.getReturns()[-i], returnsDS[-i])
+            self.assertAlmostEqual(equityCurve.getCumulativeReturns()[-i], cumReturnsDS[-i])
+
+    def testDailyBars(self):
+        initialCash = 42.09
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("ige", common.get_data_file_path("sharpe-ratio-test-ige.csv"))
+        strat = strategy_test.TestStrategy(barFeed, initialCash)
+        strat.setUseAdjustedValues(True)
+        strat.setBrokerOrdersGTC(True)
+        strat.getBroker().getFillStrategy().setVolumeLimit(None)
+        analyzers = self.__attachAnalyzers(strat)
+
+        order = strat.getBroker().createMarketOrder(broker.Order.Action.BUY, "ige", 1, True)
+        order.setGoodTillCanceled(True)
+        strat.getBroker().placeOrder(order)
+        strat.addOrder(datetime.datetime(2007, 11, 13), strat.getBroker().createMarketOrder, broker.Order.Action.SELL, "ige", 1, True)
+        strat.run()
+
+        self.__checkAnalyzers(analyzers)
+        self.assertEqual(round(analyzers["equity"].getSharpeRatio(0.04, True), 4), 0.7889)
+        self.assertEqual(round(analyzers["equity"].getMaxDrawDown(), 5), 0.31178)
+        self.assertEqual(analyzers["equity"].getLongestDrawDownDuration(), datetime.timedelta(days=623))
+        self.assertEqual(analyzers["equity"].getDateTimes()[0], datetime.datetime(2001, 11, 26))
+        self.assertTrue(analyzers["equity"].getSortinoRatio(0.04) > analyzers["equity"].getSharpeRatio(0.04))
+
+    def testIntradayBars(self):
+        barFeed = ninjatraderfeed.Feed(bar.Frequency.MINUTE)
+        barFeed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+        strat = strategy_test.TestStrategy(barFeed, 1000)
+        strat.getBroker().getFillStrategy().setVolumeLimit(None)
+        analyzers = self.__attachAnalyzers(strat)
+
+        strat.getBroker().placeOrder(strat.getBroker().createMarketOrder(broker.Order.Action.BUY, "spy", 5))
+        strat.run()
+
+        self.__checkAnalyzers(analyzers)
+        self.assertTrue(len(analyzers["equity"].getDailyReturns()) < len(analyzers["equity"].getReturns()))
+
+    def testRollingReturns(self):
+        analyzer = equitycurve.EquityCurve()
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("ige", common.get_data_file_path("sharpe-ratio-test-ige.csv"))
+        strat = strategy_test.TestStrategy(barFeed, 1000)
+        strat.attachAnalyzer(analyzer)
+        strat.getBroker().placeOrder(strat.getBroker().createMarketOrder(broker.Order.Action.BUY, "ige", 5))
+        strat.run()
+
+        equity = analyzer.getEquity()
+        rollingReturns = analyzer.getRollingReturns(5)
+        self.assertEqual(len(rollingReturns), len(equity) - 5)
+        self.assertAlmostEqual(rollingReturns[0], equity[5] / equity[0] - 1)
+        self.assertAlmostEqual(rollingReturns[-1], equity[-1] / equity[-6] - 1)
+
+    def testNoBars(self):
+        analyzer = equitycurve.EquityCurve()
+        self.assertEqual(len(analyzer.getReturns()), 0)
+        self.assertEqual(len(analyzer.getDailyReturns()), 0)
+        self.assertEqual(analyzer.getSharpeRatio(0), 0)
+        self.assertEqual(analyzer.getSortinoRatio(0), 0)
+        self.assertEqual(analyzer.getMaxDrawDown(), 0)
+        self.assertEqual(analyzer.getLongestDrawDownDuration(), datetime.timedelta())
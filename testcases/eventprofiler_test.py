@@ -20,6 +20,8 @@
 
 import unittest
 import datetime
+import csv
+import numpy as np
 from pyalgotrade import eventprofiler
 from pyalgotrade.barfeed import yahoofeed
 import common
@@ -77,3 +79,100 @@ class EventProfilerTestCase(unittest.TestCase):
         self.assertEqual(eventProfiler.getResults().getEventCount(), 1)
         self.assertEqual(eventProfiler.getResults().getValues(0)[0], 1.0)
         self.assertEqual(round(eventProfiler.getResults().getValues(5)[0], 5), round(1.016745541, 5))
+
+
+def load_adj_close(path):
+    rows = sorted(csv.DictReader(open(path, "r")), key=lambda row: row["Date"])
+    dates = [datetime.datetime.strptime(row["Date"], "%Y-%m-%d").date() for row in rows]
+    return dates, np.array([float(row["Adj Close"]) for row in rows])
+
+
+class BatchProfilerTestCase(unittest.TestCase):
+    def testComputeReturns(self):
+        returns = eventprofiler.compute_returns([[1, 2], [2, 2], [1, 3]])
+        self.assertTrue(np.isnan(returns[0]).all())
+        self.assertEqual(returns[1:].tolist(), [[1, 0], [-0.5, 0.5]])
+
+    def testSameResultsAsProfiler(self):
+        dates, prices = load_adj_close(common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        # Every 7th day is an event, including the ones on the boundary.
+        eventDates = dates[::7]
+
+        feed = yahoofeed.Feed()
+        feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        eventProfiler = eventprofiler.Profiler(Predicate(eventDates), 5, 5)
+        eventProfiler.run(feed, True)
+        expected = eventProfiler.getResults()
+
+        # Use two columns with the same prices, and one without events.
+        events = np.zeros((len(dates), 3), dtype=bool)
+        events[::7, 0] = True
+        events[::7, 1] = True
+        returns = eventprofiler.compute_returns(np.column_stack([prices, prices, prices]))
+        batchProfiler = eventprofiler.BatchProfiler(5, 5)
+        batchProfiler.run(events, returns)
+        results = batchProfiler.getResults()
+
+        self.assertEqual(results.getEventCount(), expected.getEventCount() * 2)
+        self.assertTrue(expected.getEventCount() > 0)
+        for t in range(-5, 6):
+            self.assertTrue(np.allclose(sorted(results.getValues(t)), sorted(expected.getValues(t) * 2)))
+
+    def testMultipleRuns(self):
+        events = np.zeros((20, 2), dtype=bool)
+        events[5, 0] = True
+        events[10, 1] = True
+        returns = np.arange(40, dtype=float).reshape((20, 2))
+
+        expected = eventprofiler.BatchProfiler(2, 2)
+        expected.run(events, returns)
+        self.assertEqual(expected.getResults().getEventCount(), 2)
+
+        # Run once for each instrument.
+        batchProfiler = eventprofiler.BatchProfiler(2, 2)
+        batchProfiler.run(events[:, :1], returns[:, :1])
+        batchProfiler.run(events[:, 1:], returns[:, 1:])
+        self.assertEqual(batchProfiler.getResults().getEventCount(), 2)
+        for t in range(-2, 3):
+            self.assertEqual(sorted(batchProfiler.getResults().getValues(t)), sorted(expected.getResults().getValues(t)))
+
+    def testMissingReturns(self):
+        events = np.zeros((20, 1), dtype=bool)
+        events[10] = True
+        returns = np.zeros((20, 1))
+        returns[13] = np.NAN
+        batchProfiler = eventprofiler.BatchProfiler(2, 2)
+        batchProfiler.run(events, returns)
+        self.assertEqual(batchProfiler.getResults().getEventCount(), 1)
+
+        batchProfiler = eventprofiler.BatchProfiler(2, 3)
+        batchProfiler.run(events, returns)
+        self.assertEqual(batchProfiler.getResults().getEventCount(), 0)
+        self.assertEqual(batchProfiler.getResults().getValues(0), [])
+
+
+def build_feed(instruments):
+    feed = yahoofeed.Feed()
+    for instrument in instruments:
+        feed.addBarsFromCSV(instrument, common.get_data_file_path("%s-2011-yahoofinance.csv" % instrument))
+    return feed
+
+
+class DatePredicate(Predicate):
+    def __init__(self, feed):
+        Predicate.__init__(self, [datetime.date(2011, 1, 11), datetime.date(2011, 6, 1), datetime.date(2011, 6, 2)])
+
+
+class ParallelProfilerTestCase(unittest.TestCase):
+    def testSameResultsAsProfiler(self):
+        instruments = ["goog", "spy", "nikkei"]
+        eventProfiler = eventprofiler.Profiler(DatePredicate(None), 5, 5)
+        eventProfiler.run(build_feed(instruments), True)
+        expected = eventProfiler.getResults()
+        self.assertEqual(expected.getEventCount(), 8)
+
+        for workerCount in [1, 2, 5]:
+            results = eventprofiler.run_parallel(DatePredicate, build_feed, instruments, 5, 5, workerCount=workerCount)
+            self.assertEqual(results.getEventCount(), expected.getEventCount())
+            for t in range(-5, 6):
+                self.assertEqual(sorted(results.getValues(t)), sorted(expected.getValues(t)))
@@ -0,0 +1,120 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import datetime
+
+from pyalgotrade.barfeed import membf
+from pyalgotrade import bar
+
+
+def build_bars(dateTimes):
+    ret = []
+    for i, dateTime in enumerate(dateTimes):
+        ret.append(bar.BasicBar(dateTime, i, i, i, i, i, i, bar.Frequency.DAY))
+    return ret
+
+
+class MemBarFeedTestCase(unittest.TestCase):
+    def __getDateTimes(self, barFeed):
+        ret = []
+        for dateTime, bars in barFeed:
+            ret.append(dateTime)
+        return ret
+
+    def testSortedChunks(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(30)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[:10]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[10:20]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[20:]))
+        self.assertEqual(self.__getDateTimes(barFeed), dateTimes)
+
+    def testUnsortedChunks(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(30)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[20:]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[:10]))
+        barFeed.addBarsFromSequence("orcl", build_bars(list(reversed(dateTimes[10:20]))))
+        self.assertEqual(self.__getDateTimes(barFeed), dateTimes)
+        self.assertEqual(barFeed.getBarsLeft(), 0)
+
+    def testMultipleInstruments(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(10)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[5:]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[:5]))
+        barFeed.addBarsFromSequence("ige", build_bars(dateTimes[::2]))
+        self.assertEqual(self.__getDateTimes(barFeed), dateTimes)
+        self.assertEqual(len(barFeed["orcl"]), 10)
+        self.assertEqual(len(barFeed["ige"]), 5)
+
+    def testAddAfterStart(self):
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars([datetime.datetime(2013, 1, 1)]))
+        barFeed.start()
+        with self.assertRaises(Exception):
+            barFeed.addBarsFromSequence("orcl", build_bars([datetime.datetime(2013, 1, 2)]))
+
+    def testTrustedData(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(30)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.setTrustedData(True)
+        self.assertTrue(barFeed.getTrustedData())
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[10:]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[:10]))
+        barFeed.addBarsFromSequence("ige", build_bars(dateTimes[::3]))
+        self.assertEqual(self.__getDateTimes(barFeed), dateTimes)
+        self.assertFalse(barFeed["orcl"].getDateTimeValidation())
+        self.assertEqual(len(barFeed["orcl"]), 30)
+        self.assertEqual(len(barFeed["ige"]), 10)
+
+    def testTrustedDataWithDuplicates(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(10)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[5:6]))
+        barFeed.setTrustedData(True)
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for orcl"):
+            barFeed.start()
+
+    def testTrustedDataWithInvalidPrices(self):
+        dateTime = datetime.datetime(2013, 1, 1)
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.setTrustedData(True)
+        barFeed.addBarsFromSequence("orcl", [bar.BasicBar(dateTime, 10, 9, 8, 9, 1, 9, bar.Frequency.DAY, False)])
+        with self.assertRaisesRegexp(Exception, "Invalid high prices found for orcl"):
+            barFeed.start()
+
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.setTrustedData(True)
+        barFeed.addBarsFromSequence("orcl", [bar.BasicBar(dateTime, 10, 11, 10.5, 11, 1, 11, bar.Frequency.DAY, False)])
+        with self.assertRaisesRegexp(Exception, "Invalid low prices found for orcl"):
+            barFeed.start()
+
+    def testGetAllBars(self):
+        dateTimes = [datetime.datetime(2013, 1, 1) + datetime.timedelta(days=i) for i in xrange(10)]
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[5:]))
+        barFeed.addBarsFromSequence("orcl", build_bars(dateTimes[:5]))
+        self.assertEqual([currentBar.getDateTime() for currentBar in barFeed.getAllBars("orcl")], dateTimes)
+        self.assertEqual(barFeed.getAllBars("ige"), [])
+        # Bars are still dispatched.
+        self.assertEqual(self.__getDateTimes(barFeed), dateTimes)
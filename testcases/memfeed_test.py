@@ -52,3 +52,20 @@ class MemFeedTestCase(unittest.TestCase):
         self.assertFalse("dt" in feed)
         self.assertEqual(feed["i"][0], 0)
         self.assertEqual(feed["i"][-1], 99)
+
+    def testUnsortedValues(self):
+        now = datetime.datetime.now()
+        values = [(now + datetime.timedelta(seconds=i), {"i": i}) for i in xrange(100)]
+
+        feed = memfeed.MemFeed()
+        feed.addValues(values[50:])
+        feed.addValues(values[:50])
+
+        dispatcher = observer.Dispatcher()
+        dispatcher.addSubject(feed)
+        dispatcher.run()
+
+        self.assertEqual(len(feed["i"]), 100)
+        for i in xrange(100):
+            self.assertEqual(feed["i"][i], i)
+            self.assertEqual(feed["i"].getDateTimes()[i], values[i][0])
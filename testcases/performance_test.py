@@ -27,6 +27,7 @@ from pyalgotrade.technical import stats
 
 import os
 import datetime
+import pickle
 
 import sys
 sys.path.append("samples")
@@ -82,11 +83,32 @@ def run_stddev():
         pass
 
 
+def get_object_size(obj):
+    ret = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        ret += sys.getsizeof(obj.__dict__)
+    return ret
+
+
+def run_bar_memory():
+    count = 100000
+    bars = []
+    dateTime = datetime.datetime(2013, 1, 1)
+    for i in xrange(count):
+        basicBar = bar.BasicBar(dateTime + datetime.timedelta(minutes=i), 10, 12, 9, 11, 1000, 11, bar.Frequency.MINUTE)
+        bars.append(bar.Bars({instrument: basicBar}))
+
+    print "Bytes per BasicBar:", get_object_size(bars[0][instrument])
+    print "Bytes per Bars:", get_object_size(bars[0])
+    print "Pickled bytes per Bars:", len(pickle.dumps(bars)) / float(count)
+
+
 def main():
     # Run only one of these.
     # run_smacross_strategy()
     run_sma()
     # run_stddev()
+    # run_bar_memory()
 
 
 def profile(method):
@@ -22,18 +22,75 @@ import unittest
 import datetime
 import os
 
+import pytz
+
 import pyalgotrade.mtgox.barfeed as mtgoxfeed
 from pyalgotrade.barfeed import ninjatraderfeed
 from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import resampled as resampledbf
+from pyalgotrade import barfeed
 from pyalgotrade.tools import resample
 from pyalgotrade import marketsession
 from pyalgotrade.utils import dt
 from pyalgotrade.dataseries import resampled
 from pyalgotrade.dataseries import bards
 from pyalgotrade import bar
+from pyalgotrade import observer
 import common
 
 
+class RealTimeBarFeed(barfeed.BaseBarFeed):
+    def __init__(self, instrument):
+        barfeed.BaseBarFeed.__init__(self, bar.Frequency.TRADE)
+        self.registerInstrument(instrument)
+        self.__instrument = instrument
+        self.__bars = []
+
+    def addBar(self, bar_):
+        self.__bars.append(bar_)
+        self.dispatch()
+
+    # Queue a bar that will be dispatched when the ResampledBarFeed pulls it.
+    def queueBar(self, bar_):
+        self.__bars.append(bar_)
+
+    def barsHaveAdjClose(self):
+        return False
+
+    def isRealTime(self):
+        return True
+
+    def getNextBars(self):
+        ret = None
+        if len(self.__bars):
+            ret = bar.Bars({self.__instrument: self.__bars.pop(0)})
+        return ret
+
+    def peekDateTime(self):
+        return None
+
+    def eof(self):
+        return len(self.__bars) == 0
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    def join(self):
+        self.joined = True
+
+
+class ResampledBarFeed(resampledbf.ResampledBarFeed):
+    def __init__(self, *args, **kwargs):
+        resampledbf.ResampledBarFeed.__init__(self, *args, **kwargs)
+        self.now = datetime.datetime(2013, 1, 1)
+
+    def getCurrentDateTime(self):
+        return self.now
+
+
 class ResampleTestCase(unittest.TestCase):
     def testSlotDateTime(self):
         # 1 minute
@@ -46,6 +103,93 @@ class ResampleTestCase(unittest.TestCase):
         self.assertEqual(resampled.get_slot_datetime(datetime.datetime(2011, 1, 1, 1, 1, 1), 60*60*24), datetime.datetime(2011, 1, 1))
         self.assertEqual(resampled.get_slot_datetime(datetime.datetime(2011, 1, 1, 1, 1, 1, microsecond=1), 60*60*24), datetime.datetime(2011, 1, 1))
 
+    def testSlotCalendarIntraday(self):
+        calendar = resampled.SlotCalendar(bar.Frequency.MINUTE)
+        self.assertTrue(calendar.update(datetime.datetime(2011, 1, 1, 1, 1, 1)))
+        self.assertEqual(calendar.getSlotDateTime(), datetime.datetime(2011, 1, 1, 1, 1))
+        self.assertFalse(calendar.update(datetime.datetime(2011, 1, 1, 1, 1, 59, microsecond=1)))
+        self.assertTrue(calendar.update(datetime.datetime(2011, 1, 1, 1, 2)))
+        self.assertEqual(calendar.getSlotDateTime(), datetime.datetime(2011, 1, 1, 1, 2))
+
+        # Slot datetimes match get_slot_datetime for naive and UTC datetimes.
+        for frequency in [bar.Frequency.MINUTE, bar.Frequency.HOUR, bar.Frequency.MINUTE * 7]:
+            calendar = resampled.SlotCalendar(frequency)
+            for dateTime in [datetime.datetime(2011, 1, 1, 1, 1, 1), dt.as_utc(datetime.datetime(2011, 1, 1, 2, 3, 4))]:
+                calendar.update(dateTime)
+                self.assertEqual(calendar.getSlotDateTime(), resampled.get_slot_datetime(dateTime, frequency))
+
+    def testSlotCalendarIntradayTimezone(self):
+        # Intraday slots are aligned to the epoch, and the slot datetime is the same instant in the bar's timezone.
+        timezone = marketsession.USEquities.getTimezone()
+        calendar = resampled.SlotCalendar(bar.Frequency.HOUR)
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 7, 1, 10, 30), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 7, 1, 10), timezone))
+        self.assertEqual(calendar.getSlotDateTime().astimezone(pytz.utc), dt.as_utc(datetime.datetime(2013, 7, 1, 14)))
+        self.assertFalse(calendar.update(dt.localize(datetime.datetime(2013, 7, 1, 10, 59), timezone)))
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 7, 1, 11), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 7, 1, 11), timezone))
+
+        # Timezones with a half hour offset get slots that start at half past the hour in local time.
+        timezone = pytz.timezone("Asia/Kolkata")
+        calendar = resampled.SlotCalendar(bar.Frequency.HOUR)
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 7, 1, 10, 15), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 7, 1, 9, 30), timezone))
+
+    def testSlotCalendarDailySession(self):
+        timezone = marketsession.USEquities.getTimezone()
+        calendar = resampled.SlotCalendar(bar.Frequency.DAY, timezone, datetime.time(9, 30))
+
+        # Before the session starts the bar belongs to the previous session.
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 3, 8, 9, 29), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 3, 7, 9, 30), timezone))
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 3, 8, 9, 30), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 3, 8, 9, 30), timezone))
+        self.assertFalse(calendar.update(dt.localize(datetime.datetime(2013, 3, 8, 16), timezone)))
+        # UTC datetimes are mapped to the session calendar.
+        self.assertFalse(calendar.update(dt.as_utc(datetime.datetime(2013, 3, 9, 13))))
+        # Across the DST change sessions still start at 9:30 local time.
+        self.assertTrue(calendar.update(dt.localize(datetime.datetime(2013, 3, 11, 9, 30), timezone)))
+        self.assertEqual(calendar.getSlotDateTime(), dt.localize(datetime.datetime(2013, 3, 11, 9, 30), timezone))
+        self.assertEqual(calendar.getSlotDateTime().astimezone(pytz.utc), dt.as_utc(datetime.datetime(2013, 3, 11, 13, 30)))
+        self.assertFalse(calendar.update(dt.as_utc(datetime.datetime(2013, 3, 12, 13, 29))))
+        self.assertTrue(calendar.update(dt.as_utc(datetime.datetime(2013, 3, 12, 13, 30))))
+
+        # Naive datetimes are assumed to be in the calendar's timezone.
+        calendar = resampled.SlotCalendar(bar.Frequency.DAY, timezone, datetime.time(9, 30))
+        self.assertTrue(calendar.update(datetime.datetime(2013, 3, 11, 9, 30)))
+        self.assertEqual(calendar.getSlotDateTime(), datetime.datetime(2013, 3, 11, 9, 30))
+        self.assertFalse(calendar.update(datetime.datetime(2013, 3, 12, 9, 29)))
+
+    def testSlotCalendarWeekly(self):
+        calendar = resampled.SlotCalendar(bar.Frequency.WEEK)
+        # 2013-12-02 is a Monday.
+        self.assertTrue(calendar.update(datetime.datetime(2013, 12, 4, 10)))
+        self.assertEqual(calendar.getSlotDateTime(), datetime.datetime(2013, 12, 2))
+        self.assertFalse(calendar.update(datetime.datetime(2013, 12, 8, 23, 59)))
+        self.assertTrue(calendar.update(datetime.datetime(2013, 12, 9)))
+        self.assertEqual(calendar.getSlotDateTime(), datetime.datetime(2013, 12, 9))
+
+    def testSlotCalendarInvalidFrequency(self):
+        with self.assertRaises(Exception):
+            resampled.SlotCalendar(0)
+
+    def testResampleSession(self):
+        timezone = marketsession.USEquities.getTimezone()
+        barDs = bards.BarDataSeries()
+        resampledBarDS = resampled.ResampledBarDataSeries(barDs, bar.Frequency.DAY, timezone=timezone, sessionStart=datetime.time(9, 30))
+
+        barDs.append(bar.BasicBar(dt.localize(datetime.datetime(2013, 3, 8, 9, 30), timezone), 2, 3, 1, 2, 10, 2, bar.Frequency.HOUR))
+        barDs.append(bar.BasicBar(dt.localize(datetime.datetime(2013, 3, 8, 15, 30), timezone), 2, 4, 1, 3, 10, 3, bar.Frequency.HOUR))
+        barDs.append(bar.BasicBar(dt.localize(datetime.datetime(2013, 3, 11, 9, 30), timezone), 3, 3, 3, 3, 10, 3, bar.Frequency.HOUR))
+        resampledBarDS.pushLast()
+
+        self.assertEqual(len(resampledBarDS), 2)
+        self.assertEqual(resampledBarDS[0].getDateTime(), dt.localize(datetime.datetime(2013, 3, 8, 9, 30), timezone))
+        self.assertEqual(resampledBarDS[0].getHigh(), 4)
+        self.assertEqual(resampledBarDS[0].getClose(), 3)
+        self.assertEqual(resampledBarDS[0].getVolume(), 20)
+        self.assertEqual(resampledBarDS[1].getDateTime(), dt.localize(datetime.datetime(2013, 3, 11, 9, 30), timezone))
+
     def testResample(self):
         barDs = bards.BarDataSeries()
         resampledBarDS = resampled.ResampledBarDataSeries(barDs, bar.Frequency.MINUTE)
@@ -199,3 +343,124 @@ class ResampleTestCase(unittest.TestCase):
         self.assertEqual(len(resampledBarDS), len(feed["spy"]))
         self.assertEqual(resampledBarDS[0].getDateTime(), dt.as_utc(datetime.datetime(2011, 1, 3)))
         self.assertEqual(resampledBarDS[-1].getDateTime(), dt.as_utc(datetime.datetime(2011, 2, 1)))
+
+    def testResampleMultipleInstrumentsAndFrequencies(self):
+        # Resample everything in a single pass.
+        feed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+        feed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+        feed.addBarsFromCSV("spy2", common.get_data_file_path("nt-spy-minute-2011.csv"))
+        csvFilePattern = os.path.join(common.get_temp_path(), "multi-%(instrument)s-%(frequency)d.csv")
+        resample.resample_to_csv_files(feed, [bar.Frequency.HOUR, bar.Frequency.DAY], csvFilePattern)
+
+        # Resample each frequency using the single instrument version and compare.
+        for frequency in [bar.Frequency.HOUR, bar.Frequency.DAY]:
+            feed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+            feed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+            resampledFile = os.path.join(common.get_temp_path(), "single-spy-%d.csv" % (frequency))
+            resample.resample_to_csv(feed, frequency, resampledFile)
+
+            expected = open(resampledFile).read()
+            for instrument in ["spy", "spy2"]:
+                actual = open(csvFilePattern % {"instrument": instrument, "frequency": frequency}).read()
+                self.assertEqual(actual, expected)
+
+    def testResampleNoBars(self):
+        feed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+        feed.addBarsFromSequence("spy", [])
+        resampledFile = os.path.join(common.get_temp_path(), "empty-spy.csv")
+        resample.resample_to_csv(feed, bar.Frequency.HOUR, resampledFile)
+        self.assertEqual(open(resampledFile).read(), "Date Time,Open,High,Low,Close,Volume,Adj Close" + os.linesep)
+
+    def testResampleInvalidFrequency(self):
+        feed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+        feed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+        with self.assertRaises(Exception):
+            resample.resample_to_csv_files(feed, [bar.Frequency.HOUR, 0], "%(instrument)s-%(frequency)d.csv")
+
+
+class ResampledBarFeedTestCase(unittest.TestCase):
+    def __buildTrade(self, dateTime, price, volume):
+        return bar.BasicBar(dateTime, price, price, price, price, volume, price, bar.Frequency.TRADE)
+
+    def testResample(self):
+        source = RealTimeBarFeed("BTC")
+        feed = ResampledBarFeed(source, bar.Frequency.MINUTE)
+        dispatched = []
+        feed.getNewBarsEvent().subscribe(lambda dateTime, bars: dispatched.append(bars["BTC"]))
+
+        feed.now = datetime.datetime(2013, 1, 1, 0, 0, 10)
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 0, 1), 10, 1))
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 0, 2), 12, 1))
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 0, 3), 9, 2))
+        # Nothing is dispatched until the slot is complete.
+        self.assertTrue(feed.eof())
+        self.assertEqual(len(dispatched), 0)
+
+        # A trade in the next slot completes the previous one.
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 1, 1), 11, 1))
+        self.assertFalse(feed.eof())
+        feed.dispatch()
+        self.assertTrue(feed.eof())
+        self.assertEqual(len(dispatched), 1)
+        self.assertEqual(dispatched[0].getDateTime(), datetime.datetime(2013, 1, 1))
+        self.assertEqual(dispatched[0].getOpen(), 10)
+        self.assertEqual(dispatched[0].getHigh(), 12)
+        self.assertEqual(dispatched[0].getLow(), 9)
+        self.assertEqual(dispatched[0].getClose(), 9)
+        self.assertEqual(dispatched[0].getVolume(), 4)
+        self.assertEqual(dispatched[0].getFrequency(), bar.Frequency.MINUTE)
+
+        # The slot is completed when its time is over, even if no trades arrive.
+        feed.now = datetime.datetime(2013, 1, 1, 0, 1, 59)
+        self.assertTrue(feed.eof())
+        feed.now = datetime.datetime(2013, 1, 1, 0, 2)
+        self.assertFalse(feed.eof())
+        feed.dispatch()
+        self.assertEqual(len(dispatched), 2)
+        self.assertEqual(dispatched[1].getDateTime(), datetime.datetime(2013, 1, 1, 0, 1))
+        self.assertEqual(dispatched[1].getClose(), 11)
+        self.assertEqual(feed["BTC"][-1].getDateTime(), datetime.datetime(2013, 1, 1, 0, 1))
+
+        # Late trades for a completed slot are discarded.
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 1, 59), 100, 1))
+        source.addBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 2, 30), 13, 1))
+        feed.now = datetime.datetime(2013, 1, 1, 0, 3)
+        self.assertFalse(feed.eof())
+        feed.dispatch()
+        self.assertTrue(feed.eof())
+        self.assertEqual(len(dispatched), 3)
+        self.assertEqual(dispatched[2].getDateTime(), datetime.datetime(2013, 1, 1, 0, 2))
+        self.assertEqual(dispatched[2].getHigh(), 13)
+        self.assertEqual(len(feed["BTC"]), 3)
+        self.assertEqual(len(source["BTC"]), 6)
+
+    def testDispatcher(self):
+        # The source doesn't dispatch itself, so the resampled feed has to drive it.
+        source = RealTimeBarFeed("BTC")
+        source.queueBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 0, 1), 10, 1))
+        source.queueBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 0, 30), 12, 2))
+        source.queueBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 1, 1), 11, 1))
+        source.queueBar(self.__buildTrade(datetime.datetime(2013, 1, 1, 0, 2, 1), 13, 3))
+        feed = ResampledBarFeed(source, bar.Frequency.MINUTE)
+        feed.now = datetime.datetime(2013, 1, 1, 0, 2, 30)
+        dispatched = []
+        feed.getNewBarsEvent().subscribe(lambda dateTime, bars: dispatched.append(bars["BTC"]))
+
+        dispatcher = observer.Dispatcher()
+        dispatcher.addSubject(feed)
+        dispatcher.run()
+
+        self.assertTrue(source.started)
+        self.assertTrue(source.stopped)
+        self.assertTrue(source.joined)
+        self.assertEqual(len(source["BTC"]), 4)
+        self.assertEqual([bar_.getDateTime() for bar_ in dispatched], [datetime.datetime(2013, 1, 1), datetime.datetime(2013, 1, 1, 0, 1)])
+        self.assertEqual(dispatched[0].getVolume(), 3)
+        self.assertEqual(dispatched[0].getClose(), 12)
+        self.assertEqual(dispatched[1].getClose(), 11)
+
+    def testInvalidParameters(self):
+        with self.assertRaises(Exception):
+            resampledbf.ResampledBarFeed(RealTimeBarFeed("BTC"), 0)
+        with self.assertRaises(Exception):
+            resampledbf.ResampledBarFeed(ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE), bar.Frequency.HOUR)
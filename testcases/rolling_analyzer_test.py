@@ -0,0 +1,83 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import datetime
+import math
+
+import numpy as np
+
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.stratanalyzer import rolling
+from pyalgotrade.stratanalyzer import equitycurve
+from pyalgotrade import broker
+
+import strategy_test
+import common
+
+
+class WindowMaxTestCase(unittest.TestCase):
+    def testWindowMax(self):
+        values = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3, 2, 3, 8, 4]
+        for windowSize in [1, 2, 3, 5]:
+            windowMax = rolling.WindowMax(windowSize)
+            for i, value in enumerate(values):
+                windowMax.append(value)
+                self.assertEqual(windowMax.getMax(), max(values[max(0, i - windowSize + 1):i + 1]))
+
+
+class RollingMetricsTestCase(unittest.TestCase):
+    def testIGE(self):
+        windowSize = 20
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("ige", common.get_data_file_path("sharpe-ratio-test-ige.csv"))
+        strat = strategy_test.TestStrategy(barFeed, 1000)
+        strat.getBroker().getFillStrategy().setVolumeLimit(None)
+        rollingMetrics = rolling.RollingMetrics(windowSize, riskFreeRate=0.04, maxLen=2000)
+        equityCurve = equitycurve.EquityCurve()
+        strat.attachAnalyzer(rollingMetrics)
+        strat.attachAnalyzer(equityCurve)
+
+        strat.getBroker().placeOrder(strat.getBroker().createMarketOrder(broker.Order.Action.BUY, "ige", 10))
+        strat.addOrder(datetime.datetime(2004, 6, 1), strat.getBroker().createMarketOrder, broker.Order.Action.SELL, "ige", 10)
+        strat.addOrder(datetime.datetime(2005, 6, 1), strat.getBroker().createMarketOrder, broker.Order.Action.SELL_SHORT, "ige", 5)
+        strat.run()
+
+        returns = equityCurve.getReturns()
+        equity = equityCurve.getEquity()
+        self.assertEqual(len(rollingMetrics.getSharpeRatio()), len(returns))
+        self.assertEqual(rollingMetrics.getSharpeRatio().getDateTimes()[-1], datetime.datetime(2007, 11, 14))
+        for i in xrange(windowSize - 1):
+            self.assertEqual(rollingMetrics.getSharpeRatio()[i], None)
+            self.assertEqual(rollingMetrics.getVolatility()[i], None)
+            self.assertEqual(rollingMetrics.getDrawDown()[i], None)
+            self.assertEqual(rollingMetrics.getHitRate()[i], None)
+
+        for i in xrange(windowSize - 1, len(returns)):
+            window = returns[i - windowSize + 1:i + 1]
+            stdDev = window.std(ddof=1)
+            if stdDev != 0:
+                expectedSharpe = (window.mean() - 0.04 / 252) / stdDev * math.sqrt(252)
+            else:
+                expectedSharpe = 0
+            self.assertAlmostEqual(rollingMetrics.getSharpeRatio()[i], expectedSharpe, places=6)
+            self.assertAlmostEqual(rollingMetrics.getVolatility()[i], stdDev * math.sqrt(252))
+            self.assertAlmostEqual(rollingMetrics.getDrawDown()[i], 1 - equity[i] / equity[i - windowSize + 1:i + 1].max())
+            self.assertAlmostEqual(rollingMetrics.getHitRate()[i], np.count_nonzero(window > 0) / float(windowSize))
@@ -25,6 +25,9 @@ import pytz
 from pyalgotrade import strategy
 from pyalgotrade import barfeed
 from pyalgotrade import broker
+from pyalgotrade import stratanalyzer
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
 from pyalgotrade.barfeed import csvfeed
 from pyalgotrade.barfeed import yahoofeed
 from pyalgotrade.barfeed import ninjatraderfeed
@@ -672,3 +675,164 @@ class OptionalOverridesTestCase(StrategyTestCase):
         self.assertTrue(strat.onStartCalled)
         self.assertTrue(strat.onFinishCalled)
         self.assertFalse(strat.onIdleCalled)
+
+
+class BasketStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, cash, basketsByBar):
+        strategy.BacktestingStrategy.__init__(self, barFeed, cash)
+        self.getBroker().getFillStrategy().setVolumeLimit(None)
+        self.getBroker().getOrdersPlacedEvent().subscribe(self.__onOrdersPlaced)
+        # Maps bar numbers to (method, args) tuples.
+        self.__basketsByBar = basketsByBar
+        self.__barCount = 0
+        self.placedEvents = []
+        self.orders = []
+
+    def __onOrdersPlaced(self, broker_, orders):
+        self.placedEvents.append(orders)
+
+    def onBars(self, bars):
+        basket = self.__basketsByBar.get(self.__barCount)
+        if basket is not None:
+            method, args = basket
+            self.orders.extend(method(self, *args))
+        self.__barCount += 1
+
+
+class BasketTestCase(unittest.TestCase):
+    def __buildFeed(self, pricesByInstrument):
+        ret = membf.BarFeed(bar.Frequency.DAY)
+        for instrument, prices in pricesByInstrument.iteritems():
+            bars = []
+            dateTime = datetime.datetime(2011, 1, 3)
+            for price in prices:
+                bars.append(bar.BasicBar(dateTime, price, price, price, price, 1000, price, bar.Frequency.DAY))
+                dateTime += datetime.timedelta(days=1)
+            ret.addBarsFromSequence(instrument, bars)
+        return ret
+
+    def testOrderBasket(self):
+        feed = self.__buildFeed({"ins1": [10, 10, 10], "ins2": [20, 20, 20], "ins3": [5, 5, 5]})
+        strat = BasketStrategy(feed, 1000, {
+            0: (strategy.BacktestingStrategy.orderBasket, ({"ins1": 10, "ins2": 5, "ins3": 0},)),
+            1: (strategy.BacktestingStrategy.orderBasket, ({"ins1": -10, "ins3": 20},)),
+        })
+        strat.run()
+
+        self.assertEqual(len(strat.placedEvents), 2)
+        self.assertEqual(len(strat.placedEvents[0]), 2)
+        # Sell orders come first.
+        self.assertTrue(strat.placedEvents[1][0].isSell())
+        self.assertTrue(strat.placedEvents[1][1].isBuy())
+        for order in strat.orders:
+            self.assertTrue(order.isFilled())
+        self.assertEqual(strat.getBroker().getPositions(), {"ins1": 0, "ins2": 5, "ins3": 20})
+        self.assertEqual(strat.getBroker().getCash(), 1000 - 100 - 100 - 100 + 100)
+
+    def testOrderTargetWeights(self):
+        feed = self.__buildFeed({"ins1": [10, 10, 20, 20], "ins2": [20, 20, 10, 10]})
+        strat = BasketStrategy(feed, 1000, {
+            0: (strategy.BacktestingStrategy.orderTargetWeights, ({"ins1": 0.5, "ins2": 0.3},)),
+            # Equity is 1000 - 500 - 300 + 50 * 20 + 15 * 10 = 1350.
+            2: (strategy.BacktestingStrategy.orderTargetWeights, ({"ins1": 0.2, "ins2": -0.1},)),
+        })
+        strat.run()
+
+        for order in strat.orders:
+            self.assertTrue(order.isFilled())
+        self.assertEqual(strat.getBroker().getShares("ins1"), int(1350 * 0.2 / 20))
+        self.assertEqual(strat.getBroker().getShares("ins2"), int(1350 * -0.1 / 10))
+
+    def testOrderTargetWeightsWithFractions(self):
+        feed = self.__buildFeed({"ins1": [10, 10, 10], "ins2": [30, 30, 30]})
+        strat = BasketStrategy(feed, 1000, {
+            0: (strategy.BacktestingStrategy.orderTargetWeights, ({"ins1": 0.25, "ins2": 0.25},)),
+        })
+        strat.getBroker().setAllowFractions(True)
+        strat.run()
+
+        for order in strat.orders:
+            self.assertTrue(order.isFilled())
+        self.assertEqual(strat.getBroker().getShares("ins1"), 25)
+        self.assertAlmostEqual(strat.getBroker().getShares("ins2"), 1000 * 0.25 / 30)
+        self.assertAlmostEqual(strat.getBroker().getEquity(), 1000)
+
+    def testOrderTargetWeightsWithoutPrice(self):
+        feed = self.__buildFeed({"ins1": [10, 10]})
+        strat = BasketStrategy(feed, 1000, {
+            0: (strategy.BacktestingStrategy.orderTargetWeights, ({"ins1": 0.5, "ins2": 0.5},)),
+        })
+        with self.assertRaisesRegexp(Exception, "There is no price available for ins2"):
+            strat.run()
+        self.assertEqual(len(strat.getBroker().getActiveOrders()), 0)
+
+    def testPlaceOrdersChecksAllOrders(self):
+        feed = self.__buildFeed({"ins1": [10, 10]})
+        strat = BasketStrategy(feed, 1000, {})
+        brk = strat.getBroker()
+        order1 = brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 1)
+        order2 = brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 1)
+        brk.placeOrder(order2)
+        with self.assertRaisesRegexp(Exception, "The order was already processed"):
+            brk.placeOrders([order1, order2])
+        self.assertTrue(order1.isInitial())
+        order3 = brk.createMarketOrder(broker.Order.Action.BUY, "ins1", 1)
+        with self.assertRaisesRegexp(Exception, "The order was included more than once"):
+            brk.placeOrders([order3, order3])
+        self.assertTrue(order3.isInitial())
+        self.assertEqual(len(strat.placedEvents), 0)
+
+
+class CountingAnalyzer(stratanalyzer.StrategyAnalyzer):
+    def __init__(self):
+        self.bars = 0
+
+    def beforeOnBars(self, strat, bars):
+        self.bars += 1
+
+
+def counting_bars(method):
+    def wrapper(self, strat, bars):
+        self.bars += 1
+        return method(self, strat, bars)
+    return wrapper
+
+
+# Counts bars through a decorator wrapping StrategyAnalyzer's no-op beforeOnBars.
+class DecoratedAnalyzer(stratanalyzer.StrategyAnalyzer):
+    def __init__(self):
+        self.bars = 0
+
+    beforeOnBars = counting_bars(stratanalyzer.StrategyAnalyzer.beforeOnBars.im_func)
+
+
+class AnalyzerNotificationTestCase(StrategyTestCase):
+    def testBeforeOnBars(self):
+        strat = self.createStrategy()
+        analyzer1 = CountingAnalyzer()
+        analyzer2 = CountingAnalyzer()
+        strat.attachAnalyzer(analyzer1)
+        strat.attachAnalyzer(analyzer2)
+        # Attaching twice has no effect.
+        strat.attachAnalyzer(analyzer1)
+        # Analyzers that don't override beforeOnBars are not called.
+        strat.attachAnalyzer(stratanalyzer.StrategyAnalyzer())
+        strat.run()
+        self.assertEqual(analyzer1.bars, 252)
+        self.assertEqual(analyzer2.bars, 252)
+
+    def testNeedsBars(self):
+        self.assertFalse(strategy._needs_bars(stratanalyzer.StrategyAnalyzer()))
+        self.assertTrue(strategy._needs_bars(CountingAnalyzer()))
+        self.assertTrue(strategy._needs_bars(DecoratedAnalyzer()))
+
+        analyzer = stratanalyzer.StrategyAnalyzer()
+        analyzer.beforeOnBars = lambda strat, bars: None
+        self.assertTrue(strategy._needs_bars(analyzer))
+
+    def testDecoratedBeforeOnBars(self):
+        strat = self.createStrategy()
+        analyzer = DecoratedAnalyzer()
+        strat.attachAnalyzer(analyzer)
+        strat.run()
+        self.assertEqual(analyzer.bars, 252)
@@ -22,6 +22,7 @@ from pyalgotrade.talibext import indicator
 from pyalgotrade import bar
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
+from pyalgotrade.barfeed import membf
 
 import datetime
 import unittest
@@ -568,3 +569,65 @@ class TestCase(unittest.TestCase):
         self.assertTrue(compare(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[2], 94.52))
         self.assertTrue(compare(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[3], 94.86))  # Original value 94.85
         self.assertTrue(compare(indicator.WMA(barDs.getCloseDataSeries(), 252, 2)[-1], 108.16))
+
+    def testTALibFilter(self):
+        closeDs = dataseries.SequenceDataSeries()
+        sma = indicator.TALibFilter(closeDs, 2, talib.SMA, None, None, 2)
+        for value in CLOSE_VALUES:
+            closeDs.append(value)
+        self.assertEqual(sma[0], None)
+        self.assertTrue(compare(sma[1], 93.16))  # Original value 93.15
+        self.assertTrue(compare(sma[2], 94.59))
+        self.assertTrue(compare(sma[3], 94.73))
+        self.assertTrue(compare(sma[-1], 108.31))
+
+    def testTALibFilterWithBars(self):
+        barDs = bards.BarDataSeries()
+        willr = indicator.TALibFilter(barDs, 14, talib.WILLR, "hlc", None, 14)
+        for value in self.__loadBarDS():
+            barDs.append(value)
+        self.assertEqual(willr[12], None)
+        self.assertTrue(compare(willr[13], -90.1943))
+        self.assertTrue(compare(willr[13+112], 0))
+
+    def testTALibFilterWithOutputIndex(self):
+        closeDs = dataseries.SequenceDataSeries()
+        signal = indicator.TALibFilter(closeDs, 252, talib.MACD, None, 1, 12, 26, 9, maxLen=10)
+        for value in CLOSE_VALUES:
+            closeDs.append(value)
+        self.assertEqual(len(signal), 10)
+        self.assertEqual(signal[-2], None)
+        self.assertTrue(compare(signal[-1], indicator.MACD(closeDs, 252, 12, 26, 9)[1][-1]))
+
+    def testValueDsToNumpy(self):
+        ds = dataseries.SequenceDataSeries()
+        for value in [1, 2, None, 3, 4]:
+            ds.append(value)
+        self.assertEqual(indicator.value_ds_to_numpy(ds, 2).tolist(), [3.0, 4.0])
+        self.assertEqual(indicator.value_ds_to_numpy(ds, 3), None)
+
+    def testTALibPrecomputed(self):
+        barFeed = membf.BarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromSequence(TestCase.TestInstrument, self.__loadBarDS()[:])
+        sma = indicator.TALibPrecomputed(barFeed, TestCase.TestInstrument, talib.SMA, "c", None, 2)
+        willr = indicator.TALibPrecomputed(barFeed, TestCase.TestInstrument, talib.WILLR, "hlc", None, 14)
+        # No values are available before bars are dispatched.
+        self.assertEqual(len(sma), 0)
+
+        barFeed.start()
+        for i in xrange(4):
+            barFeed.dispatch()
+            self.assertEqual(len(sma), i + 1)
+        self.assertEqual(sma[0], None)
+        self.assertTrue(compare(sma[1], 93.16))  # Original value 93.15
+        self.assertTrue(compare(sma[2], 94.59))
+        self.assertTrue(compare(sma[3], 94.73))
+
+        while not barFeed.eof():
+            barFeed.dispatch()
+        barFeed.stop()
+        barFeed.join()
+        self.assertTrue(compare(sma[-1], 108.31))
+        self.assertEqual(willr[12], None)
+        self.assertTrue(compare(willr[13], -90.1943))
+        self.assertTrue(compare(willr[13+112], 0))
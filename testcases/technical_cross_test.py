@@ -19,6 +19,8 @@
 """
 
 import unittest
+import datetime
+import random
 
 from pyalgotrade.technical import cross
 from pyalgotrade.technical import ma
@@ -144,3 +146,60 @@ class TestCase(unittest.TestCase):
                 self.assertEqual(cross.cross_above(sma1[:], sma2[:], -2, None), 1)
             else:
                 self.assertEqual(cross.cross_above(sma1[:], sma2[:], -2, None), 0)
+
+    def testCrossWithNone(self):
+        values1 = self.__buildSeqDS([None, 1, 3, None, 1, 3, 1])
+        values2 = self.__buildSeqDS([2, 2, 2, 2, 2, 2, 2])
+        self.assertEqual(cross.cross_above(values1, values2, 0, 3), 1)
+        self.assertEqual(cross.cross_above(values1, values2, 2, 5), 0)
+        self.assertEqual(cross.cross_below(values1, values2, 2, 4), 0)
+        self.assertEqual(cross.cross_below(values1, values2, 0, None), 1)
+        self.assertEqual(cross.cross_above(values1, values2, 0, None), 2)
+        self.assertEqual(cross.cross_above(values1, values2, 2, 3), 0)
+
+    def testCrossMatchesLoop(self):
+        rnd = random.Random(1234)
+        values1 = [rnd.choice([None, 1, 2, 3]) for i in range(200)]
+        values2 = [2 for i in range(200)]
+        expectedAbove = 0
+        expectedBelow = 0
+        for i in range(1, len(values1)):
+            if values1[i-1] is not None and values1[i] is not None:
+                if values1[i-1] <= 2 and values1[i] > 2:
+                    expectedAbove += 1
+                elif values1[i-1] >= 2 and values1[i] < 2:
+                    expectedBelow += 1
+        self.assertEqual(cross.cross_above(values1, values2, 0, None), expectedAbove)
+        self.assertEqual(cross.cross_below(values1, values2, 0, None), expectedBelow)
+
+
+class CrossDetectorTestCase(unittest.TestCase):
+    def testCrossDetector(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossDetector = cross.CrossDetector(ds1, ds2)
+        dateTime = datetime.datetime(2013, 1, 1)
+        values1 = [1, 1, 3, 3, None, 1, 2, 3, 1]
+        values2 = [2, 2, 2, 2, 2, 2, 2, 2, 2]
+        for i in range(len(values1)):
+            ds1.appendWithDateTime(dateTime + datetime.timedelta(days=i), values1[i])
+            ds2.appendWithDateTime(dateTime + datetime.timedelta(days=i), values2[i])
+        self.assertEqual(crossDetector[:], [0, 0, 1, 0, 0, 0, 0, 1, -1])
+        self.assertEqual(crossDetector.getDateTimes()[-1], dateTime + datetime.timedelta(days=8))
+        self.assertEqual(crossDetector.getCrossAboveCount(), 2)
+        self.assertEqual(crossDetector.getCrossBelowCount(), 1)
+
+    def testAlignment(self):
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+        crossDetector = cross.CrossDetector(ds1, ds2)
+        dateTime = datetime.datetime(2013, 1, 1)
+        # The second dataseries is missing the value for the second day.
+        ds1.appendWithDateTime(dateTime, 1)
+        ds1.appendWithDateTime(dateTime + datetime.timedelta(days=1), 3)
+        ds1.appendWithDateTime(dateTime + datetime.timedelta(days=2), 3)
+        ds2.appendWithDateTime(dateTime, 2)
+        self.assertEqual(len(crossDetector), 1)
+        ds2.appendWithDateTime(dateTime + datetime.timedelta(days=2), 2)
+        self.assertEqual(crossDetector[:], [0, 1])
+        self.assertEqual(crossDetector.getDateTimes(), [dateTime, dateTime + datetime.timedelta(days=2)])
@@ -37,3 +37,10 @@ class CumRetTestCase(unittest.TestCase):
         self.assertEqual(rets[5], 2)
         self.assertEqual(rets[6], 0)
         self.assertEqual(round(rets[7], 1), 0.2)
+
+    def testCumRetWithNone(self):
+        values = dataseries.SequenceDataSeries()
+        rets = cumret.CumulativeReturn(values)
+        for value in [1, 2, None, 4]:
+            values.append(value)
+        self.assertEqual(rets[:], [None, 1, 1, 3])
@@ -19,6 +19,8 @@
 """
 
 import unittest
+import random
+
 from pyalgotrade import dataseries
 from pyalgotrade.technical import highlow
 
@@ -32,3 +34,26 @@ class HighLowTestCase(unittest.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testHighLowWithNone(self):
+        values = dataseries.SequenceDataSeries()
+        high = highlow.High(values, 2)
+        low = highlow.Low(values, 2)
+        for value in [3, None, 1, 2, None]:
+            values.append(value)
+        self.assertEqual(high[:], [None, None, 3, 2, 2])
+        self.assertEqual(low[:], [None, None, 1, 1, 1])
+
+    def testWindowMinMax(self):
+        rnd = random.Random(1234)
+        values = [rnd.randint(0, 10) for i in xrange(200)]
+        for windowSize in [1, 2, 5, 30]:
+            windowMin = highlow.WindowMinMax(windowSize, True)
+            windowMax = highlow.WindowMinMax(windowSize, False)
+            self.assertEqual(windowMin.getValue(), None)
+            for i in xrange(len(values)):
+                windowMin.append(values[i])
+                windowMax.append(values[i])
+                window = values[max(0, i - windowSize + 1):i + 1]
+                self.assertEqual(windowMin.getValue(), min(window))
+                self.assertEqual(windowMax.getValue(), max(window))
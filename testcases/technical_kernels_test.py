@@ -0,0 +1,152 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import random
+
+import numpy as np
+
+from pyalgotrade.technical import kernels
+from pyalgotrade.technical import pykernels
+from pyalgotrade.technical import rsi
+
+try:
+    from pyalgotrade.technical import ckernels
+except ImportError:
+    ckernels = None
+
+
+def build_values(count, seed=1234):
+    rnd = random.Random(seed)
+    return [rnd.uniform(10, 20) for i in xrange(count)]
+
+
+def run_kernel(kernel, values):
+    ret = []
+    for value in values:
+        kernel.update(value)
+        ret.append(kernel.getValue())
+    return ret
+
+
+class KernelsTestMixin(object):
+    Kernels = None
+
+    def testSMA(self):
+        values = build_values(100)
+        result = run_kernel(self.Kernels.SMA(10), values)
+        self.assertEqual(result[:9], [None] * 9)
+        for i in xrange(9, len(values)):
+            self.assertAlmostEqual(result[i], np.mean(values[i-9:i+1]))
+
+    def testEMA(self):
+        values = [1, 2, 3, 4, 5]
+        result = run_kernel(self.Kernels.EMA(3), values)
+        self.assertEqual(result[:2], [None, None])
+        self.assertEqual(result[2], 2)
+        self.assertEqual(result[3], 3)
+        self.assertEqual(result[4], 4)
+
+    def testRSI(self):
+        values = build_values(100)
+        result = run_kernel(self.Kernels.RSI(14), values)
+        self.assertEqual(result[:14], [None] * 14)
+        for i in xrange(14, len(values)):
+            self.assertAlmostEqual(result[i], rsi.rsi(values[:i+1], 14))
+
+    def testRSIWithoutLosses(self):
+        result = run_kernel(self.Kernels.RSI(2), [1, 2, 3, 4])
+        self.assertEqual(result, [None, None, 100, 100])
+
+    def testROC(self):
+        result = run_kernel(self.Kernels.ROC(1), [1, 2, 2, 1, 0, 1])
+        self.assertEqual(result, [None, 1, 0, -0.5, -1, None])
+
+    def testCumRet(self):
+        result = run_kernel(self.Kernels.CumRet(), [1, 2, 4, 1])
+        self.assertEqual(result, [None, 1, 3, 0])
+
+    def testRatio(self):
+        kernel = self.Kernels.Ratio()
+        self.assertEqual(run_kernel(kernel, [1, 2, -2]), [None, 1, -2])
+        self.assertEqual(run_kernel(kernel, [0]), [1])
+        with self.assertRaisesRegexp(Exception, "Invalid values"):
+            kernel.update(1)
+
+    def testWindowValues(self):
+        for kernel, windowSize in [(self.Kernels.SMA(3), 3), (self.Kernels.ROC(2), 3)]:
+            self.assertEqual(kernel.getValues().tolist(), [])
+            self.assertFalse(kernel.windowFull())
+            for value in [1, 2, None, 3, 4, 5]:
+                kernel.update(value)
+            self.assertTrue(kernel.windowFull())
+            self.assertEqual(kernel.getValues().tolist(), [3, 4, 5])
+            self.assertEqual(len(kernel.getValues()), windowSize)
+
+    def testNoneValuesAreSkipped(self):
+        values = build_values(50)
+        valuesWithNone = []
+        for value in values:
+            valuesWithNone.extend([value, None])
+
+        for kernelFactory in [
+            lambda: self.Kernels.SMA(5),
+            lambda: self.Kernels.EMA(5),
+            lambda: self.Kernels.RSI(5),
+            lambda: self.Kernels.ROC(5),
+            lambda: self.Kernels.CumRet(),
+            lambda: self.Kernels.Ratio(),
+        ]:
+            expected = run_kernel(kernelFactory(), values)
+            result = run_kernel(kernelFactory(), valuesWithNone)
+            self.assertEqual(result[::2], expected)
+            self.assertEqual(result[1::2], expected)
+
+
+class PyKernelsTestCase(KernelsTestMixin, unittest.TestCase):
+    Kernels = pykernels
+
+
+@unittest.skipUnless(ckernels is not None, "Compiled kernels not available")
+class CKernelsTestCase(KernelsTestMixin, unittest.TestCase):
+    Kernels = ckernels
+
+    def testSameValuesAsPyKernels(self):
+        values = build_values(1000)
+        for name, args in [("SMA", (20,)), ("EMA", (20,)), ("RSI", (14,)), ("ROC", (10,)), ("CumRet", ()), ("Ratio", ())]:
+            expected = run_kernel(getattr(pykernels, name)(*args), values)
+            result = run_kernel(getattr(ckernels, name)(*args), values)
+            self.assertEqual(result, expected)
+
+        for name, args in [("SMA", (20,)), ("ROC", (10,))]:
+            expected = getattr(pykernels, name)(*args)
+            result = getattr(ckernels, name)(*args)
+            run_kernel(expected, values)
+            run_kernel(result, values)
+            self.assertEqual(result.getValues().tolist(), expected.getValues().tolist())
+
+
+class KernelsTestCase(unittest.TestCase):
+    def testImplementation(self):
+        if kernels.ACCELERATED:
+            self.assertEqual(kernels.impl, ckernels)
+        else:
+            self.assertEqual(kernels.impl, pykernels)
+        self.assertEqual(kernels.SMA, kernels.impl.SMA)
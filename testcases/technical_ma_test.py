@@ -141,6 +141,8 @@ class SMATestCase(unittest.TestCase):
             smaEW.onNewValue(None, i)
             self.assertEqual(sma[-1], smaEW.getValue())
             smaEW.onNewValue(None, None)  # This value should get skipped
+            self.assertEqual(smaEW.windowFull(), i >= 9)
+            self.assertEqual(smaEW.getValues().tolist(), range(max(0, i - 9), i + 1))
 
     def testStockChartsSMA_BoundedSeq(self):
         # Test data from http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_averages
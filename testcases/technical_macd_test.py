@@ -39,3 +39,34 @@ class MACDTestCase(unittest.TestCase):
             self.assertEqual(common.safe_round(macdDs[i], 4), macdValues[i])
             self.assertEqual(common.safe_round(macdDs.getSignal()[i], 4), signalValues[i])
             self.assertEqual(common.safe_round(macdDs.getHistogram()[i], 4), histogramValues[i])
+
+    def testNoneValues(self):
+        values = [16.39, 16.4999, 16.45, 16.43, 16.52, 16.51, 16.423, 16.41, 16.47, 16.45, 16.32, 16.36, 16.34, 16.59, 16.54, 16.52, 16.44, 16.47, 16.5, 16.45]
+        ds = dataseries.SequenceDataSeries()
+        macdDs = macd.MACD(ds, 5, 13, 6)
+        for value in values:
+            ds.append(value)
+
+        # Leading and intermediate None values are skipped.
+        dsWithNones = dataseries.SequenceDataSeries()
+        macdWithNones = macd.MACD(dsWithNones, 5, 13, 6)
+        dsWithNones.append(None)
+        dsWithNones.append(None)
+        for i, value in enumerate(values):
+            if i == 18:
+                dsWithNones.append(None)
+                self.assertEqual(macdWithNones[-1], None)
+                self.assertEqual(macdWithNones.getSignal()[-1], None)
+                self.assertEqual(macdWithNones.getHistogram()[-1], None)
+            dsWithNones.append(value)
+            self.assertEqual(macdWithNones[-1], macdDs[i])
+            self.assertEqual(macdWithNones.getSignal()[-1], macdDs.getSignal()[i])
+            self.assertEqual(macdWithNones.getHistogram()[-1], macdDs.getHistogram()[i])
+
+    def testLeadingNone(self):
+        ds = dataseries.SequenceDataSeries()
+        macdDs = macd.MACD(ds, 2, 3, 2)
+        for value in [None, 1, 2, 3, 4, 5, 6]:
+            ds.append(value)
+        self.assertEqual(macdDs[0], None)
+        self.assertNotEqual(macdDs[-1], None)
@@ -96,3 +96,21 @@ class VWAPTestCase(unittest.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def testPeriod20(self):
+        for useTypicalPrice in [False, True]:
+            barFeed = self.__getFeed()
+            bars = barFeed[VWAPTestCase.Instrument]
+            vwap_ = vwap.VWAP(bars, 20, useTypicalPrice)
+            self.assertEqual(vwap_.getPeriod(), 20)
+            barFeed.loadAll()
+            for i in xrange(19, len(bars)):
+                cumTotal = 0
+                cumVolume = 0
+                for bar in bars[i-19:i+1]:
+                    if useTypicalPrice:
+                        cumTotal += bar.getTypicalPrice() * bar.getVolume()
+                    else:
+                        cumTotal += bar.getClose() * bar.getVolume()
+                    cumVolume += bar.getVolume()
+                self.assertAlmostEqual(vwap_[i], cumTotal / float(cumVolume))
@@ -0,0 +1,214 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2013 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import unittest
+import datetime
+import os
+
+from pyalgotrade import broker
+from pyalgotrade import bar
+from pyalgotrade.broker import tickreplay
+import broker_backtesting_test
+import common
+
+
+def minute(minutes, seconds=0):
+    return datetime.datetime(2011, 1, 1) + datetime.timedelta(minutes=minutes, seconds=seconds)
+
+
+class CountingTickStore(tickreplay.MemTickStore):
+    def __init__(self):
+        tickreplay.MemTickStore.__init__(self)
+        self.requests = 0
+
+    def getTicks(self, instrument, fromDateTime, toDateTime):
+        self.requests += 1
+        return tickreplay.MemTickStore.getTicks(self, instrument, fromDateTime, toDateTime)
+
+
+class TickStoreTestCase(unittest.TestCase):
+    TestInstrument = "orcl"
+
+    def __buildTicks(self):
+        return [(minute(0, i * 10), 10 + i, i + 1) for i in range(12)]
+
+    def testMemTickStore(self):
+        store = tickreplay.MemTickStore()
+        ticks = self.__buildTicks()
+        store.addTicks(TickStoreTestCase.TestInstrument, reversed(ticks))
+        self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(0), minute(1)), ticks[:6])
+        self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(1), minute(2)), ticks[6:])
+        self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(0, 15), minute(0, 35)), ticks[2:4])
+        self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(2), minute(3)), [])
+        self.assertEqual(store.getTicks("other", minute(0), minute(1)), [])
+
+    def testCSVTickStore(self):
+        common.init_temp_path()
+        path = os.path.join(common.get_temp_path(), "ticks.csv")
+        ticks = self.__buildTicks()
+        with open(path, "w") as f:
+            f.write("Date Time,Price,Volume\n")
+            for tick in ticks:
+                f.write("%s,%s,%s\n" % (tick[0].strftime("%Y-%m-%d %H:%M:%S"), tick[1], tick[2]))
+
+        for indexStep in [1, 5, 1000]:
+            store = tickreplay.CSVTickStore(indexStep=indexStep)
+            store.addTicksFromCSV(TickStoreTestCase.TestInstrument, path)
+            self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(0), minute(1)), ticks[:6])
+            self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(1), minute(2)), ticks[6:])
+            self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(0, 55), minute(1, 25)), ticks[6:9])
+            self.assertEqual(store.getTicks(TickStoreTestCase.TestInstrument, minute(2), minute(3)), [])
+            self.assertEqual(store.getTicks("other", minute(0), minute(1)), [])
+
+
+class TickReplayStrategyTestCase(broker_backtesting_test.BaseTestCase):
+    def __buildBroker(self, ticks):
+        barFeed = self.buildBarFeed(broker_backtesting_test.BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        tickStore = CountingTickStore()
+        tickStore.addTicks(broker_backtesting_test.BaseTestCase.TestInstrument, ticks)
+        brk.setFillStrategy(tickreplay.TickReplayStrategy(tickStore))
+        brk.getFillStrategy().getFillStrategy().setVolumeLimit(None)
+        return barFeed, brk, tickStore
+
+    def testLimitOrder(self):
+        ticks = [
+            (minute(2, 10), 10.5, 1),
+            (minute(2, 20), 9.5, 2),
+            (minute(2, 30), 10.5, 10),
+            (minute(2, 40), 9, 10),
+        ]
+        barFeed, brk, tickStore = self.__buildBroker(ticks)
+
+        order = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 5)
+        order.setGoodTillCanceled(True)
+        brk.placeOrder(order)
+        # The order gets accepted.
+        barFeed.dispatchBars(11, 12, 10.5, 11)
+        self.assertTrue(order.isAccepted())
+        self.assertEqual(tickStore.requests, 1)
+
+        # The bar doesn't reach the limit price so ticks are not loaded.
+        barFeed.dispatchBars(11, 12, 10.5, 11)
+        self.assertTrue(order.isAccepted())
+        self.assertEqual(tickStore.requests, 1)
+
+        barFeed.dispatchBars(10.5, 10.5, 9, 9.5)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(tickStore.requests, 2)
+        self.assertEqual(order.getAvgFillPrice(), (9.5 * 2 + 9 * 3) / 5.0)
+        self.assertEqual(brk.getShares(broker_backtesting_test.BaseTestCase.TestInstrument), 5)
+
+    def testStopOrder(self):
+        ticks = [
+            (minute(0, 10), 10, 1),
+            (minute(0, 20), 8, 1),
+            (minute(0, 30), 12, 1),
+            (minute(0, 40), 10, 10),
+        ]
+        barFeed, brk, tickStore = self.__buildBroker(ticks)
+
+        order = brk.createStopOrder(broker.Order.Action.SELL_SHORT, broker_backtesting_test.BaseTestCase.TestInstrument, 9, 2)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 12, 8, 10)
+        self.assertTrue(order.getStopHit())
+        self.assertTrue(order.isFilled())
+        # The ticks following the one that hit the stop price are used.
+        self.assertEqual(order.getAvgFillPrice(), 10)
+        self.assertEqual(order.getExecutionInfo().getQuantity(), 2)
+
+    def testStopLimitOrder(self):
+        ticks = [
+            (minute(0, 10), 10, 1),
+            (minute(0, 20), 12, 1),
+            (minute(0, 30), 11, 1),
+            (minute(0, 40), 13, 10),
+            (minute(0, 50), 11.5, 10),
+        ]
+        barFeed, brk, tickStore = self.__buildBroker(ticks)
+
+        order = brk.createStopLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 12, 11.5, 3)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(10, 13, 10, 11.5)
+        self.assertTrue(order.getStopHit())
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), (11 + 11.5 * 2) / 3.0)
+
+    def testTickVolumeIsShared(self):
+        ticks = [
+            (minute(0, 10), 9, 3),
+        ]
+        barFeed, brk, tickStore = self.__buildBroker(ticks)
+
+        order1 = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 2)
+        order2 = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 2)
+        brk.placeOrder(order1)
+        brk.placeOrder(order2)
+        barFeed.dispatchBars(9, 9, 9, 9)
+        self.assertTrue(order1.isFilled())
+        self.assertEqual(order2.getFilled(), 1)
+        self.assertEqual(tickStore.requests, 1)
+
+    def testTickFillsUseBarVolume(self):
+        ticks = [
+            (minute(0, 10), 9, 8),
+        ]
+        barFeed, brk, tickStore = self.__buildBroker(ticks)
+        # 25% of the bar's volume is available.
+        brk.getFillStrategy().getFillStrategy().setVolumeLimit(0.25)
+
+        limitOrder = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 8)
+        marketOrder = brk.createMarketOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 5)
+        brk.placeOrder(limitOrder)
+        brk.placeOrder(marketOrder)
+        barFeed.dispatchBars(9, 9, 9, 9, 40)
+        self.assertTrue(limitOrder.isFilled())
+        self.assertEqual(limitOrder.getAvgFillPrice(), 9)
+        # Only 10 - 8 shares were left for the market order.
+        self.assertEqual(marketOrder.getFilled(), 2)
+
+        # Tick fills may take more than the volume available in the bar.
+        ticks = [
+            (minute(1, 10), 9, 20),
+        ]
+        tickStore.addTicks(broker_backtesting_test.BaseTestCase.TestInstrument, ticks)
+        limitOrder = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 15)
+        marketOrder = brk.createMarketOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 1)
+        brk.placeOrder(limitOrder)
+        brk.placeOrder(marketOrder)
+        barFeed.dispatchBars(9, 9, 9, 9, 40)
+        self.assertTrue(limitOrder.isFilled())
+        self.assertTrue(marketOrder.isAccepted())
+        self.assertEqual(marketOrder.getFilled(), 0)
+
+    def testFallbackWithoutTicks(self):
+        barFeed, brk, tickStore = self.__buildBroker([])
+
+        order = brk.createLimitOrder(broker.Order.Action.BUY, broker_backtesting_test.BaseTestCase.TestInstrument, 10, 1)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(11, 12, 9, 10)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 10)
+
+        order = brk.createMarketOrder(broker.Order.Action.SELL, broker_backtesting_test.BaseTestCase.TestInstrument, 1)
+        brk.placeOrder(order)
+        barFeed.dispatchBars(11, 12, 9, 10)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 11)
@@ -146,6 +146,64 @@ class TradesAnalyzerTestCase(unittest.TestCase):
             self.assertTrue(stratAnalyzer.getLosses().std(ddof=1) == 0)
         self.assertTrue(stratAnalyzer.getLosses().std(ddof=0) == 0)
 
+    def testStreaming(self):
+        results = []
+        for streaming in [False, True]:
+            strat = self.__createStrategy()
+            stratAnalyzer = trades.Trades(streaming)
+            strat.attachAnalyzer(stratAnalyzer)
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 0), strat.getBroker().createMarketOrder, broker.Order.Action.BUY, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.14
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 16), strat.getBroker().createMarketOrder, broker.Order.Action.SELL, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.16
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 30), strat.getBroker().createMarketOrder, broker.Order.Action.BUY, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.2
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 31), strat.getBroker().createMarketOrder, broker.Order.Action.SELL, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.16
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 38), strat.getBroker().createMarketOrder, broker.Order.Action.BUY, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.16
+            strat.addOrder(buildUTCDateTime(2011, 1, 3, 15, 42), strat.getBroker().createMarketOrder, broker.Order.Action.SELL, TradesAnalyzerTestCase.TestInstrument, 1)  # 127.26
+            strat.run()
+            results.append(stratAnalyzer)
+
+        keptValues, streamed = results
+        self.assertEqual(streamed.getCount(), 3)
+        self.assertEqual(streamed.getProfitableCount(), 2)
+        self.assertEqual(streamed.getUnprofitableCount(), 1)
+        self.assertEqual(streamed.getEvenCount(), 0)
+        with self.assertRaises(Exception):
+            streamed.getAll()
+
+        for values, runningStats in [
+            (keptValues.getAll(), streamed.getAllStats()),
+            (keptValues.getProfits(), streamed.getProfitsStats()),
+            (keptValues.getLosses(), streamed.getLossesStats()),
+            (keptValues.getAllReturns(), streamed.getAllReturnsStats()),
+        ]:
+            self.assertEqual(runningStats.getCount(), len(values))
+            self.assertAlmostEqual(runningStats.getMean(), values.mean())
+            self.assertAlmostEqual(runningStats.getStdDev(0), values.std(ddof=0))
+            self.assertEqual(runningStats.getMin(), values.min())
+            self.assertEqual(runningStats.getMax(), values.max())
+            self.assertAlmostEqual(runningStats.getQuantile(0.5), numpy.median(values))
+        self.assertEqual(streamed.getCommissionsForEvenTradesStats().getCount(), 0)
+
+        # Stats for kept values are built from the values.
+        for values, runningStats in [
+            (keptValues.getAll(), keptValues.getAllStats()),
+            (keptValues.getProfits(), keptValues.getProfitsStats()),
+        ]:
+            self.assertEqual(runningStats.getCount(), len(values))
+            self.assertAlmostEqual(runningStats.getMean(), values.mean())
+
+    def testTradeValuesStatsUpdated(self):
+        for keepValues in [True, False]:
+            tradeValues = trades.TradeValues(keepValues)
+            self.assertEqual(tradeValues.getCount(), 0)
+            self.assertEqual(tradeValues.getStats().getCount(), 0)
+            tradeValues.add(1)
+            tradeValues.add(3)
+            self.assertEqual(tradeValues.getCount(), 2)
+            self.assertEqual(tradeValues.getStats().getMean(), 2)
+            tradeValues.add(5)
+            self.assertEqual(tradeValues.getStats().getCount(), 3)
+            self.assertEqual(tradeValues.getStats().getMax(), 5)
+
     def testSomeTradesWithCommissions(self):
         strat = self.__createStrategy()
         strat.getBroker().setCommission(backtesting.FixedPerTrade(0.01))
@@ -21,9 +21,12 @@
 from pyalgotrade import utils
 from pyalgotrade.utils import collections
 from pyalgotrade.utils import dt
+from pyalgotrade.utils import stats
 
 import unittest
 import datetime
+import random
+import numpy
 
 class UtilsTestCase(unittest.TestCase):
     def testChangePercentage(self):
@@ -229,3 +232,61 @@ class DateTimeTestCase(unittest.TestCase):
 
         dateTime = dt.as_utc(datetime.datetime(2000, 1, 1, 1, 1, 1, microsecond=10))
         self.assertEqual(dt.timestamp_to_datetime(dt.datetime_to_timestamp(dateTime), True), dateTime)
+
+
+class StatsTestCase(unittest.TestCase):
+    def testRunningStats(self):
+        values = [random.gauss(0, 1) for i in range(1000)]
+        runningStats = stats.RunningStats()
+        for value in values:
+            runningStats.add(value)
+        self.assertEqual(runningStats.getCount(), len(values))
+        self.assertAlmostEqual(runningStats.getSum(), sum(values))
+        self.assertAlmostEqual(runningStats.getMean(), numpy.mean(values))
+        self.assertAlmostEqual(runningStats.getStdDev(), numpy.std(values, ddof=1))
+        self.assertAlmostEqual(runningStats.getStdDev(0), numpy.std(values))
+        self.assertEqual(runningStats.getMin(), min(values))
+        self.assertEqual(runningStats.getMax(), max(values))
+        self.assertEqual(runningStats.getQuantile(0), min(values))
+        self.assertEqual(runningStats.getQuantile(1), max(values))
+        for q in [0.01, 0.1, 0.5, 0.9, 0.99]:
+            self.assertTrue(abs(runningStats.getQuantile(q) - numpy.percentile(values, q * 100)) < 0.05)
+
+    def testEmptyRunningStats(self):
+        runningStats = stats.RunningStats()
+        self.assertEqual(runningStats.getCount(), 0)
+        self.assertEqual(runningStats.getMean(), None)
+        self.assertEqual(runningStats.getStdDev(), None)
+        self.assertEqual(runningStats.getMin(), None)
+        self.assertEqual(runningStats.getQuantile(0.5), None)
+
+        runningStats.add(1)
+        self.assertEqual(runningStats.getStdDev(0), 0)
+        self.assertTrue(numpy.isnan(runningStats.getStdDev(1)))
+
+    def testExactQuantiles(self):
+        values = [random.random() for i in range(150)]
+        sketch = stats.QuantileSketch(100)
+        for value in values:
+            sketch.add(value)
+        for q in [0, 0.05, 0.25, 0.5, 0.75, 0.95, 1]:
+            self.assertAlmostEqual(sketch.getQuantile(q), numpy.percentile(values, q * 100))
+
+    def testMerge(self):
+        values = [random.expovariate(1) for i in range(3000)]
+        merged = stats.RunningStats()
+        for i in range(3):
+            part = stats.RunningStats()
+            for value in values[i*1000:(i+1)*1000]:
+                part.add(value)
+            merged.merge(part)
+        merged.merge(stats.RunningStats())
+
+        self.assertEqual(merged.getCount(), len(values))
+        self.assertAlmostEqual(merged.getMean(), numpy.mean(values))
+        self.assertAlmostEqual(merged.getStdDev(), numpy.std(values, ddof=1))
+        self.assertEqual(merged.getMin(), min(values))
+        self.assertEqual(merged.getMax(), max(values))
+        for q in [0.01, 0.1, 0.5, 0.9, 0.99]:
+            expected = numpy.percentile(values, q * 100)
+            self.assertTrue(abs(merged.getQuantile(q) - expected) / expected < 0.05)